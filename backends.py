@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from ctypes import CDLL
+from pathlib import Path
+
+CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
+MPV_LIB_CACHE_PATH = CONFIG_DIR / "libmpv.json"
+BACKEND_ENV = "TUPLET_BACKEND"
+NULL_DURATION_ENV = "TUPLET_NULL_DURATION"
+NULL_SPEED_ENV = "TUPLET_NULL_SPEED"
+MPV_PROFILE_ENV = "TUPLET_MPV_PROFILE"
+DAEMON_CONFIG_PATH = CONFIG_DIR / "daemon.json"
+# How libmpv was found on this start ("cached" or "probed"), for timing reports.
+_mpv_lib_source = "probed"
+
+
+# ── libmpv discovery ─────────────────────────────────────────────────────
+def _mpv_lib_names() -> tuple[str, ...]:
+    if sys.platform.startswith("win"):
+        return ("mpv-2.dll", "libmpv-2.dll", "mpv-1.dll")
+    if sys.platform == "darwin":
+        return ("libmpv.dylib", "libmpv.2.dylib")
+    return ("libmpv.so", "libmpv.so.2", "libmpv.so.1")
+
+
+def _mpv_lib_candidates() -> list[Path]:
+    root = Path(__file__).resolve().parent
+    candidates: list[Path] = []
+
+    bundled = root / "libs"
+    if bundled.is_dir():
+        candidates.append(bundled)
+
+    if sys.platform == "darwin":
+        brew_prefix = Path(os.environ.get("HOMEBREW_PREFIX", "/opt/homebrew"))
+        for rel in ("lib", "opt/mpv/lib"):
+            path = brew_prefix / rel
+            if path.is_dir():
+                candidates.append(path)
+    elif not sys.platform.startswith("win"):
+        for path in (Path("/usr/local/lib"), Path("/usr/lib")):
+            if path.is_dir():
+                candidates.append(path)
+
+    seen: set[Path] = set()
+    unique: list[Path] = []
+    for path in candidates:
+        resolved = path.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            unique.append(resolved)
+    return unique
+
+
+def _try_load_mpv_lib(lib_dir: Path) -> Path | None:
+    for name in _mpv_lib_names():
+        lib_file = lib_dir / name
+        if not lib_file.is_file():
+            continue
+        try:
+            CDLL(str(lib_file))
+            return lib_file
+        except OSError:
+            continue
+    return None
+
+
+def _load_cached_mpv_lib() -> Path | None:
+    """Return the cached libmpv path if the file is unchanged and loads."""
+    try:
+        data = json.loads(MPV_LIB_CACHE_PATH.read_text())
+        lib_file = Path(data["path"])
+        if lib_file.stat().st_mtime_ns != data["mtime_ns"]:
+            return None
+        CDLL(str(lib_file))
+        return lib_file
+    except Exception:
+        return None
+
+
+def _save_cached_mpv_lib(lib_file: Path) -> None:
+    try:
+        MPV_LIB_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        data = {"path": str(lib_file), "mtime_ns": lib_file.stat().st_mtime_ns}
+        MPV_LIB_CACHE_PATH.write_text(json.dumps(data))
+    except Exception:
+        pass
+
+
+def _prepend_lib_path(var: str, lib_dir: Path) -> None:
+    existing = os.environ.get(var, "")
+    os.environ[var] = f"{lib_dir}:{existing}" if existing else str(lib_dir)
+
+
+def _setup_mpv_library() -> None:
+    global _mpv_lib_source
+    if sys.platform.startswith("win"):
+        lib_dir = Path(__file__).resolve().parent / "libs"
+        if not lib_dir.is_dir():
+            raise RuntimeError(
+                "Local mpv library directory not found. "
+                "Place mpv DLLs in libs/ or install mpv."
+            )
+        os.add_dll_directory(str(lib_dir))
+        return
+
+    var = "DYLD_LIBRARY_PATH" if sys.platform == "darwin" else "LD_LIBRARY_PATH"
+    cached = _load_cached_mpv_lib()
+    if cached is not None:
+        _prepend_lib_path(var, cached.parent)
+        _mpv_lib_source = "cached"
+        return
+
+    for lib_dir in _mpv_lib_candidates():
+        lib_file = _try_load_mpv_lib(lib_dir)
+        if lib_file is None:
+            continue
+        _prepend_lib_path(var, lib_dir)
+        _save_cached_mpv_lib(lib_file)
+        return
+
+    hint = (
+        "Try: brew install mpv"
+        if sys.platform == "darwin"
+        else "Install mpv and libmpv development libraries for your distro."
+    )
+    raise RuntimeError(f"Cannot load libmpv from any known location. {hint}")
+
+
+# ── mpv profiles ─────────────────────────────────────────────────────────
+# Buffering options per profile, as mpv option names. "default" leaves
+# mpv's own defaults; daemon.json's "mpv_options" are applied on top (the
+# audio output, "ao", is set there).
+MPV_PROFILES = {
+    "default": {},
+    # files on local disks: little read-ahead, short audio buffer so pause
+    # and seek respond at once
+    "local": {
+        "cache": "no",
+        "demuxer-readahead-secs": 1,
+        "demuxer-max-bytes": "32MiB",
+        "demuxer-max-back-bytes": "8MiB",
+        "audio-buffer": 0.1,
+    },
+    # files on network shares: minutes of read-ahead ride out a stalled
+    # link, and playback waits for a few seconds of data after an underrun
+    "network": {
+        "cache": "yes",
+        "cache-secs": 300,
+        "demuxer-readahead-secs": 60,
+        "demuxer-max-bytes": "256MiB",
+        "demuxer-max-back-bytes": "64MiB",
+        "cache-pause-wait": 5,
+        "audio-buffer": 0.5,
+    },
+    "low-memory": {
+        "cache": "no",
+        "demuxer-readahead-secs": 5,
+        "demuxer-max-bytes": "4MiB",
+        "demuxer-max-back-bytes": "512KiB",
+        "audio-buffer": 0.2,
+    },
+}
+
+
+def load_daemon_config(path: Path = DAEMON_CONFIG_PATH) -> dict:
+    """``daemon.json`` from the config directory; {} if there is none."""
+    try:
+        text = path.read_text()
+    except OSError:
+        return {}
+    try:
+        config = json.loads(text)
+    except ValueError as exc:
+        raise RuntimeError(f"Invalid {path}: {exc}") from None
+    if not isinstance(config, dict):
+        raise RuntimeError(f"Invalid {path}: expected a JSON object")
+    return config
+
+
+def resolve_mpv_profile(name: str | None = None, config: dict | None = None) -> tuple[str, dict]:
+    """Profile name and mpv options, from *name*, ``$TUPLET_MPV_PROFILE``,
+    daemon.json's ``"mpv_profile"`` or ``"default"``, in that order."""
+    if config is None:
+        config = load_daemon_config()
+    name = str(
+        name or os.environ.get(MPV_PROFILE_ENV) or config.get("mpv_profile") or "default"
+    ).lower()
+    if name not in MPV_PROFILES:
+        raise RuntimeError(
+            f"Unknown mpv profile {name!r} (choose from {', '.join(MPV_PROFILES)})"
+        )
+    options = dict(MPV_PROFILES[name])
+    extra = config.get("mpv_options") or {}
+    if not isinstance(extra, dict):
+        raise RuntimeError(f"Invalid mpv_options in {DAEMON_CONFIG_PATH}: expected an object")
+    options.update({str(key).replace("_", "-"): value for key, value in extra.items()})
+    return name, options
+
+
+# ── Backends ─────────────────────────────────────────────────────────────
+class PlayerBackend(ABC):
+    """Playback engine driven by the daemon.
+
+    Properties mirror the mpv ones the daemon reads: ``time_pos`` and
+    ``duration`` are seconds (``None`` when unknown), ``idle_active`` is True
+    when nothing is loaded, and ``pause`` is readable and writable.
+    ``observe`` registers ``callback(name, value)`` for the ``"idle-active"``
+    and ``"pause"`` properties; callbacks may run on any thread.
+    ``buffered`` is the seconds of audio read ahead of the playing position
+    (``None`` when unknown).
+    """
+
+    name = "base"
+    # mpv profile in use, if the backend has one
+    profile: str | None = None
+
+    @abstractmethod
+    def play(self, path: str, start: float = 0.0) -> None:
+        ...
+
+    @abstractmethod
+    def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    def seek(self, seconds: float) -> None:
+        ...
+
+    @property
+    @abstractmethod
+    def pause(self) -> bool:
+        ...
+
+    @pause.setter
+    @abstractmethod
+    def pause(self, value: bool) -> None:
+        ...
+
+    @property
+    @abstractmethod
+    def time_pos(self) -> float | None:
+        ...
+
+    @property
+    @abstractmethod
+    def duration(self) -> float | None:
+        ...
+
+    @property
+    @abstractmethod
+    def idle_active(self) -> bool:
+        ...
+
+    @property
+    def buffered(self) -> float | None:
+        return None
+
+    def buffer_state(self) -> dict:
+        """Buffer fill for STATS."""
+        return {"buffered_s": self.buffered}
+
+    @abstractmethod
+    def observe(self, name: str, callback) -> None:
+        ...
+
+    def terminate(self) -> None:
+        pass
+
+
+class MpvBackend(PlayerBackend):
+    name = "mpv"
+
+    def __init__(self, profile: str | None = None):
+        self.profile, self.options = resolve_mpv_profile(profile)
+        _setup_mpv_library()
+        import mpv
+
+        self.lib_source = _mpv_lib_source
+        self._player = mpv.MPV(video=False, **self.options)
+
+    def play(self, path: str, start: float = 0.0) -> None:
+        if start > 0:
+            # A per-file start option opens the file at the offset, instead
+            # of decoding from zero and seeking once it is playing.
+            self._player.loadfile(path, mode="replace", start=f"{start:.3f}")
+        else:
+            self._player.play(path)
+
+    def stop(self) -> None:
+        self._player.stop()
+
+    def seek(self, seconds: float) -> None:
+        self._player.seek(max(0, seconds), reference="absolute")
+
+    @property
+    def pause(self) -> bool:
+        return self._player.pause
+
+    @pause.setter
+    def pause(self, value: bool) -> None:
+        self._player.pause = value
+
+    @property
+    def time_pos(self) -> float | None:
+        return self._player.time_pos
+
+    @property
+    def duration(self) -> float | None:
+        return self._player.duration
+
+    @property
+    def idle_active(self) -> bool:
+        return self._player.idle_active
+
+    @property
+    def buffered(self) -> float | None:
+        return self._player.demuxer_cache_duration
+
+    def buffer_state(self) -> dict:
+        state = {"buffered_s": None, "buffered_bytes": None, "buffering_pct": None}
+        # unavailable while nothing is loaded
+        try:
+            state["buffered_s"] = self._player.demuxer_cache_duration
+            cache = self._player.demuxer_cache_state or {}
+            state["buffered_bytes"] = cache.get("fw-bytes")
+            # below 100 while playback waits for the cache to refill
+            state["buffering_pct"] = self._player.cache_buffering_state
+        except Exception:
+            pass
+        return state
+
+    def observe(self, name: str, callback) -> None:
+        self._player.observe_property(name, callback)
+
+    def terminate(self) -> None:
+        self._player.terminate()
+
+
+class NullBackend(PlayerBackend):
+    """Simulated player: a virtual clock per track and timed end-of-file.
+
+    Every track lasts ``duration`` seconds of virtual time, which advances at
+    ``speed`` times wall-clock time. No audio device or libmpv is needed, so
+    the daemon's control plane can run on CI and under load tests.
+    """
+
+    name = "null"
+
+    def __init__(self, duration: float = 180.0, speed: float = 1.0):
+        self._track_duration = duration
+        self._speed = speed
+        self._lock = threading.RLock()
+        self._observers: dict[str, list] = {}
+        self._path: str | None = None
+        self._paused = False
+        # virtual position at the last play/seek/pause change, and when
+        self._offset = 0.0
+        self._anchor = time.monotonic()
+        self._timer: threading.Timer | None = None
+
+    def _position(self) -> float:
+        pos = self._offset
+        if not self._paused:
+            pos += (time.monotonic() - self._anchor) * self._speed
+        return min(pos, self._track_duration)
+
+    def _rebase(self, offset: float) -> None:
+        self._offset = max(0.0, min(offset, self._track_duration))
+        self._anchor = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._path is not None and not self._paused:
+            remaining = (self._track_duration - self._offset) / self._speed
+            self._timer = threading.Timer(remaining, self._on_end_of_file)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _notify(self, name: str, value) -> None:
+        for callback in self._observers.get(name, ()):
+            try:
+                callback(name, value)
+            except Exception:
+                pass
+
+    def _on_end_of_file(self) -> None:
+        with self._lock:
+            if self._path is None or self._position() < self._track_duration:
+                return
+            self._path = None
+            self._timer = None
+        self._notify("idle-active", True)
+
+    def play(self, path: str, start: float = 0.0) -> None:
+        with self._lock:
+            was_idle = self._path is None
+            self._path = path
+            self._rebase(start)
+        if was_idle:
+            self._notify("idle-active", False)
+
+    def stop(self) -> None:
+        with self._lock:
+            was_idle = self._path is None
+            self._path = None
+            self._rebase(0.0)
+        if not was_idle:
+            self._notify("idle-active", True)
+
+    def seek(self, seconds: float) -> None:
+        with self._lock:
+            if self._path is None:
+                raise RuntimeError("nothing is playing")
+            self._rebase(seconds)
+
+    @property
+    def pause(self) -> bool:
+        return self._paused
+
+    @pause.setter
+    def pause(self, value: bool) -> None:
+        with self._lock:
+            if bool(value) == self._paused:
+                return
+            position = self._position()
+            self._paused = bool(value)
+            self._rebase(position)
+        self._notify("pause", self._paused)
+
+    @property
+    def time_pos(self) -> float | None:
+        with self._lock:
+            return self._position() if self._path is not None else None
+
+    @property
+    def duration(self) -> float | None:
+        return self._track_duration if self._path is not None else None
+
+    @property
+    def idle_active(self) -> bool:
+        return self._path is None
+
+    def observe(self, name: str, callback) -> None:
+        self._observers.setdefault(name, []).append(callback)
+
+    def terminate(self) -> None:
+        with self._lock:
+            self._path = None
+            self._rebase(0.0)
+
+
+BACKENDS = ("mpv", "null")
+
+
+def create_backend(name: str | None = None, mpv_profile: str | None = None) -> PlayerBackend:
+    """Build the backend named by *name*, ``$TUPLET_BACKEND`` or ``"mpv"``.
+
+    *mpv_profile* picks the mpv backend's buffering profile (see
+    :func:`resolve_mpv_profile`); other backends ignore it.
+    """
+    name = (name or os.environ.get(BACKEND_ENV) or "mpv").lower()
+    if name == "mpv":
+        return MpvBackend(mpv_profile)
+    if name == "null":
+        return NullBackend(
+            duration=float(os.environ.get(NULL_DURATION_ENV, "180")),
+            speed=float(os.environ.get(NULL_SPEED_ENV, "1")),
+        )
+    raise RuntimeError(f"Unknown player backend {name!r} (choose from {', '.join(BACKENDS)})")
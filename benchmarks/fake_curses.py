@@ -0,0 +1,72 @@
+"""Minimal stand-in for the ``curses`` module so view code can run headless."""
+
+A_NORMAL = 0
+A_BOLD = 1 << 16
+A_DIM = 1 << 17
+A_UNDERLINE = 1 << 18
+ACS_VLINE = ord("|")
+
+COLOR_BLACK = 0
+COLOR_RED = 1
+COLOR_GREEN = 2
+COLOR_YELLOW = 3
+COLOR_BLUE = 4
+COLOR_MAGENTA = 5
+COLOR_CYAN = 6
+COLOR_WHITE = 7
+
+
+class error(Exception):
+    pass
+
+
+def color_pair(n):
+    return n << 8
+
+
+def start_color():
+    pass
+
+
+def use_default_colors():
+    pass
+
+
+def init_pair(*_args):
+    pass
+
+
+class FakeScreen:
+    """Records draw calls and enforces curses' out-of-bounds errors."""
+
+    def __init__(self, lines=50, cols=200):
+        self.lines = lines
+        self.cols = cols
+        self.calls = 0
+
+    def getmaxyx(self):
+        return self.lines, self.cols
+
+    def erase(self):
+        self.calls += 1
+
+    def refresh(self):
+        self.calls += 1
+
+    def move(self, y, x):
+        self.calls += 1
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise error("move out of bounds")
+
+    def clrtoeol(self):
+        self.calls += 1
+
+    def addstr(self, y, x, text, attr=0):
+        self.calls += 1
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise error("addstr out of bounds")
+
+    def addch(self, y, x, ch, attr=0):
+        self.calls += 1
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise error("addch out of bounds")
@@ -0,0 +1,277 @@
+"""Load generator for the playback daemon's socket protocol.
+
+Opens N concurrent clients that issue a weighted mix of commands at a target
+aggregate rate and reports throughput, latency percentiles and errors::
+
+    python benchmarks/loadtest.py --spawn --clients 16 --rate 500 --duration 10
+    python benchmarks/loadtest.py --mix GET_INFO=90,PAUSE=5,SEEK=5 --json
+
+``--spawn`` starts a private daemon with the null backend under a scratch
+HOME, so the run is fully local and never touches a real player. Without it,
+the daemon at ``--socket`` (default: the user's daemon socket) is targeted.
+
+Latency is measured from each request's *scheduled* start, so time spent
+queued behind a slow daemon counts (no coordinated omission). With
+``--rate 0`` every client runs closed-loop as fast as it can.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+DEFAULT_SOCKET = Path.home() / ".tuplet_tui_audio_player" / "socket"
+DEFAULT_MIX = "GET_INFO=70,PAUSE=10,SEEK=10,PLAY=10"
+
+
+def _request(sock_path: str, line: str, timeout: float) -> str:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.settimeout(timeout)
+        s.connect(sock_path)
+        s.sendall((line + "\n").encode("utf-8"))
+        buf = b""
+        while b"\n" not in buf and len(buf) < 8192:
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            buf += chunk
+        return buf.decode("utf-8", errors="replace").split("\n")[0].strip()
+    finally:
+        s.close()
+
+
+def _parse_mix(text: str) -> list[tuple[str, float]]:
+    mix = []
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip().upper()
+        if name not in {"GET_INFO", "PAUSE", "SEEK", "PLAY"}:
+            raise argparse.ArgumentTypeError(f"unsupported command {name!r}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def _command_line(cmd: str, track: str, rng: random.Random) -> str:
+    if cmd == "PLAY":
+        return f"PLAY\t{track}\t0"
+    if cmd == "SEEK":
+        return f"SEEK\t{rng.uniform(0, 60):.2f}"
+    return cmd
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _client(sock_path, mix, track, interval, stop_at, timeout, seed, out):
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: Counter = Counter()
+    next_at = time.perf_counter()
+    while True:
+        if interval:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        scheduled = next_at if interval else time.perf_counter()
+        if scheduled >= stop_at:
+            break
+        cmd = rng.choices(names, weights)[0]
+        try:
+            reply = _request(sock_path, _command_line(cmd, track, rng), timeout)
+            if not reply:
+                errors["empty reply"] += 1
+            elif reply.startswith("ERROR"):
+                errors[f"{cmd}: {reply[:60]}"] += 1
+        except OSError as e:
+            errors[f"{cmd}: {type(e).__name__}"] += 1
+        latencies[cmd].append(time.perf_counter() - scheduled)
+        next_at += interval
+    out.append((latencies, errors))
+
+
+def _summarise(values: list[float]) -> dict:
+    values = sorted(values)
+    ms = lambda v: None if v is None else round(v * 1000.0, 3)  # noqa: E731
+    return {
+        "count": len(values),
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1] if values else None),
+    }
+
+
+def run_load(sock_path, clients, rate, duration, mix, track, timeout):
+    # Make sure SEEK/PAUSE have something to act on.
+    _request(sock_path, f"PLAY\t{track}\t0", timeout)
+    interval = clients / rate if rate > 0 else 0.0
+    results: list = []
+    started = time.perf_counter()
+    stop_at = started + duration
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(sock_path, mix, track, interval, stop_at, timeout, i, results),
+        )
+        for i in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    per_command: dict[str, list[float]] = {}
+    errors: Counter = Counter()
+    for latencies, client_errors in results:
+        for name, values in latencies.items():
+            per_command.setdefault(name, []).extend(values)
+        errors.update(client_errors)
+    all_values = [v for values in per_command.values() for v in values]
+    return {
+        "clients": clients,
+        "target_rate": rate,
+        "duration_s": round(elapsed, 3),
+        "requests": len(all_values),
+        "throughput_rps": round(len(all_values) / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(errors.values()),
+        "error_kinds": dict(errors.most_common()),
+        "latency": _summarise(all_values),
+        "per_command": {name: _summarise(v) for name, v in sorted(per_command.items())},
+    }
+
+
+def _spawn_daemon(home: Path) -> subprocess.Popen:
+    env = dict(os.environ, HOME=str(home), TUPLET_BACKEND="null")
+    env.pop("TUPLET_READY_FD", None)
+    read_fd, write_fd = os.pipe()
+    env["TUPLET_READY_FD"] = str(write_fd)
+    proc = subprocess.Popen(
+        [sys.executable, str(ROOT / "daemon.py")],
+        cwd=str(ROOT),
+        env=env,
+        pass_fds=(write_fd,),
+    )
+    os.close(write_fd)
+    try:
+        with os.fdopen(read_fd, "rb") as ready:
+            if b"READY" not in ready.readline():
+                raise RuntimeError(f"daemon exited with code {proc.wait()}")
+    except BaseException:
+        proc.kill()
+        raise
+    return proc
+
+
+def _print_report(report: dict) -> None:
+    lat = report["latency"]
+    print(
+        f"{report['requests']} requests in {report['duration_s']} s from "
+        f"{report['clients']} clients: {report['throughput_rps']} req/s, "
+        f"{report['errors']} errors"
+    )
+    print(f"{'command':<10} {'count':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = list(report["per_command"].items()) + [("all", lat)]
+    for name, s in rows:
+        cells = [
+            f"{s[k]:9.3f}" if s[k] is not None else f"{'-':>9}"
+            for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+        ]
+        print(f"{name:<10} {s['count']:>8} " + " ".join(cells))
+    for kind, count in report["error_kinds"].items():
+        print(f"  error x{count}: {kind}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the playback daemon.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients.")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=200.0,
+        help="Target aggregate requests/s; 0 runs closed-loop (default 200).",
+    )
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run.")
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=_parse_mix(DEFAULT_MIX),
+        help=f"Weighted command mix (default {DEFAULT_MIX}).",
+    )
+    parser.add_argument(
+        "--track", help="Path sent with PLAY (default: a generated dummy file)."
+    )
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET), help="Daemon socket.")
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="Start a private null-backend daemon under a scratch HOME.",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="Per-request timeout in seconds."
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    scratch = Path(tempfile.mkdtemp(prefix="tuplet-load-"))
+    proc = None
+    try:
+        sock_path = args.socket
+        if args.spawn:
+            proc = _spawn_daemon(scratch)
+            sock_path = str(scratch / ".tuplet_tui_audio_player" / "socket")
+        track = args.track
+        if track is None:
+            track = str(scratch / "load-test.mp3")
+            Path(track).touch()
+        report = run_load(
+            sock_path,
+            args.clients,
+            args.rate,
+            args.duration,
+            args.mix,
+            track,
+            args.timeout,
+        )
+    finally:
+        if proc is not None:
+            try:
+                _request(sock_path, "QUIT", args.timeout)
+                proc.wait(timeout=5.0)
+            except Exception:
+                proc.kill()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
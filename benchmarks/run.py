@@ -0,0 +1,263 @@
+"""Headless benchmarks for the TUI hot paths.
+
+Usage::
+
+    python benchmarks/run.py                      # run, print JSON results
+    python benchmarks/run.py --save-baseline      # store results as the baseline
+    python benchmarks/run.py --compare            # flag regressions vs the baseline
+
+Everything runs against a throwaway HOME, synthetic directory trees, a fake
+curses screen and a stub daemon, so no terminal, libmpv or user state is
+touched. Exit status is 1 when ``--compare`` finds a regression.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+DEFAULT_BASELINE = HERE / "baseline.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FULL_SIZES = DEFAULT_SIZES + (500_000,)
+
+# Point the app's config directory at a scratch HOME before importing it.
+_SCRATCH = Path(tempfile.mkdtemp(prefix="tuplet-bench-"))
+os.environ["HOME"] = str(_SCRATCH)
+sys.path.insert(0, str(ROOT))
+
+import fake_curses  # noqa: E402
+import model  # noqa: E402
+import view  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+
+view.curses = fake_curses
+
+
+def _timeit(fn, min_runs=3, min_time=0.2, max_runs=1000):
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if len(samples) >= min_runs and time.perf_counter() - started >= min_time:
+            break
+    return {
+        "runs": len(samples),
+        "min_ms": min(samples) * 1000.0,
+        "median_ms": statistics.median(samples) * 1000.0,
+        "mean_ms": statistics.fmean(samples) * 1000.0,
+    }
+
+
+def _make_tree(root: Path, size: int) -> Path:
+    tree = root / f"tree-{size}"
+    tree.mkdir()
+    n_dirs = max(1, size // 100)
+    for i in range(n_dirs):
+        (tree / f"Album {i:06d}").mkdir()
+    exts = (".mp3", ".flac", ".ogg", ".txt", ".jpg")
+    for i in range(size - n_dirs):
+        (tree / f"Track {i} - some longer title.{exts[i % len(exts)][1:]}").touch()
+    return tree
+
+
+def bench_listing(results, tree: Path, size: int):
+    state = model.BrowserState(current_path=tree)
+    results[f"list_entries[{size}]"] = _timeit(lambda: model.list_entries(state))
+    entries, has_parent = model.list_entries(state)
+    dir_count = len(model.listed_dirs(state, entries, has_parent))
+    results[f"build_display[{size}]"] = _timeit(
+        lambda: model.build_display(entries, has_parent, None, dir_count)
+    )
+
+
+def bench_render(results, tree: Path, size: int):
+    state = model.BrowserState(current_path=tree)
+    entries, has_parent = model.list_entries(state)
+    dir_count = len(model.listed_dirs(state, entries, has_parent))
+    display = model.build_display(entries, has_parent, None, dir_count)
+    playlist = PlaylistStore([e for e in entries if e.suffix == ".mp3"][:5000])
+    screen = fake_curses.FakeScreen()
+    visible_height = view.get_visible_height(screen)
+    selected = len(entries) // 2
+    scroll = max(0, selected - visible_height // 2)
+
+    def render():
+        view.render_browser(
+            screen,
+            tree,
+            display,
+            selected,
+            scroll,
+            entries,
+            visible_height,
+            "browser",
+            playlist,
+            0,
+            0,
+            3,
+            0,
+        )
+
+    results[f"render_browser[{size}]"] = _timeit(render)
+
+
+def bench_info_bar(results):
+    screen = fake_curses.FakeScreen()
+    results["show_info_bar"] = _timeit(
+        lambda: view.show_info_bar(
+            screen, "Some Artist - A Long Track Name.flac", (123.0, 456.0), True, False
+        )
+    )
+
+
+def bench_state(results, tree: Path, size: int):
+    files = [e for e in tree.iterdir() if e.is_file()]
+    state = model.BrowserState(current_path=tree, playlist=files)
+    results[f"save_state[{len(files)}]"] = _timeit(lambda: model.save_state(state))
+    model.save_state(state)
+
+    def load():
+        model.load_persisted_state_into(model.BrowserState(current_path=tree))
+
+    results[f"load_persisted_state_into[{len(files)}]"] = _timeit(load)
+
+
+def bench_daemon(results, track: Path):
+    sock_path = model.DAEMON_SOCKET_PATH
+    proc = subprocess.Popen(
+        [sys.executable, str(HERE / "stub_daemon.py"), str(sock_path)]
+    )
+    try:
+        deadline = time.monotonic() + 5.0
+        while not sock_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        player = model.DaemonPlayer()
+        player.play(track)
+        results["daemon_get_playback_info"] = _timeit(player.get_playback_info)
+        results["daemon_toggle_pause"] = _timeit(player.toggle_pause)
+        results["daemon_play"] = _timeit(lambda: player.play(track))
+        player.quit_daemon()
+        proc.wait(timeout=5.0)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def run(sizes):
+    results = {}
+    trees = _SCRATCH / "trees"
+    trees.mkdir()
+    for size in sizes:
+        tree = _make_tree(trees, size)
+        bench_listing(results, tree, size)
+        bench_render(results, tree, size)
+        bench_state(results, tree, size)
+        if size == sizes[0]:
+            bench_info_bar(results)
+            bench_daemon(results, next(tree.glob("*.mp3")))
+        shutil.rmtree(tree)
+    return {
+        "meta": {
+            "time": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return (name, baseline_ms, current_ms) for every regressed benchmark."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, stats in current["results"].items():
+        base = base_results.get(name)
+        if not base:
+            continue
+        if stats["median_ms"] > base["median_ms"] * (1.0 + threshold):
+            regressions.append((name, base["median_ms"], stats["median_ms"]))
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run tuplet TUI benchmarks.")
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: tuple(int(x) for x in s.split(",")),
+        default=DEFAULT_SIZES,
+        help="Comma-separated synthetic tree sizes (default: 1000,10000,100000).",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Include the 500k-entry tree."
+    )
+    parser.add_argument("--output", help="Write results JSON here instead of stdout.")
+    parser.add_argument(
+        "--baseline",
+        default=str(DEFAULT_BASELINE),
+        help="Baseline file for --compare / --save-baseline.",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store results as the baseline."
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare results with the baseline."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed median slowdown before flagging a regression (default 0.25).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = FULL_SIZES if args.full else args.sizes
+    try:
+        current = run(sizes)
+    finally:
+        shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(text + "\n")
+    if args.compare:
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}", file=sys.stderr)
+            return 1
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare(current, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(
+                f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms "
+                f"({(after / before - 1.0) * 100:+.0f}%)",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Socket-protocol stub of daemon.py that answers instantly without mpv."""
+
+import os
+import socket
+import sys
+
+
+def serve(path):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    playing = None
+    while True:
+        conn, _ = server.accept()
+        try:
+            buf = b""
+            while b"\n" not in buf and len(buf) < 8192:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                buf += chunk
+            parts = buf.decode("utf-8", errors="replace").split("\n")[0].split("\t")
+            cmd = parts[0].strip().upper()
+            if cmd == "QUIT":
+                conn.sendall(b"OK\n")
+                break
+            if cmd == "PLAY" and len(parts) > 1:
+                playing = os.path.basename(parts[1])
+                reply = "OK"
+            elif cmd == "STOP":
+                playing = None
+                reply = "OK"
+            elif cmd == "GET_INFO":
+                reply = f"INFO\t{playing}\t12.5\t240.0" if playing else "NONE"
+            else:
+                reply = "OK"
+            conn.sendall((reply + "\n").encode("utf-8"))
+        finally:
+            conn.close()
+    server.close()
+    os.unlink(path)
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
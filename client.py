@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from pathlib import Path
+
+# Kept free of curses and state handling so `main.py ctl` starts quickly.
+CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
+DAEMON_SOCKET_PATH = CONFIG_DIR / "socket"
+
+
+class DaemonPlayer:
+    def __init__(self):
+        # ("status" | "error", message)
+        self._pending_result: tuple[str, str] | None = None
+        self._lock = threading.Lock()
+
+    def _send(self, msg: str) -> str:
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(3.0)
+            s.connect(str(DAEMON_SOCKET_PATH))
+            s.sendall(f"{msg}\n".encode("utf-8"))
+            buf = b""
+            # STATS replies can exceed a single recv; cap at 1 MiB.
+            while b"\n" not in buf and len(buf) < (1 << 20):
+                chunk = s.recv(4096)
+                if not chunk:
+                    break
+                buf += chunk
+            s.close()
+            return buf.decode("utf-8", errors="replace").split("\n")[0].strip()
+        except Exception as e:
+            return f"ERROR {e}"
+
+    def request(self, msg: str) -> str:
+        """Send one protocol line; returns the reply line ("ERROR ..." on failure)."""
+        return self._send(msg)
+
+    def stop(self):
+        self._send("STOP")
+
+    def quit_daemon(self):
+        self._send("QUIT")
+
+    def toggle_pause(self):
+        self._send("PAUSE")
+
+    def play(self, audio_path, start_seconds=0):
+        path = str(Path(audio_path).resolve())
+        reply = self._send(f"PLAY\t{path}\t{start_seconds}")
+        if reply.startswith("ERROR"):
+            raise RuntimeError(reply[6:].strip())
+        return None
+
+    def prefetch(self, paths) -> int | None:
+        """Ask the daemon to cache *paths* (the tracks to be played next).
+
+        Returns how many it queued for copying, or None on error.
+        """
+        reply = self._send("\t".join(["PREFETCH", *map(str, paths)]))
+        if not reply.startswith("OK"):
+            return None
+        try:
+            return int(reply.split("\t")[1])
+        except (IndexError, ValueError):
+            return 0
+
+    def seek(self, seconds: float, relative: bool = False):
+        """Seek to *seconds*, or by *seconds* from the current position if *relative*."""
+        arg = f"{seconds:+g}" if relative else f"{max(0.0, seconds):g}"
+        reply = self._send(f"SEEK\t{arg}")
+        if reply.startswith("ERROR"):
+            raise RuntimeError(reply[6:].strip())
+
+    def seek_percent(self, percent: float):
+        reply = self._send(f"SEEK\t{percent:g}%")
+        if reply.startswith("ERROR"):
+            raise RuntimeError(reply[6:].strip())
+
+    def open_event_stream(self) -> socket.socket | None:
+        """Subscribe to daemon playback events.
+
+        Returns a non-blocking socket that receives one ``EVENT`` line per
+        playback change, or ``None`` if the daemon does not support it.
+        """
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(1.0)
+            s.connect(str(DAEMON_SOCKET_PATH))
+            s.sendall(b"SUBSCRIBE\n")
+            buf = b""
+            while b"\n" not in buf and len(buf) < 8192:
+                chunk = s.recv(4096)
+                if not chunk:
+                    break
+                buf += chunk
+            if not buf.startswith(b"OK"):
+                s.close()
+                return None
+            s.setblocking(False)
+            return s
+        except OSError:
+            return None
+
+    def poll_pending(self):
+        with self._lock:
+            result = self._pending_result
+            self._pending_result = None
+        return result
+
+    def get_stats(self) -> dict | None:
+        """Return the daemon's STATS counters, or None if unavailable."""
+        reply = self._send("STATS")
+        if not reply.startswith("STATS\t"):
+            return None
+        try:
+            return json.loads(reply[len("STATS\t"):])
+        except ValueError:
+            return None
+
+    def get_status(self) -> dict | None:
+        """Return the daemon's playback state, or None if it is unreachable.
+
+        Keys: ``playing`` and, while playing, ``name``, ``position`` and
+        ``duration`` (seconds or None), ``paused`` (None if unknown) and
+        ``title`` (the track's name for a CUE sheet track, else None),
+        ``profile`` (the daemon's mpv profile, or None) and ``buffered``
+        (seconds read ahead, None if unknown).
+        """
+        reply = self._send("GET_INFO")
+        if reply.startswith("ERROR") or not reply:
+            return None
+        if not reply.startswith("INFO\t"):
+            return {"playing": False}
+        # INFO, name, time_pos, duration[, paused[, title, profile, buffered]]
+        parts = reply.split("\t")
+        if len(parts) < 4:
+            return {"playing": False}
+        try:
+            time_pos = float(parts[2]) if parts[2] else None
+            duration = float(parts[3]) if parts[3] else None
+        except ValueError:
+            time_pos = duration = None
+        paused = parts[4] == "1" if len(parts) > 4 and parts[4] else None
+        try:
+            buffered = float(parts[7]) if len(parts) > 7 and parts[7] else None
+        except ValueError:
+            buffered = None
+        return {
+            "playing": True,
+            "name": parts[1],
+            "position": time_pos,
+            "duration": duration,
+            "paused": paused,
+            "title": parts[5] if len(parts) > 5 and parts[5] else None,
+            "profile": parts[6] if len(parts) > 6 and parts[6] else None,
+            "buffered": buffered,
+        }
+
+    def get_playback_info(self):
+        status = self.get_status()
+        if not status or not status["playing"]:
+            return None, None, None
+        return status["name"], status["position"], status["duration"]
+
+    def next_track(self) -> int | None:
+        """Ask subscribed front-ends to advance their playlist.
+
+        Returns how many subscribers were notified, or None on error.
+        """
+        reply = self._send("NEXT")
+        if not reply.startswith("OK"):
+            return None
+        try:
+            return int(reply.partition("\t")[2] or 0)
+        except ValueError:
+            return 0
@@ -1,10 +1,66 @@
 import curses
-from model import save_state
+import time
+from pathlib import Path
+
+from cue import is_cue_sheet, is_cue_track, track_label, track_paths
+from duplicates import AddFileJob, DuplicateScanJob, find_duplicate
+from library import DirectoryAddJob
+from model import (
+    cycle_sort_mode,
+    is_browsable,
+    move_in_playlist,
+    move_to_top,
+    remove_from_playlist,
+    save_state,
+)
+from playlists import PLAYLIST_EXTENSIONS, PlaylistExportJob, PlaylistImportJob
+from summaries import FolderSummaryJob
 from view import MEDIA_EXTENSIONS
 
+EXPORT_PLAYLIST_NAME = "tuplet-playlist.m3u8"
+SEEK_STEP_SEC = 5
+SEEK_BIG_STEP_SEC = 60
+PLAYLIST_EDIT_KEYS = {
+    ord("v"),
+    ord("V"),
+    ord("u"),
+    ord("d"),
+    ord("x"),
+    curses.KEY_DC,
+    ord("J"),
+    ord("K"),
+    ord("T"),
+}
+# Playlist entries after the playing one that the daemon is asked to copy
+# ahead when they are on a network share.
+READAHEAD_TRACKS = 3
+# Held seek keys send at most one SEEK per interval; presses in between are
+# merged into the next one.
+SEEK_INTERVAL_SEC = 0.15
+SEEK_ACTIONS = {"seek", "seek_percent"}
+PLAYER_ACTIONS = {"select_audio", "toggle_play_pause"} | SEEK_ACTIONS
+# Actions that start or cancel a background job (see start_job_action).
+JOB_ACTIONS = {
+    "import_playlist",
+    "export_playlist",
+    "add_directory",
+    "add_file",
+    "find_duplicates",
+    "cancel_jobs",
+}
+SEEK_KEYS = {
+    ord(","): -SEEK_STEP_SEC,
+    ord("."): SEEK_STEP_SEC,
+    ord("<"): -SEEK_BIG_STEP_SEC,
+    ord(">"): SEEK_BIG_STEP_SEC,
+}
+
 
 def handle_key(key, entries, state, visible_height):
     action = None
+    if key != ord("E"):
+        # a second 'E' only confirms an overwrite right after the first
+        state.confirm_export = None
 
     # ── Media keys / Space: play-pause toggle ─────────────────────────
     if key == ord(" "):
@@ -39,44 +95,129 @@ def handle_key(key, entries, state, visible_height):
             state.active_pane = "browser"
         return action
 
+    # ── 'C': cancel running background jobs (imports, exports) ───────
+    if key == ord("C"):
+        return ("cancel_jobs",)
+
+    # ── 'E': export the playlist into the browsed directory ──────────
+    if key == ord("E"):
+        if not state.playlist:
+            return ("status", "Playlist is empty")
+        folder = state.current_path
+        if is_cue_sheet(folder):
+            # browsing inside a CUE sheet: export next to it
+            folder = folder.parent
+        dest = folder / EXPORT_PLAYLIST_NAME
+        if dest.exists() and state.confirm_export != dest:
+            state.confirm_export = dest
+            return ("status", f"{dest.name} exists; press E again to overwrite it")
+        state.confirm_export = None
+        return ("export_playlist", dest)
+
+    # ── 'D': find duplicates in the playlist / close the duplicates view
+    if key == ord("D"):
+        if state.duplicates is not None:
+            state.duplicates = None
+            return action
+        if not state.playlist:
+            return ("status", "Playlist is empty")
+        return ("find_duplicates",)
+
+    # ── 'X': remove the extra copies listed in the duplicates view ────
+    if key == ord("X") and state.duplicates is not None:
+        report, state.duplicates = state.duplicates, None
+        if report.version != state.playlist.version:
+            return ("status", "Playlist changed since the scan; press D to scan again")
+        removed = remove_from_playlist(state, report.extra_indices())
+        save_state(state)
+        return ("status", f"Removed {removed} duplicate(s)")
+
     # ── 'a': add file to playlist (only from browser pane) ───────────
     if key == ord("a") and state.active_pane == "browser":
         if entries:
             chosen = entries[state.selected]
-            if chosen.is_file() and chosen.suffix.lower() in MEDIA_EXTENSIONS:
-                if chosen not in state.playlist:
+            if chosen.is_file() and chosen.suffix.lower() in PLAYLIST_EXTENSIONS:
+                action = ("import_playlist", chosen)
+            elif is_cue_track(chosen):
+                if chosen in state.playlist:
+                    action = ("status", f"Already in playlist: {track_label(chosen)}")
+                else:
+                    state.playlist.append(chosen)
+                    save_state(state)
+                    action = ("status", f"Added to playlist: {track_label(chosen)}")
+            elif is_cue_sheet(chosen) and chosen.is_file():
+                action = _add_cue_sheet(state, chosen)
+            elif chosen.is_file() and chosen.suffix.lower() in MEDIA_EXTENSIONS:
+                duplicate, same_size = find_duplicate(state.playlist, chosen)
+                if duplicate < 0 and same_size:
+                    # possible copies are compared by content in the background
+                    action = ("add_file", chosen, same_size)
+                elif duplicate < 0:
                     state.playlist.append(chosen)
                     save_state(state)
                     action = ("status", f"Added to playlist: {chosen.name}")
-                else:
+                elif state.playlist.name(duplicate) == chosen.name:
                     action = ("status", f"Already in playlist: {chosen.name}")
+                else:
+                    action = (
+                        "status",
+                        f"Already in playlist as {state.playlist.name(duplicate)}",
+                    )
+            elif chosen.is_dir():
+                action = ("status", "Press A to add a whole folder")
             else:
                 action = ("status", "Not an audio file")
         return action
 
-    # ── 'd' / DEL: remove item from playlist (only in playlist pane) ─
-    if key in (ord("d"), ord("x"), curses.KEY_DC) and state.active_pane == "playlist":
-        if state.playlist:
-            removed_index = state.playlist_selected
-            removed = state.playlist.pop(removed_index)
-            if state.playlist_selected >= len(state.playlist) and state.playlist:
-                state.playlist_selected = len(state.playlist) - 1
+    # ── 'o': cycle the sort mode of the browsed directory ────────────
+    if key == ord("o") and state.active_pane == "browser":
+        mode = cycle_sort_mode(state, state.current_path)
+        save_state(state)
+        return ("status", f"Sort: {mode}")
 
-            # keep autoplay state consistent with removals
-            if not state.playlist:
-                state.playing_from_playlist = False
-                state.playing_index = -1
-            elif state.playing_from_playlist:
-                if removed_index < state.playing_index:
-                    state.playing_index -= 1
-                elif removed_index == state.playing_index:
-                    state.playing_from_playlist = False
-                    state.playing_index = -1
+    # ── 'A': add a folder recursively (only from browser pane) ───────
+    if key == ord("A") and state.active_pane == "browser":
+        if entries:
+            chosen = entries[state.selected]
+            if chosen == state.current_path.parent and state.selected == 0:
+                # on the ".." row, add the folder being browsed
+                chosen = state.current_path
+            if chosen.is_dir():
+                action = ("add_directory", chosen)
+            elif is_cue_sheet(chosen) and chosen.is_file():
+                action = _add_cue_sheet(state, chosen)
+            else:
+                action = ("status", "Not a folder")
+        return action
 
-            save_state(state)
-            action = ("status", f"Removed: {removed.name}")
+    # ── 'W': start / stop watching a folder for new media ────────────
+    if key == ord("W") and state.active_pane == "browser":
+        if entries:
+            chosen = entries[state.selected]
+            if chosen == state.current_path.parent and state.selected == 0:
+                # on the ".." row, watch the folder being browsed
+                chosen = state.current_path
+            if chosen.is_dir():
+                action = ("watch_folder", chosen)
+            else:
+                action = ("status", "Not a folder")
         return action
 
+    # ── Playlist editing (only in playlist pane) ──────────────────────
+    if state.active_pane == "playlist" and key in PLAYLIST_EDIT_KEYS:
+        if state.playlist:
+            action = _handle_playlist_edit(key, state)
+        return action
+
+    # ── Seeking: ',' '.' ±5 s, '<' '>' ±60 s, '0'-'9' jump to 0-90 % ─
+    if key in SEEK_KEYS:
+        return ("seek", SEEK_KEYS[key])
+    if key in (curses.KEY_LEFT, curses.KEY_RIGHT) and state.active_pane == "playlist":
+        step = SEEK_STEP_SEC if key == curses.KEY_RIGHT else -SEEK_STEP_SEC
+        return ("seek", step)
+    if ord("0") <= key <= ord("9"):
+        return ("seek_percent", (key - ord("0")) * 10)
+
     # ── Navigation ────────────────────────────────────────────────────
     if state.active_pane == "browser":
         action = _handle_browser_nav(key, entries, state, visible_height)
@@ -86,6 +227,68 @@ def handle_key(key, entries, state, visible_height):
     return action
 
 
+def _edit_targets(state):
+    """The marked entries, or the selected one when nothing is marked."""
+    if state.marked:
+        return sorted(state.marked)
+    return [state.playlist_selected]
+
+
+def _handle_playlist_edit(key, state):
+    # Every edit is one pass over the playlist and at most one save.
+    count = len(state.playlist)
+    selected = state.playlist_selected
+
+    # 'v': mark / unmark the selected entry and step down
+    if key == ord("v"):
+        if selected in state.marked:
+            state.marked.discard(selected)
+        else:
+            state.marked.add(selected)
+        state.mark_anchor = selected
+        state.playlist_selected = min(selected + 1, count - 1)
+        return ("status", f"{len(state.marked)} marked")
+
+    # 'V': mark everything between the last 'v' and the selection
+    if key == ord("V"):
+        anchor = state.mark_anchor if 0 <= state.mark_anchor < count else selected
+        state.marked.update(range(min(anchor, selected), max(anchor, selected) + 1))
+        state.mark_anchor = selected
+        return ("status", f"{len(state.marked)} marked")
+
+    # 'u': clear the marks
+    if key == ord("u"):
+        state.marked.clear()
+        state.mark_anchor = -1
+        return ("status", "Marks cleared")
+
+    targets = _edit_targets(state)
+
+    # 'd' / 'x' / DEL: remove the marked entries (or the selected one)
+    if key in (ord("d"), ord("x"), curses.KEY_DC):
+        name = state.playlist.name(targets[0])
+        removed = remove_from_playlist(state, targets)
+        save_state(state)
+        if removed == 1:
+            return ("status", f"Removed: {name}")
+        return ("status", f"Removed {removed} tracks")
+
+    # 'K' / 'J': move them up / down one place; 'T': move them to the top
+    if key in (ord("K"), ord("J")):
+        step = -1 if key == ord("K") else 1
+        if not move_in_playlist(state, targets, step):
+            return None
+        save_state(state)
+        return None
+    if key == ord("T"):
+        move_to_top(state, targets)
+        state.playlist_scroll = 0
+        save_state(state)
+        plural = "track" if len(targets) == 1 else "tracks"
+        return ("status", f"Moved {len(targets)} {plural} to the top")
+    return None
+
+
 def _handle_browser_nav(key, entries, state, visible_height):
     action = None
     count = len(entries)
@@ -130,19 +333,21 @@ def _handle_browser_nav(key, entries, state, visible_height):
     elif key in (curses.KEY_ENTER, ord("\n")):
         if entries:
             chosen = entries[state.selected]
-            if chosen.is_dir():
+            if is_browsable(chosen):
                 state.current_path = chosen
                 state.selected = 0
                 state.scroll = 0
                 save_state(state)
-            elif chosen.is_file():
+            elif chosen.is_file() and chosen.suffix.lower() in PLAYLIST_EXTENSIONS:
+                action = ("import_playlist", chosen)
+            elif chosen.is_file() or is_cue_track(chosen):
                 state.playing_from_playlist = False
                 state.playing_index = -1
                 action = ("select_audio", chosen)
     elif key == curses.KEY_RIGHT:
         if entries:
             chosen = entries[state.selected]
-            if chosen.is_dir():
+            if is_browsable(chosen):
                 state.current_path = chosen
                 state.selected = 0
                 state.scroll = 0
@@ -168,6 +373,16 @@ def _handle_browser_nav(key, entries, state, visible_height):
     return action
 
 
+def _add_cue_sheet(state, sheet):
+    paths = track_paths(sheet)
+    if not paths:
+        return ("status", f"No tracks in {sheet.name}")
+    tracks = [path for path in paths if path not in state.playlist]
+    state.playlist.extend(tracks)
+    save_state(state)
+    return ("status", f"Added {len(tracks)} tracks from {sheet.name}")
+
+
 def _handle_playlist_nav(key, state, visible_height):
     action = None
     count = len(state.playlist)
@@ -210,6 +425,27 @@ def _handle_playlist_nav(key, state, visible_height):
     return action
 
 
+def prefetch_upcoming(state, player, sent=None):
+    """Send the daemon the next READAHEAD_TRACKS entries of the playlist.
+
+    Pass back what the previous call returned: nothing is sent until the
+    playing entry or the playlist changes.
+    """
+    if not state.playing_from_playlist or state.random_play or state.playing_index < 0:
+        return sent
+    key = (state.playing_index, state.playlist.version, state.repeat_all)
+    if key == sent:
+        return sent
+    n = len(state.playlist)
+    indices = range(state.playing_index + 1, state.playing_index + 1 + READAHEAD_TRACKS)
+    if state.repeat_all:
+        indices = [i % n for i in indices if i - n < state.playing_index]
+    else:
+        indices = [i for i in indices if i < n]
+    player.prefetch([state.playlist.path_str(i) for i in indices])
+    return key
+
+
 def handle_action(action, player):
     if not action:
         return None
@@ -217,16 +453,134 @@ def handle_action(action, player):
     payload = action[1] if len(action) > 1 else None
     if action_type == "select_audio":
         path = payload
-        if path.suffix.lower() not in MEDIA_EXTENSIONS:
+        if is_cue_track(path):
+            name = track_label(path)
+        elif path.suffix.lower() in MEDIA_EXTENSIONS:
+            name = path.name
+        else:
             return ("error", "Not an audio file")
+        start = action[2] if len(action) > 2 else 0
         try:
-            player.play(path)
-            return ("status", f"Loading: {path.name}")
+            player.play(path, start)
+            if start:
+                minutes, seconds = divmod(int(start), 60)
+                return ("status", f"Resuming: {name} at {minutes:02d}:{seconds:02d}")
+            return ("status", f"Loading: {name}")
         except Exception as exc:
             return ("error", f"Cannot play: {exc}")
+    if action_type in ("seek", "seek_percent"):
+        try:
+            if action_type == "seek":
+                player.seek(payload, relative=True)
+            else:
+                player.seek_percent(payload)
+        except Exception as exc:
+            return ("error", f"Cannot seek: {exc}")
+        return None
     if action_type == "toggle_play_pause":
         player.toggle_pause()
         return None
     if action_type == "status":
         return ("status", payload)
     return None
+
+
+def merge_seek(pending: tuple, action) -> tuple:
+    """Queue seek *action* behind the seeks in *pending* (sent together).
+
+    A percentage seek replaces everything queued before it; relative steps
+    add up, and one after a percentage seek is sent right after it (the
+    daemon takes it from the pending target).
+    """
+    if action[0] == "seek_percent":
+        return (action,)
+    if pending and pending[-1][0] == "seek":
+        return (*pending[:-1], ("seek", pending[-1][1] + action[1]))
+    return (*pending, action)
+
+
+def send_seeks(pending: tuple, player):
+    """Send queued seeks in order; returns the first error, like handle_action."""
+    for action in pending:
+        result = handle_action(action, player)
+        if result:
+            return result
+    return None
+
+
+def start_job_action(action, state, jobs, notify):
+    """Start (or cancel) the background job for a JOB_ACTIONS *action*.
+
+    Started jobs are appended to *jobs*; *notify* is passed on to them.
+    """
+    if action[0] == "import_playlist":
+        jobs.append(PlaylistImportJob(action[1], notify).start())
+        return ("status", f"Importing {action[1].name}...")
+    if action[0] == "export_playlist":
+        # The job writes from a snapshot so later edits don't race it.
+        snapshot = state.playlist.copy()
+        jobs.append(PlaylistExportJob(snapshot, action[1], notify).start())
+        return ("status", f"Exporting {len(snapshot)} tracks...")
+    if action[0] == "add_directory":
+        job = DirectoryAddJob(action[1], state.show_hidden, notify)
+        jobs.append(job.start())
+        return ("status", f"{job.label}...")
+    if action[0] == "add_file":
+        job = AddFileJob(action[1], action[2], notify)
+        jobs.append(job.start())
+        return ("status", f"{job.label}...")
+    if action[0] == "find_duplicates":
+        if any(isinstance(job, DuplicateScanJob) for job in jobs):
+            return ("status", "Already looking for duplicates")
+        job = DuplicateScanJob(state.playlist.copy(), state.playlist.version, notify)
+        jobs.append(job.start())
+        return ("status", f"{job.label}...")
+    if not jobs:
+        return ("status", "No background jobs running")
+    for job in jobs:
+        job.cancel()
+    return ("status", f"Cancelling {len(jobs)} background job(s)...")
+
+
+def start_folder_summary(state, subfolders, notify):
+    """Summarize the browsed folder and its *subfolders* in the background.
+
+    Returns the started job, or None inside a CUE sheet.
+    """
+    if is_cue_sheet(state.current_path):
+        return None
+    job = FolderSummaryJob(state.current_path, subfolders, state.durations, notify)
+    return job.start()
+
+
+def toggle_watched_folder(state, folder_watcher, path):
+    key = str(path)
+    if key in state.watched_folders:
+        state.watched_folders.remove(key)
+        state.watch_scanned.pop(key, None)
+        folder_watcher.remove(path)
+        save_state(state)
+        return ("status", f"Stopped watching {path.name or path}")
+    if not folder_watcher.add(path):
+        return ("error", "Watching folders needs inotify (Linux)")
+    state.watched_folders.append(key)
+    state.watch_scanned[key] = time.time()
+    save_state(state)
+    return ("status", f"Watching {path.name or path} for new media")
+
+
+def watch_watched_folders(state, folder_watcher) -> None:
+    """Watch the folders saved in *state*, reporting files that arrived
+    since the last session as new."""
+    for folder in state.watched_folders:
+        folder_watcher.add(Path(folder), state.watch_scanned.get(folder))
+
+
+def record_watch_scans(state, folder_watcher) -> None:
+    """Remember how far each watched folder has been reported, for the
+    next :func:`watch_watched_folders`; call before saving the state."""
+    state.watch_scanned = {
+        folder: folder_watcher.seen_until(folder)
+        for folder in state.watched_folders
+        if folder in folder_watcher.roots
+    }
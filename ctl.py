@@ -0,0 +1,216 @@
+"""Headless control of the playback daemon: ``main.py ctl <command>``.
+
+Only the socket client is imported; curses, the browser state and the
+playlist are not, so a call returns in a few milliseconds. For the same
+reason the arguments are parsed by hand rather than with argparse.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from client import CONFIG_DIR, DAEMON_SOCKET_PATH, DaemonPlayer
+from formatting import format_time
+
+STATE_FILE = CONFIG_DIR / "state.json"
+
+
+def _next_from_state_file(player: DaemonPlayer, playing_name: str | None) -> dict:
+    # No front-end is subscribed, so advance through the saved playlist.
+    from playlist_store import PlaylistStore
+
+    try:
+        data = json.loads(STATE_FILE.read_text())
+        if isinstance(data.get("playlist_store"), dict):
+            playlist = PlaylistStore.from_data(data["playlist_store"])
+        else:
+            playlist = PlaylistStore(
+                item for item in data.get("playlist", []) if isinstance(item, str)
+            )
+    except (OSError, ValueError, KeyError, TypeError):
+        return {"ok": False, "error": "no saved playlist"}
+    if not playlist:
+        return {"ok": False, "error": "playlist is empty"}
+    # The saved file is the TUI's last choice; once ctl has moved on, only
+    # the daemon knows (by name) what is playing.
+    current = data.get("current_playing_file")
+    index = 0
+    if isinstance(current, str) and os.path.basename(current) == playing_name:
+        try:
+            index = playlist.index(current) + 1
+        except ValueError:
+            pass
+    elif playing_name:
+        index = next(
+            (i + 1 for i in range(len(playlist)) if playlist.name(i) == playing_name), 0
+        )
+    if index >= len(playlist):
+        if not data.get("repeat_all"):
+            return {"ok": False, "error": "end of playlist"}
+        index = 0
+    path = playlist.path_str(index)
+    try:
+        player.play(path)
+    except RuntimeError as exc:
+        return {"ok": False, "error": str(exc)}
+    return {"ok": True, "path": path}
+
+
+def run_command(args, player: DaemonPlayer) -> dict:
+    command = args.command
+    if command != "play" and not DAEMON_SOCKET_PATH.exists():
+        return {"ok": False, "error": "daemon is not running"}
+    if command == "status":
+        status = player.get_status()
+        if status is None:
+            return {"ok": False, "error": "daemon is not running"}
+        return {"ok": True, **status}
+    if command == "play":
+        path = os.path.abspath(os.path.expanduser(args.path))
+        if not os.path.isfile(path):
+            from cue import resolve_track
+
+            if resolve_track(path) is None:
+                return {"ok": False, "error": f"no such file: {path}"}
+        if player.get_status() is None:
+            # Starting the daemon needs the full model; only pay for it here.
+            from model import ensure_daemon_running
+
+            if not ensure_daemon_running():
+                return {"ok": False, "error": "could not start the playback daemon"}
+        try:
+            player.play(path, args.start)
+        except RuntimeError as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": True, "path": path}
+    if command == "next":
+        notified = player.next_track()
+        if notified is None:
+            return {"ok": False, "error": "daemon is not running"}
+        if notified:
+            return {"ok": True, "handled_by": "tui"}
+        status = player.get_status() or {}
+        return _next_from_state_file(player, status.get("name"))
+
+    if command == "seek":
+        line = f"SEEK\t{args.position}"
+    else:
+        line = {"pause": "PAUSE", "stop": "STOP", "quit": "QUIT"}[command]
+    reply = player.request(line)
+    if reply.startswith("OK"):
+        return {"ok": True}
+    return {"ok": False, "error": reply[6:].strip() if reply.startswith("ERROR") else reply}
+
+
+def _print_human(args, result: dict) -> None:
+    if not result["ok"]:
+        print(f"error: {result['error']}", file=sys.stderr)
+    elif args.command == "status":
+        if not result["playing"]:
+            print("Stopped")
+        else:
+            state = "Paused" if result.get("paused") else "Playing"
+            buffer = ""
+            if result.get("profile"):
+                buffer = f"  [{result['profile']}"
+                if result.get("buffered") is not None:
+                    buffer += f", {result['buffered']:.1f}s buffered"
+                buffer += "]"
+            print(
+                f"{state}: {result.get('title') or result['name']} "
+                f"{format_time(result['position'])} / {format_time(result['duration'])}"
+                f"{buffer}"
+            )
+    elif "path" in result:
+        print(f"Playing: {result['path']}")
+
+
+USAGE = """usage: main.py ctl [--json] <command> [args]
+
+Control the playback daemon without the TUI.
+
+commands:
+  status                 show what is playing
+  play PATH [--start S]  play a file (or CUE track, album.cue#N) from S seconds
+                         (starts the daemon if needed)
+  pause                  toggle pause
+  stop                   stop playback
+  seek POSITION          seek to SECONDS, by +SECONDS / -SECONDS, or to PERCENT%
+  next                   play the next playlist item (via the running TUI,
+                         else the saved playlist)
+  quit                   stop playback and shut the daemon down
+
+options:
+  --json                 print the result as JSON
+"""
+# command -> names of its positional arguments
+COMMANDS = {
+    "status": (),
+    "play": ("path",),
+    "pause": (),
+    "stop": (),
+    "seek": ("position",),
+    "next": (),
+    "quit": (),
+}
+
+
+class UsageError(Exception):
+    pass
+
+
+def parse_args(argv) -> SimpleNamespace:
+    args = SimpleNamespace(json=False, command=None, start=0.0)
+    positional = []
+    argv = list(argv)
+    while argv:
+        arg = argv.pop(0)
+        if arg in ("-h", "--help"):
+            print(USAGE, end="")
+            sys.exit(0)
+        if arg == "--json":
+            args.json = True
+        elif arg == "--start":
+            if not argv:
+                raise UsageError("--start needs a value")
+            try:
+                args.start = float(argv.pop(0))
+            except ValueError:
+                raise UsageError("--start must be a number") from None
+        elif arg.startswith("--"):
+            raise UsageError(f"unknown option {arg}")
+        else:
+            # "-5" is a relative seek, not an option
+            positional.append(arg)
+    if not positional:
+        raise UsageError("missing command")
+    args.command, *values = positional
+    names = COMMANDS.get(args.command)
+    if names is None:
+        raise UsageError(f"unknown command {args.command!r}")
+    if len(values) != len(names):
+        raise UsageError(f"{args.command} takes {len(names) or 'no'} argument(s)")
+    for name, value in zip(names, values):
+        setattr(args, name, value)
+    return args
+
+
+def main(argv=None) -> int:
+    try:
+        args = parse_args(sys.argv[1:] if argv is None else argv)
+    except UsageError as exc:
+        print(f"{USAGE}\nerror: {exc}", file=sys.stderr)
+        return 2
+    result = run_command(args, DaemonPlayer())
+    if args.json:
+        print(json.dumps(result))
+    else:
+        _print_human(args, result)
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
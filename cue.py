@@ -0,0 +1,242 @@
+"""CUE sheets: one audio file split into tracks by start times.
+
+A track of ``album.cue`` is addressed as the virtual path ``album.cue#3``;
+it is browsed and queued like a file, and played by opening the sheet's
+backing file at the track's start.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CUE_EXTENSION = ".cue"
+# INDEX times are minutes:seconds:frames, at 75 CD frames per second.
+FRAMES_PER_SEC = 75
+CUE_CACHE_MAX = 64
+
+
+@dataclass
+class CueTrack:
+    number: int
+    title: str
+    performer: str
+    # backing audio file, and where in it the track starts and ends
+    file: str
+    start: float
+    end: float | None = None
+
+
+@dataclass
+class CueSheet:
+    path: str
+    title: str = ""
+    performer: str = ""
+    tracks: list = field(default_factory=list)
+
+    def track(self, number: int) -> CueTrack | None:
+        for track in self.tracks:
+            if track.number == number:
+                return track
+        return None
+
+    def tracks_in(self, file: str) -> list:
+        """Tracks of *file*, by start time."""
+        return [track for track in self.tracks if track.file == file]
+
+
+def is_cue_sheet(path) -> bool:
+    return os.path.splitext(os.fspath(path))[1].lower() == CUE_EXTENSION
+
+
+def split_track(path) -> tuple[str, int] | None:
+    """``(sheet path, track number)`` of a virtual track path, else None."""
+    sheet, sep, number = os.fspath(path).rpartition("#")
+    if not sep or not number.isdigit() or not is_cue_sheet(sheet):
+        return None
+    return sheet, int(number)
+
+
+def is_cue_track(path) -> bool:
+    return split_track(path) is not None
+
+
+def track_path(sheet, number: int) -> Path:
+    return Path(f"{os.fspath(sheet)}#{number}")
+
+
+def _parse_time(text: str) -> float:
+    minutes, seconds, frames = (int(part) for part in text.split(":"))
+    return minutes * 60 + seconds + frames / FRAMES_PER_SEC
+
+
+def _backing_file(name: str, base_dir: str) -> str:
+    name = name.replace("\\", "/")
+    if name[1:2] == ":":
+        # a path on the Windows machine that made the rip: keep the name
+        name = name.rsplit("/", 1)[-1]
+    path = os.path.normpath(os.path.join(base_dir, name))
+    if os.path.exists(path):
+        return path
+    # Sheets often still name the .wav they were ripped to after the audio
+    # was compressed; take a file with the same stem instead.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        names = sorted(os.listdir(os.path.dirname(path)))
+    except OSError:
+        return path
+    for other in names:
+        other_stem, ext = os.path.splitext(other)
+        if other_stem == stem and ext.lower() != CUE_EXTENSION:
+            return os.path.join(os.path.dirname(path), other)
+    return path
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # sheets written by older rippers are usually Latin-1 / cp1252
+        return data.decode("latin-1")
+
+
+def _split_words(line: str) -> list[str]:
+    """Split a sheet line into words; double quotes group words.
+
+    CUE has no escapes, so backslashes (Windows paths) and apostrophes
+    are plain characters; an unterminated quote runs to the end of the line.
+    """
+    words = []
+    i, n = 0, len(line)
+    while i < n:
+        if line[i].isspace():
+            i += 1
+        elif line[i] == '"':
+            end = line.find('"', i + 1)
+            if end < 0:
+                end = n
+            words.append(line[i + 1 : end])
+            i = end + 1
+        else:
+            end = i
+            while end < n and not line[end].isspace():
+                end += 1
+            words.append(line[i:end])
+            i = end
+    return words
+
+
+def parse_cue(path: str) -> CueSheet:
+    """Parse the sheet at *path*; tracks without an ``INDEX 01`` are skipped."""
+    sheet = CueSheet(path)
+    base_dir = os.path.dirname(path)
+    current_file = None
+    track = None
+    for line in _read_text(path).splitlines():
+        words = _split_words(line)
+        if not words:
+            continue
+        keyword = words[0].upper()
+        if keyword == "FILE" and len(words) >= 2:
+            current_file = _backing_file(words[1], base_dir)
+            track = None
+        elif keyword == "TRACK" and len(words) >= 2 and current_file is not None:
+            try:
+                track = CueTrack(int(words[1]), "", "", current_file, -1.0)
+            except ValueError:
+                track = None
+                continue
+            sheet.tracks.append(track)
+        elif keyword in ("TITLE", "PERFORMER") and len(words) >= 2:
+            attr = keyword.lower()
+            # unquoted values with spaces are common in hand-written sheets
+            setattr(track if track is not None else sheet, attr, " ".join(words[1:]))
+        elif keyword == "INDEX" and len(words) >= 3 and track is not None:
+            if words[1] == "01":
+                try:
+                    track.start = _parse_time(words[2])
+                except ValueError:
+                    pass
+    sheet.tracks = [track for track in sheet.tracks if track.start >= 0]
+    # a track ends where the next one in the same file starts
+    for track, following in zip(sheet.tracks, sheet.tracks[1:]):
+        if following.file == track.file:
+            track.end = following.start
+    return sheet
+
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def load_cue(path, revalidate: bool = True) -> CueSheet | None:
+    """Parsed sheet at *path*, reused while its size and mtime are unchanged.
+
+    With *revalidate* false a cached sheet is returned without a ``stat``
+    (for labels drawn on every redraw).
+    """
+    path = os.fspath(path)
+    if not revalidate:
+        with _cache_lock:
+            cached = _cache.get(path)
+        if cached is not None:
+            return cached[1]
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_size, st.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    try:
+        sheet = parse_cue(path)
+    except (OSError, ValueError):
+        return None
+    with _cache_lock:
+        _cache.pop(path, None)
+        _cache[path] = (key, sheet)
+        while len(_cache) > CUE_CACHE_MAX:
+            del _cache[next(iter(_cache))]
+    return sheet
+
+
+def track_paths(sheet_path) -> list[Path]:
+    sheet = load_cue(sheet_path)
+    if sheet is None:
+        return []
+    return [track_path(sheet_path, track.number) for track in sheet.tracks]
+
+
+def resolve_track(path, revalidate: bool = True) -> tuple[CueSheet, CueTrack] | None:
+    split = split_track(path)
+    if split is None:
+        return None
+    sheet = load_cue(split[0], revalidate)
+    if sheet is None:
+        return None
+    track = sheet.track(split[1])
+    return (sheet, track) if track is not None else None
+
+
+def track_at(tracks, position: float) -> int:
+    """Index in *tracks* (one file's, by start) of the track at *position*."""
+    return max(0, bisect_right([track.start for track in tracks], position) - 1)
+
+
+def track_label(path) -> str:
+    """Display name of a virtual track, e.g. ``03. Title``; else the file name."""
+    resolved = resolve_track(path, revalidate=False)
+    if resolved is None:
+        return Path(path).name
+    sheet, track = resolved
+    title = track.title or f"Track {track.number}"
+    if track.performer and track.performer != sheet.performer:
+        title = f"{track.performer} - {title}"
+    return f"{track.number:02d}. {title}"
@@ -1,142 +1,337 @@
 from __future__ import annotations
 
+import json
+import logging
+import logging.handlers
 import os
 import socket
 import sys
-from ctypes import CDLL
+import threading
+import time
 from pathlib import Path
 
+from backends import BACKENDS, MPV_PROFILES, create_backend
+from cue import resolve_track, track_at, track_label, track_path
+from metrics import DaemonStats
+from profiling import create_profiler
+from readahead import ReadAheadCache
+from timing import record_startup_timing
 
-def _mpv_lib_names() -> tuple[str, ...]:
-    if sys.platform.startswith("win"):
-        return ("mpv-2.dll", "libmpv-2.dll", "mpv-1.dll")
-    if sys.platform == "darwin":
-        return ("libmpv.dylib", "libmpv.2.dylib")
-    return ("libmpv.so", "libmpv.so.2", "libmpv.so.1")
-
-
-def _mpv_lib_candidates() -> list[Path]:
-    root = Path(__file__).resolve().parent
-    candidates: list[Path] = []
-
-    bundled = root / "libs"
-    if bundled.is_dir():
-        candidates.append(bundled)
-
-    if sys.platform == "darwin":
-        brew_prefix = Path(os.environ.get("HOMEBREW_PREFIX", "/opt/homebrew"))
-        for rel in ("lib", "opt/mpv/lib"):
-            path = brew_prefix / rel
-            if path.is_dir():
-                candidates.append(path)
-    elif not sys.platform.startswith("win"):
-        for path in (Path("/usr/local/lib"), Path("/usr/lib")):
-            if path.is_dir():
-                candidates.append(path)
-
-    seen: set[Path] = set()
-    unique: list[Path] = []
-    for path in candidates:
-        resolved = path.resolve()
-        if resolved not in seen:
-            seen.add(resolved)
-            unique.append(resolved)
-    return unique
-
-
-def _try_load_mpv_lib(lib_dir: Path) -> Path | None:
-    for name in _mpv_lib_names():
-        lib_file = lib_dir / name
-        if not lib_file.is_file():
-            continue
+_STARTED_AT = time.perf_counter()
+
+CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
+SOCKET_PATH = CONFIG_DIR / "socket"
+CACHE_DIR = CONFIG_DIR / "cache"
+READY_FD_ENV = "TUPLET_READY_FD"
+LOG_PATH = CONFIG_DIR / "daemon.log"
+LOG_LEVEL_ENV = "TUPLET_LOG_LEVEL"
+# daemon.log is rotated to daemon.log.1 .. .LOG_BACKUPS past this size.
+LOG_MAX_BYTES = 1 << 20
+LOG_BACKUPS = 3
+# First file descriptor passed by systemd socket activation (sd_listen_fds).
+SD_LISTEN_FDS_START = 3
+# Pending connections queued while a command is being handled. Status-bar
+# widgets and scripts connect concurrently; a full queue makes connect()
+# fail with EAGAIN on Unix sockets.
+LISTEN_BACKLOG = 64
+# While a CUE track plays, the position is checked again at the track's
+# end, but at least this often (playback speed and seeks drift from the
+# schedule).
+CUE_CHECK_MIN_SEC = 0.05
+CUE_CHECK_MAX_SEC = 30.0
+# How often an idle daemon checks whether its profiling window has ended.
+PROFILER_TICK_SEC = 1.0
+
+
+log = logging.getLogger("tuplet.daemon")
+
+
+class _StderrFollowingHandler(logging.handlers.RotatingFileHandler):
+    """Rotating log that keeps stderr pointed at the current file.
+
+    A spawned daemon's stderr is daemon.log itself (so tracebacks from
+    before logging starts land there too); after a rollover stderr is moved
+    to the new file as well.
+    """
+
+    def doRollover(self):
+        super().doRollover()
+        if self.stream is not None:
+            try:
+                os.dup2(self.stream.fileno(), 2)
+            except OSError:
+                pass
+
+
+def _setup_logging(level: str | None = None) -> None:
+    level = (level or os.environ.get(LOG_LEVEL_ENV) or "INFO").upper()
+    handler: logging.Handler
+    try:
+        stderr_is_log = os.path.samestat(os.fstat(2), os.stat(LOG_PATH))
+    except OSError:
+        stderr_is_log = False
+    if stderr_is_log:
+        handler = _StderrFollowingHandler(
+            LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+        )
+    else:
+        # e.g. under systemd, where stderr goes to the journal
+        handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    root = logging.getLogger("tuplet")
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level, logging.INFO))
+
+
+def _notify_ready() -> None:
+    """Tell the spawning client (or systemd) that the socket is accepting connections."""
+    fd = os.environ.pop(READY_FD_ENV, None)
+    if fd:
         try:
-            CDLL(str(lib_file))
-            return lib_file
+            os.write(int(fd), b"READY\n")
+            os.close(int(fd))
+        except (OSError, ValueError):
+            pass
+
+    notify_socket = os.environ.pop("NOTIFY_SOCKET", None)
+    if notify_socket:
+        if notify_socket.startswith("@"):
+            notify_socket = "\0" + notify_socket[1:]
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            s.connect(notify_socket)
+            s.sendall(b"READY=1")
+            s.close()
         except OSError:
-            continue
-    return None
-
-
-def _setup_mpv_library() -> None:
-    if sys.platform.startswith("win"):
-        lib_dir = Path(__file__).resolve().parent / "libs"
-        if not lib_dir.is_dir():
-            raise RuntimeError(
-                "Local mpv library directory not found. "
-                "Place mpv DLLs in libs/ or install mpv."
-            )
-        os.add_dll_directory(str(lib_dir))
-        return
-
-    var = "DYLD_LIBRARY_PATH" if sys.platform == "darwin" else "LD_LIBRARY_PATH"
-    for lib_dir in _mpv_lib_candidates():
-        lib_file = _try_load_mpv_lib(lib_dir)
-        if lib_file is None:
-            continue
-        existing = os.environ.get(var, "")
-        os.environ[var] = (
-            f"{lib_dir}:{existing}" if existing else str(lib_dir)
-        )
-        return
+            pass
 
-    hint = (
-        "Try: brew install mpv"
-        if sys.platform == "darwin"
-        else "Install mpv and libmpv development libraries for your distro."
-    )
-    raise RuntimeError(f"Cannot load libmpv from any known location. {hint}")
 
+def _activated_socket() -> socket.socket | None:
+    """Return the listening socket passed via systemd's LISTEN_FDS, if any."""
+    try:
+        listen_pid = int(os.environ.get("LISTEN_PID", "0"))
+        listen_fds = int(os.environ.get("LISTEN_FDS", "0"))
+    except ValueError:
+        return None
+    # Never let child processes mistake these for their own.
+    for var in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+        os.environ.pop(var, None)
+    if listen_pid != os.getpid() or listen_fds < 1:
+        return None
+    os.set_inheritable(SD_LISTEN_FDS_START, False)
+    return socket.socket(fileno=SD_LISTEN_FDS_START)
 
-_setup_mpv_library()
-import mpv
 
-CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
-SOCKET_PATH = CONFIG_DIR / "socket"
+def _socket_in_use() -> bool:
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(1.0)
+        s.connect(str(SOCKET_PATH))
+        s.close()
+        return True
+    except OSError:
+        return False
 
 
-def _run_daemon():
-    player = mpv.MPV(video=False)
+def _run_daemon(
+    backend_name: str | None = None, profile: bool = False, mpv_profile: str | None = None
+):
+    player = create_backend(backend_name, mpv_profile)
     current_path = None
+    stats = DaemonStats()
+    stats.player = player
+    cache = stats.readahead = ReadAheadCache(CACHE_DIR)
+    subscribers: list[socket.socket] = []
+    subscribers_lock = threading.Lock()
+
+    def broadcast(event) -> int:
+        """Send an EVENT line to every subscriber; returns how many got it."""
+        # Called from both the accept loop and the backend's event thread.
+        line = f"EVENT\t{event}\n".encode("utf-8")
+        with subscribers_lock:
+            for conn in list(subscribers):
+                try:
+                    conn.sendall(line)
+                except OSError:
+                    subscribers.remove(conn)
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            return len(subscribers)
+
+    # A CUE track is played by opening the sheet's backing file at the
+    # track's start and letting it run on: positions reported and seeked to
+    # are relative to the track, and at each boundary current_path moves on
+    # to the next track (with a "file" event) without reopening the file.
+    cue_lock = threading.Lock()
+    cue_sheet_path = ""
+    cue_tracks: list = []  # the tracks of the backing file, by start
+    cue_index = 0
+    cue_timer: threading.Timer | None = None
+
+    def cue_track_span(time_pos, duration):
+        # -> index of the track at time_pos, position in it, its length
+        index = track_at(cue_tracks, time_pos or 0.0)
+        track = cue_tracks[index]
+        end = track.end if track.end is not None else duration
+        position = None if time_pos is None else max(0.0, time_pos - track.start)
+        length = None if end is None else max(0.0, end - track.start)
+        return index, position, length
+
+    def follow_cue(time_pos, duration=None):
+        nonlocal current_path, cue_index
+        index, position, length = cue_track_span(time_pos, duration)
+        if index != cue_index:
+            cue_index = index
+            current_path = track_path(cue_sheet_path, cue_tracks[index].number)
+            log.info("cue track %s", current_path.name)
+            broadcast("file")
+        return position, length
+
+    def cancel_cue_timer():
+        nonlocal cue_timer
+        if cue_timer is not None:
+            cue_timer.cancel()
+            cue_timer = None
+
+    def arm_cue_timer(time_pos, delay=None):
+        nonlocal cue_timer
+        cancel_cue_timer()
+        if not cue_tracks:
+            return
+        if delay is None:
+            end = cue_tracks[track_at(cue_tracks, time_pos or 0.0)].end
+            if end is None:
+                return  # the last track of the file ends with the file
+            delay = end - (time_pos or 0.0)
+        delay = min(max(delay, CUE_CHECK_MIN_SEC), CUE_CHECK_MAX_SEC)
+        cue_timer = threading.Timer(delay, on_cue_timer)
+        cue_timer.daemon = True
+        cue_timer.start()
+
+    def on_cue_timer():
+        with cue_lock:
+            if not cue_tracks:
+                return
+            try:
+                if player.pause:
+                    return  # re-armed on unpause
+                time_pos = player.time_pos
+            except Exception:
+                return
+            if time_pos is not None:
+                follow_cue(time_pos)
+            arm_cue_timer(time_pos)
+
+    def clear_cue():
+        nonlocal cue_sheet_path, cue_index
+        with cue_lock:
+            cue_sheet_path = ""
+            cue_tracks.clear()
+            cue_index = 0
+            cancel_cue_timer()
+
+    def on_idle_change(_name, value):
+        if value:
+            clear_cue()
+        broadcast(f"idle\t{int(bool(value))}")
+
+    def on_pause_change(_name, value):
+        with cue_lock:
+            if value:
+                cancel_cue_timer()
+            else:
+                # property reads are left to the timer thread
+                arm_cue_timer(None, delay=CUE_CHECK_MIN_SEC)
+        broadcast(f"pause\t{int(bool(value))}")
+
+    player.observe("idle-active", on_idle_change)
+    player.observe("pause", on_pause_change)
 
     def get_info():
         nonlocal current_path
         if not current_path:
             return "NONE"
+        read_started = time.perf_counter()
         try:
             time_pos = player.time_pos
             duration = player.duration
             idle = player.idle_active
+            paused = int(bool(player.pause))
+            buffered = player.buffered
         except Exception:
-            return f"INFO\t{current_path.name}\t\t"
+            return f"INFO\t{current_path.name}\t\t\t"
+        finally:
+            stats.property_reads.observe((time.perf_counter() - read_started) * 1000.0)
         if idle:
             # When playback has finished, clear current_path so subsequent
             # GET_INFO calls reliably report that nothing is playing.
             current_path = None
             return "NONE"
-        return f"INFO\t{current_path.name}\t{time_pos}\t{duration}"
+        with seek_cond:
+            if seek_pending:
+                # report where playback is about to be, not where it was
+                time_pos = seek_pending[0]
+        title = ""
+        with cue_lock:
+            if cue_tracks:
+                time_pos, duration = follow_cue(time_pos, duration)
+                title = track_label(current_path)
+        time_pos = "" if time_pos is None else time_pos
+        duration = "" if duration is None else duration
+        buffered = "" if buffered is None else f"{buffered:.1f}"
+        return (
+            f"INFO\t{current_path.name}\t{time_pos}\t{duration}\t{paused}"
+            f"\t{title}\t{player.profile or ''}\t{buffered}"
+        )
 
     def handle_play(args):
-        nonlocal current_path
+        nonlocal current_path, play_generation, cue_sheet_path, cue_index
         if not args:
             return "ERROR missing path"
         path = args[0].strip()
         start_sec = float(args[1].strip()) if len(args) > 1 else 0
+        with seek_cond:
+            # seeks queued for the previous file must not apply to this one
+            play_generation += 1
+        clear_cue()
         try:
-            player.play(path)
+            resolved = resolve_track(path)
+            if resolved is None:
+                player.play(cache.lookup(path) or path, max(0, start_sec))
+            else:
+                sheet, track = resolved
+                offset = track.start + max(0, start_sec)
+                with cue_lock:
+                    player.play(cache.lookup(track.file) or track.file, offset)
+                    cue_sheet_path = sheet.path
+                    cue_tracks[:] = sheet.tracks_in(track.file)
+                    cue_index = cue_tracks.index(track)
+                    arm_cue_timer(offset)
             current_path = Path(path)
-            if start_sec > 0:
-                player.seek(max(0, start_sec), reference="absolute")
+            stats.tracks_played += 1
+            broadcast("file")
+            log.info("play %s from %.1f s", path, max(0, start_sec))
             return "OK"
         except Exception as e:
+            log.warning("cannot play %s: %s", path, e)
             return f"ERROR {e}"
 
     def handle_stop():
-        nonlocal current_path
+        nonlocal current_path, play_generation
+        with seek_cond:
+            play_generation += 1
+        clear_cue()
         try:
             player.stop()
         except Exception:
             pass
         current_path = None
+        broadcast("stop")
+        log.info("stop")
         return "OK"
 
     def handle_pause():
@@ -146,31 +341,134 @@ def _run_daemon():
         except Exception as e:
             return f"ERROR {e}"
 
+    # Seeks are applied by a worker so a burst of SEEK commands (a held
+    # arrow key, several clients) costs one player seek for the latest
+    # target; targets superseded before the worker gets to them, or queued
+    # for a file that has since been replaced, are dropped.
+    seek_cond = threading.Condition()
+    seek_pending: list = []  # [target seconds, play generation] or empty
+    play_generation = 0
+    seek_stopping = False
+
+    def seek_worker():
+        while True:
+            with seek_cond:
+                while not seek_pending and not seek_stopping:
+                    seek_cond.wait()
+                if seek_stopping:
+                    return
+                target, generation = seek_pending
+                seek_pending.clear()
+                if generation != play_generation:
+                    stats.seeks_dropped += 1
+                    continue
+            try:
+                player.seek(target)
+            except Exception as e:
+                # The file may have ended or changed meanwhile; nothing to do.
+                log.debug("seek to %.1f s failed: %s", target, e)
+                continue
+            with cue_lock:
+                if cue_tracks:
+                    follow_cue(target)
+                    arm_cue_timer(target)
+
     def handle_seek(args):
-        if not args:
+        # "SEEK\t<sec>" is absolute; "+<sec>"/"-<sec>" are relative to the
+        # current (or still pending) position; "<pct>%" is a fraction of
+        # the duration. For a CUE track the absolute and percentage forms
+        # are within the track.
+        if not args or not args[0].strip():
             return "ERROR missing seconds"
+        if current_path is None:
+            return "ERROR nothing is playing"
+        arg = args[0].strip()
         try:
-            sec = float(args[0].strip())
-            player.seek(max(0, sec), reference="absolute")
+            with seek_cond:
+                with cue_lock:
+                    track = cue_tracks[cue_index] if cue_tracks else None
+                offset = track.start if track is not None else 0.0
+                if arg.endswith("%"):
+                    duration = player.duration
+                    if track is not None and track.end is not None:
+                        duration = track.end - track.start
+                    elif track is not None and duration:
+                        duration -= track.start
+                    if not duration:
+                        return "ERROR duration unknown"
+                    target = offset + duration * float(arg[:-1]) / 100.0
+                elif arg[0] in "+-":
+                    base = seek_pending[0] if seek_pending else player.time_pos
+                    target = (base or 0.0) + float(arg)
+                else:
+                    target = offset + float(arg)
+                duration = player.duration
+                if duration:
+                    # stop just short of the end instead of ending the track
+                    target = min(target, max(0.0, duration - 1.0))
+                target = max(0.0, target)
+                if seek_pending:
+                    stats.seeks_dropped += 1
+                seek_pending[:] = [target, play_generation]
+                seek_cond.notify()
             return "OK"
         except Exception as e:
             return f"ERROR {e}"
 
-    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
-    if SOCKET_PATH.exists():
-        try:
-            SOCKET_PATH.unlink()
-        except Exception:
-            pass
+    threading.Thread(target=seek_worker, name="seek", daemon=True).start()
+
+    server = _activated_socket()
+    activated = server is not None
+    if not activated:
+        SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+        if SOCKET_PATH.exists():
+            # A live socket belongs to another daemon (possibly a systemd
+            # socket unit); only stale ones may be replaced.
+            if _socket_in_use():
+                raise RuntimeError(f"Daemon already listening on {SOCKET_PATH}")
+            try:
+                SOCKET_PATH.unlink()
+            except Exception:
+                pass
 
-    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server.bind(str(SOCKET_PATH))
-    server.listen(4)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(str(SOCKET_PATH))
+        server.listen(LISTEN_BACKLOG)
+    record_startup_timing(
+        "daemon_socket_ready",
+        time.perf_counter() - _STARTED_AT,
+        backend=player.name,
+        libmpv=getattr(player, "lib_source", None),
+        activated=activated,
+    )
+    _notify_ready()
+    log.info(
+        "listening on %s (backend %s, mpv profile %s, libmpv %s, socket activation %s)",
+        SOCKET_PATH,
+        player.name,
+        player.profile,
+        getattr(player, "lib_source", None),
+        "yes" if activated else "no",
+    )
+    profiler = create_profiler("daemon", force=profile)
+    if profiler is not None and profiler.profiling:
+        # wake up without commands too, to close the cProfile window on
+        # time (it has to be closed from this thread)
+        server.settimeout(PROFILER_TICK_SEC)
 
     try:
         while True:
-            conn, _ = server.accept()
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                profiler.tick()
+                if not profiler.profiling:
+                    server.settimeout(None)
+                continue
+            keep_open = False
+            cmd = ""
+            handled_at = 0.0
             try:
                 buf = b""
                 while b"\n" not in buf and len(buf) < 8192:
@@ -183,8 +481,10 @@ def _run_daemon():
                 cmd = (parts[0].upper() if parts else "").strip()
                 rest = (parts[1] if len(parts) > 1 else "").strip()
                 rest2 = (parts[2] if len(parts) > 2 else "").strip()
+                handled_at = time.perf_counter()
 
                 if cmd == "QUIT":
+                    log.info("quit requested")
                     reply = "OK"
                     conn.sendall((reply + "\n").encode("utf-8"))
                     conn.close()
@@ -196,27 +496,75 @@ def _run_daemon():
                 elif cmd == "PAUSE":
                     reply = handle_pause()
                 elif cmd == "SEEK":
-                    # SEEK expects the new absolute position in seconds as the
-                    # next argument (e.g. "SEEK\t123.4").
+                    # SEEK takes an absolute position in seconds ("SEEK\t123.4"),
+                    # a relative one ("SEEK\t+5", "SEEK\t-60") or a
+                    # percentage of the duration ("SEEK\t50%").
                     reply = handle_seek([rest2] if rest2 else [rest])
+                elif cmd == "NEXT":
+                    # The playlist lives in the front-end; ask it to advance.
+                    reply = f"OK\t{broadcast('next')}"
                 elif cmd == "GET_INFO":
                     reply = get_info()
+                elif cmd == "PREFETCH":
+                    # PREFETCH\t<path>[\t<path>...]: the tracks likely to be
+                    # played next, replacing the previous request.
+                    paths = [p for p in line.split("\t")[1:] if p.strip()]
+                    reply = f"OK\t{cache.prefetch(paths)}"
+                elif cmd == "STATS":
+                    reply = "STATS\t" + json.dumps(stats.as_dict(), separators=(",", ":"))
+                elif cmd == "SUBSCRIBE":
+                    # Keep the connection open and push EVENT lines to it.
+                    conn.settimeout(0.5)
+                    conn.sendall(b"OK\n")
+                    with subscribers_lock:
+                        subscribers.append(conn)
+                    keep_open = True
+                    stats.record_command(cmd, (time.perf_counter() - handled_at) * 1000.0, True)
+                    continue
                 else:
                     reply = "ERROR unknown command"
+                    log.debug("unknown command %r", cmd)
+                    cmd = "UNKNOWN"
 
+                handler_ms = (time.perf_counter() - handled_at) * 1000.0
+                stats.record_command(cmd, handler_ms, not reply.startswith("ERROR"))
+                log.debug("%s -> %s (%.2f ms)", cmd, reply[:80], handler_ms)
+                handled_at = 0.0
+                if profiler is not None:
+                    profiler.tick()
+                    profiler.record_slow("command", handler_ms, {"command": cmd})
                 conn.sendall((reply + "\n").encode("utf-8"))
             except Exception as e:
+                log.warning("command %s failed: %s", cmd or "?", e)
+                if handled_at:
+                    stats.record_command(
+                        cmd or "UNKNOWN", (time.perf_counter() - handled_at) * 1000.0, False
+                    )
                 try:
                     conn.sendall(f"ERROR {e}\n".encode("utf-8"))
                 except Exception:
                     pass
             finally:
+                if not keep_open:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+        # QUIT received
+    finally:
+        with seek_cond:
+            seek_stopping = True
+            seek_cond.notify()
+        cache.close()
+        if profiler is not None:
+            profiler.stop()
+        with subscribers_lock:
+            for conn in subscribers:
                 try:
                     conn.close()
                 except Exception:
                     pass
-        # QUIT received
-    finally:
+            subscribers.clear()
         try:
             player.terminate()
         except Exception:
@@ -225,12 +573,58 @@ def _run_daemon():
             server.close()
         except Exception:
             pass
-        if SOCKET_PATH.exists():
+        # An activated socket is owned by systemd and must outlive us.
+        if not activated and SOCKET_PATH.exists():
             try:
                 SOCKET_PATH.unlink()
             except Exception:
                 pass
+        log.info("stopped")
+
+
+def parse_args():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="tuplet playback daemon.")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=None,
+        help="Player backend (default: $TUPLET_BACKEND or mpv).",
+    )
+    parser.add_argument(
+        "--mpv-profile",
+        choices=tuple(MPV_PROFILES),
+        type=str.lower,
+        default=None,
+        help=(
+            "mpv buffering profile (default: $TUPLET_MPV_PROFILE, "
+            "\"mpv_profile\" in daemon.json, or default)."
+        ),
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        type=str.upper,
+        default=None,
+        help=f"Log level (default: ${LOG_LEVEL_ENV} or INFO).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Profile the daemon (same as TUPLET_PROFILE=1): cProfile window, "
+            "periodic tracemalloc snapshots and a trace of slow commands."
+        ),
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    _run_daemon()
+    args = parse_args()
+    _setup_logging(args.log_level)
+    try:
+        _run_daemon(args.backend, args.profile, args.mpv_profile)
+    except Exception:
+        log.critical("daemon failed", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from client import CONFIG_DIR
+from jobs import BackgroundJob
+
+FINGERPRINT_CACHE_PATH = CONFIG_DIR / "fingerprints.json"
+FINGERPRINT_CACHE_MAX = 50000
+# A fingerprint hashes the size and this many evenly spaced blocks (the
+# first and last included); smaller files are hashed whole.
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_COUNT = 8
+# Fewer files than this are hashed in the job thread; a process pool is
+# not worth starting for them.
+POOL_MIN_FILES = 16
+POOL_MAX_WORKERS = 4
+
+
+def fingerprint_file(path: str) -> str:
+    """Hash of a file's size and sampled blocks, read through ``mmap``."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                if size <= SAMPLE_BLOCK_SIZE * SAMPLE_COUNT:
+                    digest.update(view)
+                else:
+                    step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_COUNT - 1)
+                    for k in range(SAMPLE_COUNT):
+                        offset = k * step
+                        digest.update(view[offset : offset + SAMPLE_BLOCK_SIZE])
+    return digest.hexdigest()
+
+
+class FingerprintCache:
+    """Fingerprints by path, valid while the file's size and mtime match."""
+
+    def __init__(self, path=FINGERPRINT_CACHE_PATH):
+        self.path = path
+        # path -> [size, mtime_ns, fingerprint], least recently stored first
+        self._entries: dict | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text())
+                self._entries = {
+                    key: value
+                    for key, value in data.items()
+                    if isinstance(value, list) and len(value) == 3
+                }
+            except (OSError, ValueError, AttributeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, path: str, st: os.stat_result) -> str | None:
+        with self._lock:
+            entry = self._load().get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, path: str, st: os.stat_result, fingerprint: str) -> None:
+        with self._lock:
+            entries = self._load()
+            entries.pop(path, None)
+            entries[path] = [st.st_size, st.st_mtime_ns, fingerprint]
+            while len(entries) > FINGERPRINT_CACHE_MAX:
+                del entries[next(iter(entries))]
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps(self._entries, separators=(",", ":"))
+            self._dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(text)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+fingerprints = FingerprintCache()
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_dev, a.st_ino) == (b.st_dev, b.st_ino)
+
+
+def find_duplicate(playlist, path) -> tuple[int, list]:
+    """Index of a playlist entry that is the same file as *path*, or -1.
+
+    Besides the exact path this catches the file reached through a symlink
+    (by its real path) and, among entries with the same file name, the same
+    inode (hard links, bind mounts). Nothing is read here: the entries with
+    the same name and size that may be copies are returned as
+    ``(index, path)`` pairs, for :class:`AddFileJob` to compare by content.
+    Copies under a different name are left to :class:`DuplicateScanJob`.
+    """
+    path = os.fspath(path)
+    real = os.path.realpath(path)
+    for candidate in (path, real):
+        try:
+            return playlist.index(candidate), []
+        except ValueError:
+            pass
+    try:
+        st = os.stat(path)
+    except OSError:
+        return -1, []
+    names = {os.path.basename(path), os.path.basename(real)}
+    same_size = []
+    for index in sorted(i for name in names for i in playlist.find_name(name)):
+        other = playlist.path_str(index)
+        try:
+            other_st = os.stat(other)
+        except OSError:
+            continue
+        if _same_file(st, other_st):
+            return index, []
+        if other_st.st_size == st.st_size:
+            same_size.append((index, other))
+    return -1, same_size
+
+
+def _fingerprint_paths(paths):
+    """Yield ``(position, fingerprint)`` for each of *paths* that could be
+    read, hashing in a process pool when there are enough of them."""
+    if len(paths) < POOL_MIN_FILES:
+        results = map(_try_fingerprint, paths)
+        yield from ((k, fp) for k, fp in enumerate(results) if fp)
+        return
+    workers = min(POOL_MAX_WORKERS, os.cpu_count() or 1)
+    # the TUI runs threads (jobs, executor, read-ahead); forking it
+    # could copy a lock some other thread holds
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = pool.map(_try_fingerprint, paths, chunksize=8)
+        try:
+            for k, fp in enumerate(results):
+                if fp:
+                    yield k, fp
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cached_fingerprints(paths: list) -> list:
+    """Fingerprints of *paths* (None where unreadable), from
+    :data:`fingerprints` or computed and stored there. The cache is written
+    out with the state, not here."""
+    found: list = [None] * len(paths)
+    stats: list = [None] * len(paths)
+    missing = []
+    for k, path in enumerate(paths):
+        try:
+            stats[k] = os.stat(path)
+        except OSError:
+            continue
+        found[k] = fingerprints.get(path, stats[k])
+        if found[k] is None:
+            missing.append(k)
+    for k, fp in _fingerprint_paths([paths[k] for k in missing]):
+        k = missing[k]
+        fingerprints.put(paths[k], stats[k], fp)
+        found[k] = fp
+    return found
+
+
+class AddFileJob(BackgroundJob):
+    """Append a media file to the playlist unless one of the same-named
+    entries found by :func:`find_duplicate` turns out to be a copy."""
+
+    def __init__(self, path, same_size: list, notify=None):
+        super().__init__(f"Adding {path.name}", notify)
+        self.path = path
+        self.same_size = same_size
+        self.result = ""
+
+    def run(self) -> None:
+        real = os.path.realpath(self.path)
+        others = [other for _index, other in self.same_size]
+        prints = _cached_fingerprints([real, *others])
+        self.processed = len(others)
+        if prints[0] is not None:
+            for other, fp in zip(others, prints[1:]):
+                if fp == prints[0]:
+                    self.post([other])
+                    return
+        self.post([None])
+
+    def apply(self, state) -> bool:
+        changed = False
+        for duplicate in self.take():
+            name = self.path.name
+            if duplicate is not None and duplicate in state.playlist:
+                other = os.path.basename(duplicate)
+                self.result = (
+                    f"Already in playlist: {name}"
+                    if other == name
+                    else f"Already in playlist as {other}"
+                )
+            elif self.path in state.playlist:
+                self.result = f"Already in playlist: {name}"
+            else:
+                state.playlist.append(self.path)
+                self.result = f"Added to playlist: {name}"
+                changed = True
+        return changed
+
+    def progress_text(self) -> str:
+        return f"{self.label}: comparing with {len(self.same_size)} file(s)"
+
+    def summary(self) -> str:
+        if self.error or self.cancelled or not self.result:
+            return super().summary()
+        return self.result
+
+
+@dataclass
+class DuplicateReport:
+    # playlist indices of each group of duplicates; the first one is kept
+    groups: list
+    # playlist version the indices refer to
+    version: int
+
+    @property
+    def extra(self) -> int:
+        return sum(len(group) - 1 for group in self.groups)
+
+    def extra_indices(self) -> list:
+        return [index for group in self.groups for index in group[1:]]
+
+    def lines(self, playlist, limit: int) -> list:
+        """Text for the duplicates view, at most *limit* lines."""
+        lines = [
+            f"Duplicates: {len(self.groups)} groups, {self.extra} extra copies",
+            "X: remove the extra copies  D: close",
+        ]
+        for group in self.groups:
+            if len(lines) >= limit:
+                break
+            lines.append(f"{group[0] + 1:>4}. {playlist.path_str(group[0])}")
+            for index in group[1:]:
+                lines.append(f"   - {index + 1}. {playlist.path_str(index)}")
+        shown = lines[:limit]
+        if len(lines) > limit:
+            shown[-1] = "   ..."
+        return shown
+
+
+class DuplicateScanJob(BackgroundJob):
+    """Group playlist entries that are the same file or have the same content.
+
+    Entries are grouped by device and inode first; files of equal size that
+    are not already the same inode are then compared by fingerprint, taken
+    from :data:`fingerprints` or computed in a process pool.
+    """
+
+    def __init__(self, playlist, version: int, notify=None):
+        super().__init__("Finding duplicates", notify)
+        self.playlist = playlist
+        self.version = version
+        self.total = len(playlist)
+        self.hashing = 0
+        self.report: DuplicateReport | None = None
+
+    def run(self) -> None:
+        # (dev, ino) -> playlist indices of that file
+        by_inode: dict[tuple, list] = {}
+        stats: dict[tuple, tuple] = {}
+        for index, path in enumerate(self.playlist.iter_str()):
+            if self.cancelled:
+                return
+            self.processed += 1
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key not in by_inode:
+                by_inode[key] = []
+                stats[key] = (path, st)
+            by_inode[key].append(index)
+
+        by_size: dict[int, list] = {}
+        for key, (path, st) in stats.items():
+            if st.st_size:
+                by_size.setdefault(st.st_size, []).append(key)
+        candidates = [key for keys in by_size.values() if len(keys) > 1 for key in keys]
+
+        # identity -> content key; distinct inodes with equal content merge
+        content = {key: key for key in by_inode}
+        missing = []
+        for key in candidates:
+            path, st = stats[key]
+            fingerprint = fingerprints.get(path, st)
+            if fingerprint is None:
+                missing.append(key)
+            else:
+                content[key] = (st.st_size, fingerprint)
+        self.hashing = len(missing)
+        for k, fingerprint in _fingerprint_paths([stats[key][0] for key in missing]):
+            if self.cancelled:
+                return
+            key = missing[k]
+            path, st = stats[key]
+            fingerprints.put(path, st, fingerprint)
+            content[key] = (st.st_size, fingerprint)
+
+        groups: dict = {}
+        for key, indices in by_inode.items():
+            groups.setdefault(content[key], []).extend(indices)
+        report = sorted(sorted(group) for group in groups.values() if len(group) > 1)
+        self.report = DuplicateReport(report, self.version)
+        self.post([self.report])
+
+    def apply(self, state) -> bool:
+        changed = False
+        for report in self.take():
+            if report.groups:
+                state.duplicates = report
+            # the playlist itself is only changed from the duplicates view,
+            # but a save also writes out the fingerprints computed here
+            changed = bool(self.hashing)
+        return changed
+
+    def progress_text(self) -> str:
+        if self.hashing:
+            return f"{self.label}: comparing {self.hashing} files of equal size"
+        return f"{self.label}: {self.processed}/{self.total} checked"
+
+    def summary(self) -> str:
+        if self.error or self.cancelled or self.report is None:
+            return super().summary()
+        if not self.report.groups:
+            return "No duplicates in the playlist"
+        return (
+            f"{self.report.extra} duplicate(s) in {len(self.report.groups)} groups"
+        )
+
+
+def _try_fingerprint(path: str) -> str | None:
+    # runs in a pool worker; an unreadable file just gets no fingerprint
+    try:
+        return fingerprint_file(path)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,19 @@
+"""Text formatting shared by the front-ends and ``ctl``; kept free of
+curses so the headless client can import it cheaply."""
+
+from __future__ import annotations
+
+
+def format_time(seconds) -> str:
+    """``mm:ss``, or ``h:mm:ss`` from an hour up; ``--:--`` when unknown."""
+    if seconds is None:
+        return "--:--"
+    try:
+        total = max(0, int(float(seconds)))
+    except (ValueError, TypeError, OverflowError):
+        return "--:--"
+    minutes, secs = divmod(total, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class BackgroundJob(ABC):
+    """Work that runs on a thread and hands results to the UI in batches.
+
+    Subclasses implement :meth:`run`, calling :meth:`post` with each batch and
+    checking :attr:`cancelled` between steps. The UI thread applies batches
+    with :meth:`apply` (or collects them with :meth:`take`); *notify* is
+    called from the worker thread whenever there is something new, including
+    when the job finishes.
+    """
+
+    def __init__(self, label: str, notify=None):
+        self.label = label
+        self.processed = 0
+        self.done = False
+        self.error: str | None = None
+        self._notify = notify
+        self._batches: deque[list] = deque()
+        self._cancel = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def start(self) -> "BackgroundJob":
+        self._thread = threading.Thread(target=self._main, name=self.label, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @abstractmethod
+    def run(self) -> None:
+        ...
+
+    def post(self, batch: list) -> None:
+        if batch:
+            self._batches.append(batch)
+            self._wake()
+
+    def take(self) -> list:
+        """Return all items posted since the last call, in order."""
+        items: list = []
+        while self._batches:
+            items.extend(self._batches.popleft())
+        return items
+
+    def apply(self, state) -> bool:
+        """Apply collected batches to *state*; returns True if it changed.
+
+        By default batches are playlist entries to append.
+        """
+        items = self.take()
+        if items:
+            state.playlist.extend(items)
+        return bool(items)
+
+    def progress_text(self) -> str:
+        return f"{self.label}: {self.processed} items"
+
+    def summary(self) -> str:
+        if self.error:
+            return f"{self.label} failed: {self.error}"
+        if self.cancelled:
+            return f"{self.label} cancelled after {self.processed} items"
+        return f"{self.label}: done ({self.processed} items)"
+
+    def _wake(self) -> None:
+        if self._notify is not None:
+            try:
+                self._notify()
+            except Exception:
+                pass
+
+    def _main(self) -> None:
+        try:
+            self.run()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.done = True
+            self._wake()
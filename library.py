@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from cue import is_cue_sheet, load_cue, track_path
+from jobs import BackgroundJob
+from model import natural_key
+from view import MEDIA_EXTENSIONS
+
+# The first batch is small so the first tracks show up immediately.
+FIRST_BATCH_SIZE = 50
+BATCH_SIZE = 1000
+
+
+def iter_media_files(root: Path, show_hidden: bool = False):
+    """Yield media files under *root*, depth first in natural order.
+
+    Each directory's files come before its subdirectories. Symlinked
+    directories are not followed, so link loops cannot recurse forever.
+    A file split by a CUE sheet next to it is replaced by the sheet's tracks.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                children = list(it)
+        except OSError:
+            continue
+        files, dirs, sheets = [], [], []
+        for entry in children:
+            if not show_hidden and entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif (
+                    os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS
+                    and entry.is_file()
+                ):
+                    files.append(entry.name)
+                elif is_cue_sheet(entry.name) and entry.is_file():
+                    sheets.append(entry.name)
+            except OSError:
+                continue
+        tracks = []
+        for name in sorted(sheets, key=natural_key):
+            sheet = load_cue(directory / name)
+            if sheet is None:
+                continue
+            split = {track.file for track in sheet.tracks}
+            files = [f for f in files if str(directory / f) not in split]
+            tracks.extend(track_path(directory / name, t.number) for t in sheet.tracks)
+        files.sort(key=natural_key)
+        for name in files:
+            yield directory / name
+        yield from tracks
+        dirs.sort(key=natural_key, reverse=True)
+        stack.extend(directory / name for name in dirs)
+
+
+class DirectoryAddJob(BackgroundJob):
+    """Walk a directory tree and append its media files to the playlist."""
+
+    def __init__(self, root: Path, show_hidden: bool = False, notify=None):
+        super().__init__(f"Adding {root.name or root}", notify)
+        self.root = root
+        self.show_hidden = show_hidden
+        self.added = 0
+        self.duplicates = 0
+        # playlist paths, and the (playlist, version) they were read from
+        self._known: set | None = None
+        self._known_at: tuple | None = None
+
+    def run(self) -> None:
+        pending: list[Path] = []
+        limit = FIRST_BATCH_SIZE
+        for path in iter_media_files(self.root, self.show_hidden):
+            if self.cancelled:
+                break
+            pending.append(path)
+            self.processed += 1
+            if len(pending) >= limit:
+                self.post(pending)
+                pending = []
+                limit = BATCH_SIZE
+        self.post(pending)
+
+    def apply(self, state) -> bool:
+        items = self.take()
+        if not items:
+            return False
+        playlist = state.playlist
+        if self._known_at != (playlist, playlist.version):
+            # read again only when the playlist changed since the last batch
+            # (entries removed or added meanwhile), rather than an `in`
+            # check per track
+            self._known = set(playlist.iter_str())
+        fresh = [path for path in items if str(path) not in self._known]
+        self._known.update(map(str, fresh))
+        self.duplicates += len(items) - len(fresh)
+        self.added += len(fresh)
+        playlist.extend(fresh)
+        self._known_at = (playlist, playlist.version)
+        return bool(fresh)
+
+    def progress_text(self) -> str:
+        return f"{self.label}: {self.processed} tracks found"
+
+    def summary(self) -> str:
+        if self.error:
+            return super().summary()
+        text = f"Added {self.added} tracks from {self.root.name or self.root}"
+        if self.duplicates:
+            text += f" ({self.duplicates} already in playlist)"
+        if self.cancelled:
+            text += " (cancelled)"
+        return text
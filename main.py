@@ -1,269 +1,674 @@
+import time
+
+# Taken before the remaining imports so first-paint timing includes them.
+_STARTED_AT = time.perf_counter()
+
+import sys
+
+if __name__ == "__main__" and sys.argv[1:2] == ["ctl"]:
+    # Headless control: skip curses and the browser state entirely.
+    from ctl import main as ctl_main
+
+    sys.exit(ctl_main(sys.argv[2:]))
+
 import argparse
+import asyncio
 import curses
-import random
-import time
+import os
+import shutil
+import signal
 from pathlib import Path
 
-from controller import handle_action, handle_key
+from controller import (
+    JOB_ACTIONS,
+    PLAYER_ACTIONS,
+    SEEK_ACTIONS,
+    SEEK_INTERVAL_SEC,
+    handle_action,
+    handle_key,
+    merge_seek,
+    prefetch_upcoming,
+    record_watch_scans,
+    send_seeks,
+    start_folder_summary,
+    start_job_action,
+    toggle_watched_folder,
+    watch_watched_folders,
+)
 from model import (
     BrowserState,
     build_display,
+    entry_label,
     clamp_playlist_selection,
     clamp_selection,
     DaemonPlayer,
+    daemon_error_message,
     ensure_daemon_running,
-    last_daemon_error,
+    follow_cue_track,
     list_entries,
+    listed_dirs,
+    sort_mode_for,
     load_persisted_state_into,
+    next_playlist_index,
+    now_playing_label,
+    remember_duration,
+    remember_position,
+    resume_position,
+    SAVE_DELAY_SEC,
     save_state,
 )
-
-
-def _daemon_error_message() -> str:
-    if last_daemon_error:
-        return f"Could not start playback daemon: {last_daemon_error}"
-    return "Could not start or connect to playback daemon."
 from view import (
+    MEDIA_EXTENSIONS,
     get_visible_height,
     init_colors,
+    playlist_label,
     render_browser,
     show_info_bar,
     show_status,
     show_error,
+    show_overlay,
 )
+from duplicates import fingerprints
+from metrics import FrameStats
+from profiling import create_profiler
+from summaries import summary_cache
+from timing import STARTUP_TIMING_ENV, record_startup_timing
+from watcher import DirectoryWatcher, FolderWatcher
 
 
-def file_browser(stdscr, start_path: Path):
+SCROLL_TICK_SEC = 0.2
+SCROLL_END_PAUSE_SEC = 0.5
+RETRY_INTERVAL_SEC = 3.0
+# While something is playing the info bar clock needs a redraw every second;
+# without a daemon event stream the same tick doubles as a fallback poll.
+PROGRESS_TICK_SEC = 1.0
+# Directory mtime polling interval on platforms without inotify.
+FS_POLL_SEC = 2.0
+
+
+def file_browser(
+    stdscr,
+    start_path: Path,
+    frame_stats_path: Path | None = None,
+    profile: bool = False,
+):
     curses.curs_set(0)
     init_colors()
-    daemon_ready = ensure_daemon_running()
+    stdscr.nodelay(True)
+    frame_stats = FrameStats()
+    profiler = create_profiler("tui", force=profile)
+    try:
+        asyncio.run(_browser_loop(stdscr, start_path, frame_stats, profiler))
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if frame_stats_path is not None:
+            try:
+                frame_stats.dump(frame_stats_path)
+            except OSError:
+                pass
+
+
+def _marquee_deadline(now, paused_until, last_update):
+    if now < paused_until:
+        return paused_until
+    return last_update + SCROLL_TICK_SEC
+
+
+async def _browser_loop(stdscr, start_path: Path, frame_stats: FrameStats, profiler):
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    # The daemon is started (or reconnected) in a worker thread so the
+    # first frame does not wait for a cold mpv spawn.
+    daemon_ready = False
+    daemon_starting = None
     init_error_msg = None
-    if not daemon_ready:
-        init_error_msg = _daemon_error_message()
-    last_retry_at = 0.0
-    RETRY_INTERVAL_SEC = 3.0
+    last_retry_at = float("-inf")
+    first_paint = True
+    show_frame_stats = False
     state = BrowserState(current_path=start_path)
     load_persisted_state_into(state)
     player = DaemonPlayer()
     status_msg = None
+    error_msg = None
+
+    listing_key = None
+    listing_sort = None
+    listing_dirty = True
+    entries, has_parent, display = [], False, []
+    info_dirty = True
+    next_info_at = 0.0
+    next_fs_poll_at = 0.0
+    playback_info = (None, None, None)
+    events_sock = None
+    events_buf = b""
+    next_requested = False
+    jobs = []
+    save_due_at = None
+    # seeks waiting for SEEK_INTERVAL_SEC to pass (see merge_seek)
+    pending_seek = ()
+    last_seek_at = float("-inf")
+    # what the daemon was last asked to copy ahead (prefetch_upcoming)
+    prefetched = None
+    # summaries of the browsed folder's subfolders, kept out of `jobs` so it
+    # neither shows progress nor is cancelled with 'C'
+    summary_job = None
+    # browser row of each listed subfolder, for updating summary labels
+    dir_rows: dict[str, int] = {}
+
+    # ── Event sources ────────────────────────────────────────────────
+    def on_stdin():
+        wake.set()
+
+    def on_fs_event():
+        nonlocal listing_dirty
+        if watcher.read_events():
+            listing_dirty = True
+            wake.set()
 
-    SCROLL_TICK_SEC = 0.2
-    SCROLL_END_PAUSE_SEC = 0.5
+    def on_folder_event():
+        folder_watcher.read_events(time.monotonic())
+        wake.set()
 
-    while True:
-        if not daemon_ready:
+    def on_daemon_event():
+        nonlocal events_sock, events_buf, info_dirty, next_requested
+        try:
+            chunk = events_sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            # daemon went away; fall back to polling until we resubscribe
+            loop.remove_reader(events_sock.fileno())
+            events_sock.close()
+            events_sock = None
+        *lines, events_buf = (events_buf + chunk).split(b"\n")
+        if b"EVENT\tnext" in lines:
+            next_requested = True
+        # Any EVENT line means playback changed; refetch info on this frame.
+        info_dirty = True
+        wake.set()
+
+    def on_resize():
+        size = shutil.get_terminal_size()
+        try:
+            curses.resizeterm(size.lines, size.columns)
+        except curses.error:
+            pass
+        wake.set()
+
+    def notify_from_thread():
+        loop.call_soon_threadsafe(wake.set)
+
+    def subscribe():
+        nonlocal events_sock, events_buf
+        events_buf = b""
+        events_sock = player.open_event_stream()
+        if events_sock is not None:
+            loop.add_reader(events_sock.fileno(), on_daemon_event)
+
+    watcher = DirectoryWatcher()
+    folder_watcher = FolderWatcher(MEDIA_EXTENSIONS)
+    watch_watched_folders(state, folder_watcher)
+    loop.add_reader(sys.stdin.fileno(), on_stdin)
+    if watcher.fileno() is not None:
+        loop.add_reader(watcher.fileno(), on_fs_event)
+    if folder_watcher.fileno() is not None:
+        loop.add_reader(folder_watcher.fileno(), on_folder_event)
+    try:
+        loop.add_signal_handler(signal.SIGWINCH, on_resize)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass
+
+    try:
+        while True:
             now = time.monotonic()
-            if (now - last_retry_at) >= RETRY_INTERVAL_SEC:
-                daemon_ready = ensure_daemon_running()
+            deadlines = []
+
+            if not daemon_ready:
+                if daemon_starting is None and (now - last_retry_at) >= RETRY_INTERVAL_SEC:
+                    daemon_starting = loop.run_in_executor(None, ensure_daemon_running)
+                    daemon_starting.add_done_callback(lambda _f: wake.set())
+                if daemon_starting is not None and daemon_starting.done():
+                    daemon_ready = daemon_starting.result()
+                    daemon_starting = None
+                    last_retry_at = now
+                    if daemon_ready:
+                        if init_error_msg:
+                            status_msg = "Connected to playback daemon."
+                        init_error_msg = None
+                        info_dirty = True
+                        subscribe()
+                    else:
+                        init_error_msg = daemon_error_message()
+                if not daemon_ready and daemon_starting is None:
+                    deadlines.append(last_retry_at + RETRY_INTERVAL_SEC)
+            elif events_sock is None and (now - last_retry_at) >= RETRY_INTERVAL_SEC:
                 last_retry_at = now
-                if daemon_ready:
-                    init_error_msg = None
-                    status_msg = "Connected to playback daemon."
+                subscribe()
+
+            # ── Watched folders: append new media once it has settled ──
+            if folder_watcher.roots:
+                ready, next_due = folder_watcher.take_ready(now)
+                if next_due is not None:
+                    deadlines.append(next_due)
+                fresh = [path for path in ready if path not in state.playlist]
+                if fresh:
+                    state.playlist.extend(fresh)
+                    if save_due_at is None:
+                        save_due_at = now + SAVE_DELAY_SEC
+                    status_msg = (
+                        f"Added {len(fresh)} new track(s) from watched folders"
+                    )
+
+            # ── Background jobs: apply batches, coalesce state saves ────
+            for job in list(jobs):
+                # read before applying so a batch posted just before the
+                # job finished is not dropped with it
+                finished = job.done
+                if job.apply(state) and save_due_at is None:
+                    save_due_at = now + SAVE_DELAY_SEC
+                if finished:
+                    jobs.remove(job)
+                    status_msg = job.summary()
+            if jobs and not status_msg:
+                status_msg = " | ".join(job.progress_text() for job in jobs)
+            if summary_job is not None:
+                finished = summary_job.done
+                for path in summary_job.apply(state):
+                    row = dir_rows.get(path)
+                    if row is not None:
+                        display[row] = entry_label(entries[row], state.folder_summaries, True)
+                if finished:
+                    summary_job = None
+            if save_due_at is not None:
+                if now >= save_due_at:
+                    record_watch_scans(state, folder_watcher)
+                    save_state(state)
+                    fingerprints.save()
+                    save_due_at = None
                 else:
-                    init_error_msg = _daemon_error_message()
-
-        entries, has_parent = list_entries(state)
-        display = build_display(entries, has_parent)
-        visible_height = get_visible_height(stdscr)
-        state.selected, state.scroll = clamp_selection(
-            state.selected, state.scroll, visible_height, entries
-        )
-
-        # ── Update horizontal scroll offsets for long names ─────────────
-        now = time.monotonic()
-        max_y, max_x = stdscr.getmaxyx()
-        divider_col = max(10, max_x // 2)
-        browser_width = max(0, divider_col - 2)
-        playlist_left = divider_col + 1
-        playlist_width = max(0, max_x - playlist_left - 1)
-
-        # Browser pane scrolling
-        if (
-            state.active_pane == "browser"
-            and entries
-            and 0 <= state.selected < len(display)
-        ):
-            label = display[state.selected]
-            if len(label) > browser_width and browser_width > 0:
-                if now < state.browser_scroll_paused_until:
-                    # stay at the end during pause window
-                    pass
-                elif (now - state.browser_scroll_last_update) >= SCROLL_TICK_SEC:
-                    # allow the last character to fully scroll past the visible area
-                    max_offset = max(0, len(label))
-                    if state.browser_scroll_offset >= max_offset:
-                        # after pause, reset to start
-                        state.browser_scroll_offset = 0
-                        state.browser_scroll_paused_until = 0.0
-                    else:
-                        state.browser_scroll_offset += 1
+                    deadlines.append(save_due_at)
+
+            # ── Coalesced seeks ──────────────────────────────────────────
+            if pending_seek:
+                if now - last_seek_at >= SEEK_INTERVAL_SEC:
+                    with frame_stats.measure("daemon"):
+                        result = send_seeks(pending_seek, player)
+                    pending_seek = ()
+                    last_seek_at = now
+                    info_dirty = True
+                    if result:
+                        error_msg = result[1]
+                else:
+                    deadlines.append(last_seek_at + SEEK_INTERVAL_SEC)
+
+            # ── Directory listing (only when it may have changed) ──────
+            if watcher.fileno() is None and now >= next_fs_poll_at:
+                next_fs_poll_at = now + FS_POLL_SEC
+                if watcher.poll_changed():
+                    listing_dirty = True
+            if watcher.fileno() is None:
+                deadlines.append(next_fs_poll_at)
+            key_now = (state.current_path, state.show_hidden)
+            sort_now = sort_mode_for(state, state.current_path)
+            if listing_dirty or key_now != listing_key:
+                if key_now != listing_key:
+                    state.folder_summaries.clear()
+                with frame_stats.measure("listing"):
+                    entries, has_parent = list_entries(state)
+                    dirs = listed_dirs(state, entries, has_parent)
+                    dir_rows = {str(path): row for row, path in enumerate(dirs, int(has_parent))}
+                    display = build_display(
+                        entries, has_parent, state.folder_summaries, len(dirs)
+                    )
+                if summary_job is not None:
+                    summary_job.cancel()
+                summary_job = start_folder_summary(state, dirs, notify_from_thread)
+                listing_key = key_now
+                listing_sort = sort_now
+                listing_dirty = False
+                watcher.watch(state.current_path)
+            elif sort_now != listing_sort:
+                # re-sort the cached scan and keep the same entry selected
+                selected_path = entries[state.selected] if entries else None
+                with frame_stats.measure("listing"):
+                    entries, has_parent = list_entries(state, rescan=False)
+                    dirs = listed_dirs(state, entries, has_parent)
+                    dir_rows = {str(path): row for row, path in enumerate(dirs, int(has_parent))}
+                    display = build_display(
+                        entries, has_parent, state.folder_summaries, len(dirs)
+                    )
+                    try:
+                        state.selected = entries.index(selected_path)
+                    except ValueError:
+                        pass
+                listing_sort = sort_now
+            visible_height = get_visible_height(stdscr)
+            state.selected, state.scroll = clamp_selection(
+                state.selected, state.scroll, visible_height, entries
+            )
+
+            # ── Update horizontal scroll offsets for long names ─────────
+            max_y, max_x = stdscr.getmaxyx()
+            divider_col = max(10, max_x // 2)
+            browser_width = max(0, divider_col - 2)
+            playlist_left = divider_col + 1
+            playlist_width = max(0, max_x - playlist_left - 1)
+
+            # Browser pane scrolling
+            if (
+                state.active_pane == "browser"
+                and entries
+                and 0 <= state.selected < len(display)
+            ):
+                label = display[state.selected]
+                if len(label) > browser_width and browser_width > 0:
+                    if now < state.browser_scroll_paused_until:
+                        # stay at the end during pause window
+                        pass
+                    elif (now - state.browser_scroll_last_update) >= SCROLL_TICK_SEC:
+                        # allow the last character to fully scroll past the visible area
+                        max_offset = max(0, len(label))
                         if state.browser_scroll_offset >= max_offset:
-                            # reached end; start pause window
-                            state.browser_scroll_paused_until = (
-                                now + SCROLL_END_PAUSE_SEC
-                            )
-                    state.browser_scroll_last_update = now
+                            # after pause, reset to start
+                            state.browser_scroll_offset = 0
+                            state.browser_scroll_paused_until = 0.0
+                        else:
+                            state.browser_scroll_offset += 1
+                            if state.browser_scroll_offset >= max_offset:
+                                # reached end; start pause window
+                                state.browser_scroll_paused_until = (
+                                    now + SCROLL_END_PAUSE_SEC
+                                )
+                        state.browser_scroll_last_update = now
+                    deadlines.append(
+                        _marquee_deadline(
+                            now,
+                            state.browser_scroll_paused_until,
+                            state.browser_scroll_last_update,
+                        )
+                    )
+                else:
+                    state.browser_scroll_offset = 0
+                    state.browser_scroll_last_update = 0.0
+                    state.browser_scroll_paused_until = 0.0
             else:
                 state.browser_scroll_offset = 0
                 state.browser_scroll_last_update = 0.0
                 state.browser_scroll_paused_until = 0.0
-        else:
-            state.browser_scroll_offset = 0
-            state.browser_scroll_last_update = 0.0
-            state.browser_scroll_paused_until = 0.0
-
-        # Playlist pane scrolling
-        if (
-            state.active_pane == "playlist"
-            and state.playlist
-            and 0 <= state.playlist_selected < len(state.playlist)
-        ):
-            name = state.playlist[state.playlist_selected].name
-            prefix = f"{state.playlist_selected + 1:>3}. "
-            available = max(0, playlist_width - len(prefix))
-            if len(name) > available and available > 0:
-                if now < state.playlist_scroll_paused_until:
-                    # stay at the end during pause window
-                    pass
-                elif (now - state.playlist_scroll_last_update) >= SCROLL_TICK_SEC:
-                    # allow the last character to fully scroll past the visible area
-                    max_offset = max(0, len(name))
-                    if state.playlist_scroll_offset >= max_offset:
-                        # after pause, reset to start
-                        state.playlist_scroll_offset = 0
-                        state.playlist_scroll_paused_until = 0.0
-                    else:
-                        state.playlist_scroll_offset += 1
+
+            # Playlist pane scrolling
+            if (
+                state.active_pane == "playlist"
+                and state.playlist
+                and 0 <= state.playlist_selected < len(state.playlist)
+            ):
+                name = playlist_label(state.playlist, state.playlist_selected)
+                prefix = f"{state.playlist_selected + 1:>3}. "
+                available = max(0, playlist_width - len(prefix))
+                if len(name) > available and available > 0:
+                    if now < state.playlist_scroll_paused_until:
+                        # stay at the end during pause window
+                        pass
+                    elif (now - state.playlist_scroll_last_update) >= SCROLL_TICK_SEC:
+                        # allow the last character to fully scroll past the visible area
+                        max_offset = max(0, len(name))
                         if state.playlist_scroll_offset >= max_offset:
-                            # reached end; start pause window
-                            state.playlist_scroll_paused_until = (
-                                now + SCROLL_END_PAUSE_SEC
-                            )
-                    state.playlist_scroll_last_update = now
+                            # after pause, reset to start
+                            state.playlist_scroll_offset = 0
+                            state.playlist_scroll_paused_until = 0.0
+                        else:
+                            state.playlist_scroll_offset += 1
+                            if state.playlist_scroll_offset >= max_offset:
+                                # reached end; start pause window
+                                state.playlist_scroll_paused_until = (
+                                    now + SCROLL_END_PAUSE_SEC
+                                )
+                        state.playlist_scroll_last_update = now
+                    deadlines.append(
+                        _marquee_deadline(
+                            now,
+                            state.playlist_scroll_paused_until,
+                            state.playlist_scroll_last_update,
+                        )
+                    )
+                else:
+                    state.playlist_scroll_offset = 0
+                    state.playlist_scroll_last_update = 0.0
+                    state.playlist_scroll_paused_until = 0.0
             else:
                 state.playlist_scroll_offset = 0
                 state.playlist_scroll_last_update = 0.0
                 state.playlist_scroll_paused_until = 0.0
-        else:
-            state.playlist_scroll_offset = 0
-            state.playlist_scroll_last_update = 0.0
-            state.playlist_scroll_paused_until = 0.0
-
-        clamp_playlist_selection(state, visible_height)
-        render_browser(
-            stdscr,
-            state.current_path,
-            display,
-            state.selected,
-            state.scroll,
-            entries,
-            visible_height,
-            state.active_pane,
-            state.playlist,
-            state.playlist_selected,
-            state.playlist_scroll,
-            state.browser_scroll_offset,
-            state.playlist_scroll_offset,
-        )
-        if daemon_ready:
-            playing_name, time_pos, duration = player.get_playback_info()
-        else:
-            playing_name, time_pos, duration = (None, None, None)
-
-        # ── Autoplay next item in playlist when one finishes ───────────
-        if (
-            state.playing_from_playlist
-            and state.active_pane == "playlist"
-            and state.was_playing
-            and playing_name is None
-            and state.playlist
-        ):
-            if state.random_play:
-                n = len(state.playlist)
-                if n > 1 and state.playing_index >= 0:
-                    indices = [i for i in range(n) if i != state.playing_index]
-                    next_index = random.choice(indices)
-                else:
-                    next_index = random.randint(0, n - 1)
-            else:
-                next_index = state.playing_index + 1
-                if next_index >= len(state.playlist):
-                    if state.repeat_all and state.playlist:
-                        next_index = 0
-                    else:
-                        # reached end of playlist; stop autoplay
-                        state.playing_from_playlist = False
-                        state.playing_index = -1
-            if 0 <= next_index < len(state.playlist):
-                state.playing_index = next_index
-                state.playlist_selected = next_index
-                clamp_playlist_selection(state, visible_height)
-                next_path = state.playlist[next_index]
-                state.last_playing_path = next_path
-                save_state(state)
-                result = handle_action(("select_audio", next_path), player)
-                if result:
-                    _, status_msg = result
-
-        show_info_bar(
-            stdscr,
-            playing_name,
-            (time_pos, duration),
-            state.repeat_all,
-            state.random_play,
-        )
-
-        if status_msg:
-            show_status(stdscr, status_msg)
-            status_msg = None
-
-        pending = player.poll_pending() if daemon_ready else None
-        if pending:
-            level, message = pending
-            if level == "error":
-                show_error(stdscr, message)
-                stdscr.timeout(-1)
-                stdscr.getch()
+
+            clamp_playlist_selection(state, visible_height)
+            with frame_stats.measure("render"):
+                render_browser(
+                    stdscr,
+                    state.current_path,
+                    display,
+                    state.selected,
+                    state.scroll,
+                    entries,
+                    visible_height,
+                    state.active_pane,
+                    state.playlist,
+                    state.playlist_selected,
+                    state.playlist_scroll,
+                    state.browser_scroll_offset,
+                    state.playlist_scroll_offset,
+                    state.marked,
+                    state.folder_summaries.get(str(state.current_path)),
+                )
+            if daemon_ready:
+                if info_dirty or now >= next_info_at:
+                    with frame_stats.measure("daemon"):
+                        playback_info = player.get_playback_info()
+                    info_dirty = False
+                    next_info_at = now + PROGRESS_TICK_SEC
+                if playback_info[0] is not None or events_sock is None:
+                    deadlines.append(next_info_at)
             else:
-                show_status(stdscr, message)
+                playback_info = (None, None, None)
+            playing_name, time_pos, duration = playback_info
+            cue_track_ended = False
+            if (
+                playing_name is not None
+                and state.last_playing_path is not None
+                and state.last_playing_path.name != playing_name
+            ):
+                # the daemon went on into the next track of a CUE sheet
+                cue_track_ended = follow_cue_track(state, playing_name)
+            if (
+                playing_name is not None
+                and state.last_playing_path is not None
+                and state.last_playing_path.name == playing_name
+            ):
+                remember_position(state, state.last_playing_path, time_pos, duration)
+                remember_duration(state, state.last_playing_path, duration)
+
+            # ── Autoplay next item in playlist when one finishes ───────
+            # (or when a `main.py ctl next` asks for it)
+            autoplay_due = (
+                state.playing_from_playlist
+                and state.active_pane == "playlist"
+                and state.was_playing
+                and (playing_name is None or cue_track_ended)
+            )
+            if next_requested and state.playlist and not state.playing_from_playlist:
+                # continue from the current file if it is in the playlist
+                try:
+                    state.playing_index = state.playlist.index(state.last_playing_path)
+                except (TypeError, ValueError):
+                    state.playing_index = -1
+                state.playing_from_playlist = True
+            if (autoplay_due or next_requested) and state.playlist:
+                next_index = next_playlist_index(state)
+                if next_index < 0:
+                    # reached end of playlist; stop autoplay
+                    state.playing_from_playlist = False
+                    state.playing_index = -1
+                    if next_requested:
+                        status_msg = "End of playlist"
+                else:
+                    state.playing_index = next_index
+                    state.playlist_selected = next_index
+                    clamp_playlist_selection(state, visible_height)
+                    next_path = state.playlist[next_index]
+                    state.last_playing_path = next_path
+                    save_state(state)
+                    with frame_stats.measure("daemon"):
+                        result = handle_action(
+                            ("select_audio", next_path, resume_position(state, next_path)),
+                            player,
+                        )
+                    if result:
+                        _, status_msg = result
+                    info_dirty = True
+                    wake.set()
+            next_requested = False
+            if daemon_ready:
+                with frame_stats.measure("daemon"):
+                    prefetched = prefetch_upcoming(state, player, prefetched)
+
+            with frame_stats.measure("render"):
+                show_info_bar(
+                    stdscr,
+                    now_playing_label(state, playing_name),
+                    (time_pos, duration),
+                    state.repeat_all,
+                    state.random_play,
+                )
+
+            if status_msg:
+                show_status(stdscr, status_msg)
+                status_msg = None
 
-        if init_error_msg:
-            show_error(stdscr, init_error_msg)
+            pending = player.poll_pending() if daemon_ready else None
+            if pending:
+                level, message = pending
+                if level == "error":
+                    show_error(stdscr, message)
+                    stdscr.nodelay(False)
+                    stdscr.getch()
+                    stdscr.nodelay(True)
+                else:
+                    show_status(stdscr, message)
 
-        # remember whether we were playing this frame (for next iteration)
-        state.was_playing = playing_name is not None
+            if error_msg:
+                show_error(stdscr, error_msg)
+                error_msg = None
+            if init_error_msg:
+                show_error(stdscr, init_error_msg)
 
-        stdscr.timeout(200)
-        key = stdscr.getch()
-        if key == -1:
-            continue
+            # remember whether we were playing this frame (for next iteration)
+            state.was_playing = playing_name is not None
 
-        if key == ord("Q"):  # Shift+Q: full quit, stop daemon and playback
-            save_state(state)
-            if daemon_ready:
-                player.quit_daemon()
-            break
-        if key in (ord("q"), 27):  # q or ESC: exit TUI only, daemon keeps playing
-            save_state(state)
-            break
-        else:
-            action = handle_key(key, entries, state, visible_height)
-            if action and action[0] == "select_audio":
-                state.last_playing_path = action[1]
-                save_state(state)
-            if action and action[0] in {"select_audio", "toggle_play_pause"} and not daemon_ready:
-                result = (
-                    "error",
-                    "Playback daemon is unavailable. Waiting for reconnection...",
+            if first_paint:
+                first_paint = False
+                record_startup_timing(
+                    "tui_first_paint", time.perf_counter() - _STARTED_AT
                 )
-            else:
-                result = handle_action(action, player)
+
+            # A frame spans the key that triggered it through its redraw.
+            frame_timings = frame_stats.end_frame()
+            if profiler is not None:
+                profiler.tick()
+                if frame_timings:
+                    profiler.record_slow(
+                        "frame", frame_timings["frame"], {"phases": frame_timings}
+                    )
+            if state.duplicates is not None:
+                show_overlay(
+                    stdscr, state.duplicates.lines(state.playlist, visible_height)
+                )
+            if show_frame_stats:
+                show_overlay(stdscr, frame_stats.overlay_lines())
+
+            # ── Sleep until the next input, daemon event or timer ───────
+            if not wake.is_set():
+                timeout = None
+                if deadlines:
+                    timeout = max(0.0, min(deadlines) - time.monotonic())
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            wake.clear()
+
+            # Handle one key per frame so the listing is refreshed between
+            # keys that change directory; re-arm the wakeup while keys remain.
+            key = stdscr.getch()
+            if key == -1:
+                continue
+            wake.set()
+
+            if key in (ord("Q"), ord("q"), 27):
+                # keep whatever background jobs produced so far
+                for job in jobs:
+                    job.cancel()
+                    job.apply(state)
+                record_watch_scans(state, folder_watcher)
+            if key == ord("Q"):  # Shift+Q: full quit, stop daemon and playback
+                save_state(state)
+                if daemon_ready:
+                    player.quit_daemon()
+                break
+            if key in (ord("q"), 27):  # q or ESC: exit TUI only, daemon keeps playing
+                save_state(state)
+                break
+            if key == curses.KEY_F12:  # frame timing overlay
+                show_frame_stats = not show_frame_stats
+                continue
+            result = None
+            with frame_stats.measure("keys"):
+                action = handle_key(key, entries, state, visible_height)
+                if action and action[0] in JOB_ACTIONS:
+                    result = start_job_action(action, state, jobs, notify_from_thread)
+                    action = None
+                if action and action[0] == "watch_folder":
+                    result = toggle_watched_folder(state, folder_watcher, action[1])
+                    action = None
+                if action and action[0] in SEEK_ACTIONS and daemon_ready:
+                    # merged with seeks still waiting to be sent
+                    pending_seek = merge_seek(pending_seek, action)
+                    action = None
+                if action and action[0] == "select_audio":
+                    state.last_playing_path = action[1]
+                    save_state(state)
+                    info_dirty = True
+                    action = (*action, resume_position(state, action[1]))
+                if action and action[0] in PLAYER_ACTIONS and not daemon_ready:
+                    result = (
+                        "error",
+                        "Playback daemon is unavailable. Waiting for reconnection...",
+                    )
+                elif action:
+                    result = handle_action(action, player)
             if result:
                 level, message = result
                 if level == "error":
-                    show_error(stdscr, message)
+                    error_msg = message
                 else:
                     status_msg = message
+    finally:
+        loop.remove_reader(sys.stdin.fileno())
+        if watcher.fileno() is not None:
+            loop.remove_reader(watcher.fileno())
+        watcher.close()
+        if folder_watcher.fileno() is not None:
+            loop.remove_reader(folder_watcher.fileno())
+        folder_watcher.close()
+        if events_sock is not None:
+            loop.remove_reader(events_sock.fileno())
+            events_sock.close()
+        if summary_job is not None:
+            summary_job.cancel()
+        summary_cache.save()
+        fingerprints.save()
 
 
 def parse_args() -> argparse.Namespace:
@@ -276,10 +681,52 @@ def parse_args() -> argparse.Namespace:
         default=str(Path.home()),
         help="Folder to open (defaults to home directory).",
     )
+    parser.add_argument(
+        "--startup-timing",
+        action="store_true",
+        help=(
+            "Append startup timings (first paint, daemon spawn to ready) "
+            "to startup_timing.jsonl in the config directory."
+        ),
+    )
+    parser.add_argument(
+        "--frame-stats",
+        metavar="PATH",
+        default=os.environ.get("TUPLET_FRAME_STATS"),
+        help=(
+            "Write per-phase frame timings as JSON to PATH on exit "
+            "(default: $TUPLET_FRAME_STATS). F12 toggles a live overlay."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Profile the TUI (same as TUPLET_PROFILE=1): cProfile for the first "
+            "TUPLET_PROFILE_SECONDS and a trace of frames slower than "
+            "TUPLET_PROFILE_SLOW_MS, written to the config directory's profiles/."
+        ),
+    )
+    parser.add_argument(
+        "--ui",
+        choices=("curses", "textual"),
+        default=os.environ.get("TUPLET_UI", "curses"),
+        help="Front-end to use (default: $TUPLET_UI or curses).",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.startup_timing:
+        # Exported so a daemon spawned by this TUI reports its timings too.
+        os.environ[STARTUP_TIMING_ENV] = "1"
     start_path = Path(args.path).expanduser().resolve()
-    curses.wrapper(file_browser, start_path)
+    frame_stats_path = Path(args.frame_stats).expanduser() if args.frame_stats else None
+    if args.ui == "textual":
+        # Imported here so the curses UI never pays for loading Textual.
+        from textual_app import run as run_textual
+
+        run_textual(start_path, frame_stats_path, args.profile)
+        sys.exit(0)
+    curses.wrapper(file_browser, start_path, frame_stats_path, args.profile)
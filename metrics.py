@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+# Upper bounds (ms) of the latency histogram buckets; one overflow bucket follows.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, total and max."""
+
+    __slots__ = ("bounds", "counts", "count", "total_ms", "max_ms")
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> dict:
+        buckets = {f"le_{bound:g}": n for bound, n in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class _Phase:
+    __slots__ = ("stats", "name", "started")
+
+    def __init__(self, stats: "FrameStats", name: str):
+        self.stats = stats
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.stats.add(self.name, (time.perf_counter() - self.started) * 1000.0)
+        return False
+
+
+class FrameStats:
+    """Per-phase timings of TUI frames.
+
+    Wrap each phase of a frame in ``with stats.measure("render"):`` and call
+    :meth:`end_frame` once the frame is done. Histograms cover the whole
+    session; the most recent ``history`` frames are kept for the overlay.
+    """
+
+    PHASES = ("listing", "render", "daemon", "keys")
+
+    def __init__(self, history: int = 120):
+        self._phases = {name: _Phase(self, name) for name in self.PHASES}
+        self.histograms = {name: Histogram() for name in self.PHASES + ("frame",)}
+        self.recent: deque[dict] = deque(maxlen=history)
+        self._current: dict[str, float] = {}
+        self.frames = 0
+
+    def measure(self, phase: str) -> _Phase:
+        return self._phases[phase]
+
+    def add(self, phase: str, ms: float) -> None:
+        self._current[phase] = self._current.get(phase, 0.0) + ms
+
+    def end_frame(self) -> dict[str, float] | None:
+        """Close the current frame; returns its phase timings (ms) if any."""
+        current = self._current
+        if not current:
+            return None
+        self._current = {}
+        total = sum(current.values())
+        current["frame"] = total
+        for phase, ms in current.items():
+            self.histograms[phase].observe(ms)
+        self.recent.append(current)
+        self.frames += 1
+        return current
+
+    def overlay_lines(self) -> list[str]:
+        lines = [f"frames: {self.frames}"]
+        last = self.recent[-1] if self.recent else {}
+        for phase in self.PHASES + ("frame",):
+            values = sorted(frame.get(phase, 0.0) for frame in self.recent)
+            p95 = values[int(0.95 * (len(values) - 1))] if values else 0.0
+            lines.append(
+                f"{phase:<8}{last.get(phase, 0.0):8.2f} ms  p95 {p95:7.2f} ms"
+            )
+        return lines
+
+    def as_dict(self) -> dict:
+        return {
+            "frames": self.frames,
+            "phases": {name: h.as_dict() for name, h in self.histograms.items()},
+        }
+
+    def dump(self, path: Path) -> None:
+        path.write_text(json.dumps(self.as_dict(), indent=2))
+
+
+class DaemonStats:
+    """Counters and handler latency histograms for the daemon's STATS command."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.commands: dict[str, Histogram] = {}
+        self.errors: dict[str, int] = {}
+        self.tracks_played = 0
+        # SEEK targets superseded by a newer one (or a new file) before
+        # they reached the player.
+        self.seeks_dropped = 0
+        self.property_reads = Histogram()
+        # readahead.ReadAheadCache, when the daemon has one
+        self.readahead = None
+        # backends.PlayerBackend, for its profile and buffer fill
+        self.player = None
+
+    def record_command(self, cmd: str, ms: float, ok: bool) -> None:
+        hist = self.commands.get(cmd)
+        if hist is None:
+            hist = self.commands[cmd] = Histogram()
+        hist.observe(ms)
+        if not ok:
+            self.errors[cmd] = self.errors.get(cmd, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "commands_total": sum(h.count for h in self.commands.values()),
+            "errors_total": sum(self.errors.values()),
+            "errors": dict(self.errors),
+            "tracks_played": self.tracks_played,
+            "seeks_dropped": self.seeks_dropped,
+            "property_reads": self.property_reads.as_dict(),
+            "player": self._player_dict(),
+            "readahead": self.readahead.as_dict() if self.readahead is not None else None,
+            "commands": {cmd: h.as_dict() for cmd, h in sorted(self.commands.items())},
+        }
+
+    def _player_dict(self) -> dict | None:
+        if self.player is None:
+            return None
+        return {
+            "backend": self.player.name,
+            "mpv_profile": self.player.profile,
+            "mpv_options": getattr(self.player, "options", None),
+            **self.player.buffer_state(),
+        }
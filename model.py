@@ -1,21 +1,35 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from pathlib import Path
 import errno
 import json
+import os
+import re
 import socket
 import stat
-import subprocess
 import sys
-import threading
 import time
 from typing import Literal
 
+from client import DAEMON_SOCKET_PATH, DaemonPlayer
+from cue import is_cue_sheet, is_cue_track, split_track, track_label, track_paths
+from playlist_store import PlaylistStore
+from timing import record_startup_timing
+
 
 CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
-DAEMON_SOCKET_PATH = CONFIG_DIR / "socket"
 DAEMON_LOG_PATH = CONFIG_DIR / "daemon.log"
+# Same limits as the daemon's own rotation (daemon.LOG_MAX_BYTES/LOG_BACKUPS).
+DAEMON_LOG_MAX_BYTES = 1 << 20
+DAEMON_LOG_BACKUPS = 3
+# Start-up failures are looked for in at most this much of the log's end.
+DAEMON_LOG_TAIL_BYTES = 64 * 1024
+DAEMON_SPAWN_MARKER = "--- daemon spawn"
+# Inherited pipe the daemon writes "READY" to once its socket is listening.
+DAEMON_READY_FD_ENV = "TUPLET_READY_FD"
+DAEMON_READY_TIMEOUT_SEC = 10.0
 last_daemon_error: str | None = None
 try:
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
@@ -35,91 +49,227 @@ def _extract_daemon_error(log_text: str) -> str | None:
             ("OSError:", "RuntimeError:", "ImportError:", "ModuleNotFoundError:")
         ):
             return stripped
+        # leveled log lines: "<date> <time> ERROR tuplet.daemon: message"
+        for level in (" CRITICAL ", " ERROR "):
+            if level in stripped:
+                return stripped.split(": ", 1)[-1]
         if stripped.startswith("Error ") or "Error:" in stripped:
             return stripped
     lines = [line.strip() for line in log_text.splitlines() if line.strip()]
     return lines[-1] if lines else None
 
 
+def _read_last_spawn_section() -> str:
+    """Return the log written since the last daemon spawn, from the file's end."""
+    with open(DAEMON_LOG_PATH, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - DAEMON_LOG_TAIL_BYTES))
+        tail = f.read()
+    marker = tail.rfind(DAEMON_SPAWN_MARKER.encode())
+    if marker >= 0:
+        tail = tail[marker:]
+        tail = tail[tail.find(b"\n") + 1 :]
+    return tail.decode("utf-8", errors="replace")
+
+
 def _read_daemon_log_error() -> str | None:
-    if not DAEMON_LOG_PATH.exists():
-        return None
     try:
-        return _extract_daemon_error(DAEMON_LOG_PATH.read_text(errors="replace"))
+        return _extract_daemon_error(_read_last_spawn_section())
     except Exception:
         return None
 
 
-def ensure_daemon_running():
+def _rotate_daemon_log() -> None:
+    # Mirrors logging's RotatingFileHandler naming: daemon.log.1 is newest.
+    try:
+        if DAEMON_LOG_PATH.stat().st_size < DAEMON_LOG_MAX_BYTES:
+            return
+    except OSError:
+        return
+    try:
+        for i in range(DAEMON_LOG_BACKUPS - 1, 0, -1):
+            older = DAEMON_LOG_PATH.with_name(f"{DAEMON_LOG_PATH.name}.{i}")
+            if older.exists():
+                os.replace(older, DAEMON_LOG_PATH.with_name(f"{DAEMON_LOG_PATH.name}.{i + 1}"))
+        os.replace(DAEMON_LOG_PATH, DAEMON_LOG_PATH.with_name(f"{DAEMON_LOG_PATH.name}.1"))
+    except OSError:
+        pass
+
+
+def _probe_daemon() -> bool:
     global last_daemon_error
-    for _ in range(2):
-        try:
-            if DAEMON_SOCKET_PATH.exists():
-                mode = DAEMON_SOCKET_PATH.lstat().st_mode
-                if not stat.S_ISSOCK(mode):
-                    DAEMON_SOCKET_PATH.unlink()
-        except Exception as e:
-            print("Error checking daemon socket", e)
-            pass
-        try:
-            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.settimeout(1.0)
-            s.connect(str(DAEMON_SOCKET_PATH))
-            s.sendall(b"GET_INFO\n")
-            s.recv(4096)
-            s.close()
-            last_daemon_error = None
-            return True
-        except (socket.error, OSError) as e:
-            if getattr(e, "errno", None) not in {
-                errno.ENOENT,
-                errno.ECONNREFUSED,
-                errno.ENOTSOCK,
-            }:
-                print("Error connecting to daemon", e)
-            time.sleep(1)
-            pass
-        except Exception as e:
-            print("Error connecting to daemon", e)
-            time.sleep(1)
-            pass
-
-        root = Path(__file__).resolve().parent
-        daemon_script = root / "daemon.py"
-        if not daemon_script.is_file():
-            last_daemon_error = "daemon.py not found"
-            return False
-        try:
-            log_file = open(DAEMON_LOG_PATH, "a", encoding="utf-8")
-            log_file.write("\n--- daemon spawn ---\n")
-            log_file.flush()
-            proc = subprocess.Popen(
-                [sys.executable, str(daemon_script)],
-                cwd=str(root),
-                start_new_session=True,
-                stdout=subprocess.DEVNULL,
-                stderr=log_file,
-            )
-            log_file.close()
-        except Exception as e:
-            print("Error starting daemon", e)
-            last_daemon_error = str(e)
-            time.sleep(1)
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(1.0)
+        s.connect(str(DAEMON_SOCKET_PATH))
+        # Once connected, something owns the socket. With systemd socket
+        # activation the daemon may still be starting, so allow for that.
+        s.settimeout(DAEMON_READY_TIMEOUT_SEC)
+        s.sendall(b"GET_INFO\n")
+        s.recv(4096)
+        s.close()
+        return True
+    except (socket.error, OSError) as e:
+        if getattr(e, "errno", None) not in {
+            errno.ENOENT,
+            errno.ECONNREFUSED,
+            errno.ENOTSOCK,
+        }:
+            last_daemon_error = f"Error connecting to daemon: {e}"
+    except Exception as e:
+        last_daemon_error = f"Error connecting to daemon: {e}"
+    return False
+
+
+def _wait_for_ready_pipe(ready_fd: int, deadline: float) -> bool | None:
+    """Wait for the daemon's READY line on *ready_fd*.
+
+    Returns True once the daemon reports its socket is listening, False if
+    it exited (the pipe reached EOF) first, or None on timeout.
+    """
+    import select
+
+    buf = b""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        readable, _, _ = select.select([ready_fd], [], [], remaining)
+        if not readable:
+            return None
+        chunk = os.read(ready_fd, 64)
+        if not chunk:
             return False
+        buf += chunk
+        if b"READY" in buf:
+            return True
 
-        time.sleep(0.5)
+
+def _wait_for_socket(proc, deadline: float) -> bool | None:
+    # Fallback where fds cannot be inherited: poll the socket until the
+    # deadline, bailing out as soon as the daemon process has exited.
+    while time.monotonic() < deadline:
         if proc.poll() is not None:
-            last_daemon_error = _read_daemon_log_error() or (
-                f"Daemon exited immediately (code {proc.returncode})"
-            )
-            continue
-        time.sleep(0.5)
+            return False
+        if _probe_daemon():
+            return True
+        time.sleep(0.05)
+    return None
+
+
+def daemon_error_message() -> str:
+    """Status-line text for the last failed :func:`ensure_daemon_running`."""
+    if last_daemon_error:
+        return f"Could not start playback daemon: {last_daemon_error}"
+    return "Could not start or connect to playback daemon."
+
+
+def ensure_daemon_running():
+    global last_daemon_error
+    try:
+        if DAEMON_SOCKET_PATH.exists():
+            mode = DAEMON_SOCKET_PATH.lstat().st_mode
+            if not stat.S_ISSOCK(mode):
+                DAEMON_SOCKET_PATH.unlink()
+    except OSError as e:
+        # runs in a worker thread under curses: report through the status
+        # line (daemon_error_message) rather than printing
+        last_daemon_error = f"Cannot check daemon socket: {e}"
+    if _probe_daemon():
+        last_daemon_error = None
+        return True
+
+    root = Path(__file__).resolve().parent
+    daemon_script = root / "daemon.py"
+    if not daemon_script.is_file():
+        last_daemon_error = "daemon.py not found"
+        return False
+    # Only needed on the spawn path; keep it off the common startup path.
+    import subprocess
+
+    use_pipe = os.name == "posix"
+    ready_r = ready_w = None
+    try:
+        spawned_at = time.perf_counter()
+        env = dict(os.environ)
+        pass_fds = ()
+        if use_pipe:
+            ready_r, ready_w = os.pipe()
+            env[DAEMON_READY_FD_ENV] = str(ready_w)
+            pass_fds = (ready_w,)
+        _rotate_daemon_log()
+        log_file = open(DAEMON_LOG_PATH, "a", encoding="utf-8")
+        log_file.write(
+            f"\n{DAEMON_SPAWN_MARKER} {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n"
+        )
+        log_file.flush()
+        proc = subprocess.Popen(
+            [sys.executable, str(daemon_script)],
+            cwd=str(root),
+            start_new_session=True,
+            stdout=subprocess.DEVNULL,
+            stderr=log_file,
+            env=env,
+            pass_fds=pass_fds,
+        )
+        log_file.close()
+    except Exception as e:
+        last_daemon_error = str(e)
+        for fd in (ready_r, ready_w):
+            if fd is not None:
+                os.close(fd)
+        return False
+
+    deadline = time.monotonic() + DAEMON_READY_TIMEOUT_SEC
+    if use_pipe:
+        # Close our copy of the write end so daemon exit shows up as EOF.
+        os.close(ready_w)
+        try:
+            ready = _wait_for_ready_pipe(ready_r, deadline)
+        finally:
+            os.close(ready_r)
+    else:
+        ready = _wait_for_socket(proc, deadline)
+
+    if ready:
+        last_daemon_error = None
+        record_startup_timing("daemon_spawn_ready", time.perf_counter() - spawned_at)
+        return True
+    if ready is None:
+        last_daemon_error = (
+            f"Daemon did not become ready within {DAEMON_READY_TIMEOUT_SEC:g} s"
+        )
+        return False
 
-    last_daemon_error = last_daemon_error or _read_daemon_log_error()
+    # The daemon exited before binding its socket. Another client may have
+    # won a spawn race, so check once more before reporting the failure.
+    if _probe_daemon():
+        last_daemon_error = None
+        return True
+    try:
+        proc.wait(timeout=1.0)
+    except Exception:
+        pass
+    last_daemon_error = _read_daemon_log_error() or (
+        f"Daemon exited immediately (code {proc.returncode})"
+    )
     return False
 
 
 STATE_FILE = CONFIG_DIR / "state.json"
+# Playback positions are remembered for files at least this long, for the
+# most recently played RESUME_MAX_ENTRIES of them, unless they were played
+# to within RESUME_END_MARGIN_SEC of the end.
+RESUME_MIN_DURATION_SEC = 600.0
+RESUME_MAX_ENTRIES = 200
+RESUME_END_MARGIN_SEC = 10.0
+# Durations of played files (for the duration sort), newest kept.
+DURATION_CACHE_MAX = 20000
+# Playlist changes from background jobs are written at most this often.
+SAVE_DELAY_SEC = 1.0
+# Browser sort modes, cycled with 'o' and remembered per directory.
+SORT_MODES = ("name", "natural", "mtime", "size", "duration")
+SORT_MODES_MAX = 1000
 
 
 @dataclass
@@ -128,7 +278,7 @@ class BrowserState:
     selected: int = 0
     scroll: int = 0
     show_hidden: bool = False
-    playlist: list = None
+    playlist: PlaylistStore = None
     playlist_selected: int = 0
     playlist_scroll: int = 0
     active_pane: Literal["browser", "playlist"] = "browser"
@@ -144,78 +294,163 @@ class BrowserState:
     playlist_scroll_offset: int = 0
     playlist_scroll_last_update: float = 0.0
     playlist_scroll_paused_until: float = 0.0
+    # path -> seconds, oldest first
+    positions: dict = field(default_factory=dict)
+    durations: dict = field(default_factory=dict)
+    # directory -> sort mode, for directories not sorted by name
+    sort_modes: dict = field(default_factory=dict)
+    # export destination that exists, until 'E' is pressed again to overwrite
+    confirm_export: object = None
+    # duplicates.DuplicateReport while the duplicates view is open
+    duplicates: object = None
+    # folders whose new media files are appended to the playlist
+    watched_folders: list = field(default_factory=list)
+    # watched folder -> wall-clock time up to which its new files were
+    # added, so files that arrive while the player is not running count too
+    watch_scanned: dict = field(default_factory=dict)
+    # marked playlist indices, and where the last mark was toggled
+    marked: set = field(default_factory=set)
+    mark_anchor: int = -1
+    # folder path -> summaries.FolderSummary, for the browsed folder and
+    # its subfolders (not saved; summaries.json caches the scans)
+    folder_summaries: dict = field(default_factory=dict)
 
     def __post_init__(self):
         if self.playlist is None:
-            self.playlist = []
+            self.playlist = PlaylistStore()
+        elif not isinstance(self.playlist, PlaylistStore):
+            self.playlist = PlaylistStore(self.playlist)
 
 
-class DaemonPlayer:
-    def __init__(self):
-        self._pending_result: tuple[Literal["status", "error"], str] | None = None
-        self._lock = threading.Lock()
+_DIGITS = re.compile(r"(\d+)")
 
-    def _send(self, msg: str) -> str:
-        try:
-            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.settimeout(3.0)
-            s.connect(str(DAEMON_SOCKET_PATH))
-            s.sendall(f"{msg}\n".encode("utf-8"))
-            buf = b""
-            while b"\n" not in buf and len(buf) < 8192:
-                chunk = s.recv(4096)
-                if not chunk:
-                    break
-                buf += chunk
-            s.close()
-            return buf.decode("utf-8", errors="replace").split("\n")[0].strip()
-        except Exception as e:
-            return f"ERROR {e}"
-
-    def stop(self):
-        self._send("STOP")
-
-    def quit_daemon(self):
-        self._send("QUIT")
-
-    def toggle_pause(self):
-        self._send("PAUSE")
-
-    def play(self, audio_path, start_seconds=0):
-        path = str(Path(audio_path).resolve())
-        reply = self._send(f"PLAY\t{path}\t{start_seconds}")
-        if reply.startswith("ERROR"):
-            raise RuntimeError(reply[6:].strip())
-        return None
 
-    def poll_pending(self):
-        with self._lock:
-            result = self._pending_result
-            self._pending_result = None
-        return result
-
-    def get_playback_info(self):
-        reply = self._send("GET_INFO")
-        if reply == "NONE" or reply.startswith("ERROR"):
-            return None, None, None
-        if reply.startswith("INFO\t"):
-            parts = reply.split("\t", 3)
-            if len(parts) >= 4:
-                name, time_pos_s, duration_s = parts[1], parts[2], parts[3]
+def natural_key(name: str):
+    """Sort key that orders "Track 2" before "Track 10"."""
+    # re.split with a group alternates text and digits, so the int/str
+    # positions line up between any two keys.
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS.split(name)]
+
+
+class DirectoryListing:
+    """One scan of a directory, with sort keys computed once and kept.
+
+    Entries come from ``os.scandir`` (no stat for names and types);
+    modification times and sizes are stat-ed on first use by the ``mtime``
+    or ``size`` sort and then reused, as is each mode's sorted order, so
+    switching sort modes never rescans or re-stats the directory.
+    """
+
+    def __init__(self, path: Path, show_hidden: bool):
+        self.path = path
+        self.show_hidden = show_hidden
+        self.names: list[str] = []
+        self.is_dir: list[bool] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if not show_hidden and entry.name.startswith("."):
+                    continue
                 try:
-                    time_pos = float(time_pos_s) if time_pos_s else None
-                    duration = float(duration_s) if duration_s else None
-                except ValueError:
-                    time_pos = duration = None
-                return name, time_pos, duration
-        return None, None, None
-
-
-def list_entries(state: BrowserState):
-    entries = list(state.current_path.iterdir())
-    if not state.show_hidden:
-        entries = [entry for entry in entries if not entry.name.startswith(".")]
-    entries.sort(key=lambda p: (not p.is_dir(), p.name.lower()))
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                self.names.append(entry.name)
+                self.is_dir.append(is_dir)
+        # directories come first in every order (see _order)
+        self.dir_count = sum(self.is_dir)
+        self._paths: list[Path] | None = None
+        self._lower: list[str] | None = None
+        self._stats: list[tuple[float, int]] | None = None
+        self._orders: dict[str, list[int]] = {}
+
+    @property
+    def paths(self) -> list[Path]:
+        if self._paths is None:
+            path = self.path
+            self._paths = [path / name for name in self.names]
+        return self._paths
+
+    def _lower_names(self) -> list[str]:
+        if self._lower is None:
+            self._lower = [name.lower() for name in self.names]
+        return self._lower
+
+    def _stat_keys(self) -> list[tuple[float, int]]:
+        if self._stats is None:
+            stats = []
+            prefix = os.path.join(str(self.path), "")
+            for name in self.names:
+                try:
+                    st = os.stat(prefix + name)
+                    stats.append((st.st_mtime, st.st_size))
+                except OSError:
+                    stats.append((0.0, 0))
+            self._stats = stats
+        return self._stats
+
+    def _keys(self, mode: str, durations: dict) -> list:
+        if mode == "natural":
+            return [natural_key(name) for name in self.names]
+        lower = self._lower_names()
+        if mode in ("mtime", "size"):
+            column = 0 if mode == "mtime" else 1
+            # newest / largest first
+            return [(-st[column], n) for st, n in zip(self._stat_keys(), lower)]
+        if mode == "duration":
+            # longest first; files without a known duration after those with one
+            prefix = os.path.join(str(self.path), "")
+            keys = []
+            for name, n in zip(self.names, lower):
+                duration = durations.get(prefix + name)
+                keys.append((duration is None, -(duration or 0.0), n))
+            return keys
+        return lower
+
+    def _order(self, mode: str, durations: dict) -> list[int]:
+        order = self._orders.get(mode)
+        if order is not None:
+            return order
+        keys = self._keys(mode, durations)
+        # Directories always come first.
+        dirs, files = [], []
+        for i, is_dir in enumerate(self.is_dir):
+            (dirs if is_dir else files).append(i)
+        dirs.sort(key=keys.__getitem__)
+        files.sort(key=keys.__getitem__)
+        order = dirs + files
+        if mode != "duration":
+            # durations change as files are played, so that order isn't kept
+            self._orders[mode] = order
+        return order
+
+    def entries(self, mode: str, durations: dict | None = None) -> list[Path]:
+        paths = self.paths
+        return [paths[i] for i in self._order(mode, durations or {})]
+
+
+# The listing of the directory being browsed, reused until it changes.
+_listing: DirectoryListing | None = None
+
+
+def list_entries(state: BrowserState, rescan: bool = True):
+    """Return ``(entries, has_parent)`` for the browsed directory.
+
+    With ``rescan=False`` the previous scan of the same directory is
+    re-sorted (e.g. after a sort mode change) instead of read again. A CUE
+    sheet is browsed like a directory of its tracks, in sheet order.
+    """
+    global _listing
+    if is_cue_sheet(state.current_path):
+        return [state.current_path.parent] + track_paths(state.current_path), True
+    listing = _listing
+    if (
+        rescan
+        or listing is None
+        or listing.path != state.current_path
+        or listing.show_hidden != state.show_hidden
+    ):
+        listing = _listing = DirectoryListing(state.current_path, state.show_hidden)
+    entries = listing.entries(sort_mode_for(state, state.current_path), state.durations)
     parent = state.current_path.parent
     has_parent = parent != state.current_path
     if has_parent:
@@ -223,18 +458,57 @@ def list_entries(state: BrowserState):
     return entries, has_parent
 
 
-def build_display(entries, has_parent):
+def listed_dirs(state: BrowserState, entries, has_parent) -> list[Path]:
+    """The subdirectories among *entries* (from :func:`list_entries`).
+
+    Taken from the listing's scan, so nothing is stat-ed; directories come
+    first in every sort order. A CUE sheet has none.
+    """
+    if is_cue_sheet(state.current_path):
+        return []
+    start = 1 if has_parent else 0
+    listing = _listing
+    if listing is not None and listing.path == state.current_path:
+        return entries[start : start + listing.dir_count]
+    return [entry for entry in entries[start:] if entry.is_dir()]
+
+
+def build_display(entries, has_parent, summaries=None, dir_count=None):
+    """Browser labels for *entries*; with *dir_count* (the number of
+    directories after ``..``, as from :func:`listed_dirs`) nothing is stat-ed.
+    """
     display = []
+    start = 1 if has_parent else 0
     for idx, entry in enumerate(entries):
         if has_parent and idx == 0:
             display.append("[DIR] ..")
+        elif dir_count is None:
+            display.append(entry_label(entry, summaries))
         else:
-            display.append(
-                f"[DIR] {entry.name}" if entry.is_dir() else f"     {entry.name}"
-            )
+            display.append(entry_label(entry, summaries, idx < start + dir_count))
     return display
 
 
+def entry_label(entry: Path, summaries=None, is_dir: bool | None = None) -> str:
+    if is_cue_track(entry):
+        return f"     {track_label(entry)}"
+    if is_dir is None:
+        is_dir = entry.is_dir()
+    if is_dir:
+        summary = summaries.get(str(entry)) if summaries else None
+        if summary is not None:
+            return f"[DIR] {entry.name}  ({summary.label()})"
+        return f"[DIR] {entry.name}"
+    if is_cue_sheet(entry):
+        return f"[CUE] {entry.name}"
+    return f"     {entry.name}"
+
+
+def is_browsable(path: Path) -> bool:
+    """Directories, and CUE sheets (browsed as their tracks)."""
+    return path.is_dir() or (is_cue_sheet(path) and path.is_file())
+
+
 def clamp_selection(selected, scroll, visible_height, entries):
     if not entries:
         return 0, 0
@@ -258,6 +532,185 @@ def clamp_playlist_selection(state, visible_height):
         state.playlist_scroll = max(0, state.playlist_selected - visible_height + 1)
 
 
+def remove_from_playlist(state: BrowserState, indices) -> int:
+    """Remove the playlist entries at *indices* in one pass; returns how many.
+
+    The selection, the playing index and the marks are remapped so they
+    keep pointing at the same tracks (a removed selection moves to the
+    next remaining track).
+    """
+    dropped = set(indices)
+    if not dropped:
+        return 0
+    state.playlist.delete_many(dropped)
+    drop = sorted(dropped)
+
+    def removed_before(index):
+        return bisect_left(drop, index)
+
+    if state.playing_from_playlist:
+        if state.playing_index in dropped:
+            state.playing_from_playlist = False
+            state.playing_index = -1
+        else:
+            state.playing_index -= removed_before(state.playing_index)
+    state.playlist_selected -= removed_before(state.playlist_selected)
+    state.marked = {i - removed_before(i) for i in state.marked if i not in dropped}
+    state.mark_anchor = -1
+    if not state.playlist:
+        state.playing_from_playlist = False
+        state.playing_index = -1
+        state.playlist_selected = 0
+    else:
+        state.playlist_selected = min(state.playlist_selected, len(state.playlist) - 1)
+    return len(dropped)
+
+
+def next_playlist_index(state: BrowserState) -> int:
+    """Index to play after ``state.playing_index``, or -1 at the end."""
+    n = len(state.playlist)
+    if state.random_play:
+        import random
+
+        if n > 1 and state.playing_index >= 0:
+            # any index but the current one, without building a list
+            next_index = random.randrange(n - 1)
+            return next_index + 1 if next_index >= state.playing_index else next_index
+        return random.randrange(n)
+    next_index = state.playing_index + 1
+    if next_index >= n:
+        return 0 if state.repeat_all else -1
+    return next_index
+
+
+def follow_cue_track(state: BrowserState, playing_name: str) -> bool:
+    """Follow the daemon from a CUE track into the next one of the sheet.
+
+    The daemon plays a sheet's backing file straight through and reports
+    the track it has reached by name. Returns True when the playlist should
+    move on instead: it is being played and its next entry is not that
+    track.
+    """
+    current = state.last_playing_path
+    split = split_track(current) if current is not None else None
+    if split is None:
+        return False
+    reached = current.with_name(playing_name)
+    reached_split = split_track(reached)
+    if reached_split is None or reached_split[0] != split[0]:
+        return False
+    state.last_playing_path = reached
+    if not state.playing_from_playlist:
+        return False
+    next_index = state.playing_index + 1
+    if next_index < len(state.playlist) and state.playlist.path_str(next_index) == str(reached):
+        if state.playlist_selected == state.playing_index:
+            state.playlist_selected = next_index
+        state.playing_index = next_index
+        return False
+    return True
+
+
+def now_playing_label(state: BrowserState, playing_name: str | None) -> str | None:
+    """What the info bar shows for *playing_name*: CUE tracks by title."""
+    path = state.last_playing_path
+    if playing_name and path is not None and path.name == playing_name and is_cue_track(path):
+        return track_label(path)
+    return playing_name
+
+
+def reorder_playlist(state: BrowserState, order) -> None:
+    """Put the playlist in *order* (a permutation of its indices).
+
+    The selection, the playing index and the marks follow their tracks.
+    """
+    state.playlist.reorder(order)
+    position = [0] * len(order)
+    for new, old in enumerate(order):
+        position[old] = new
+    if state.playing_from_playlist and 0 <= state.playing_index < len(position):
+        state.playing_index = position[state.playing_index]
+    if 0 <= state.playlist_selected < len(position):
+        state.playlist_selected = position[state.playlist_selected]
+    state.marked = {position[index] for index in state.marked}
+    if 0 <= state.mark_anchor < len(position):
+        state.mark_anchor = position[state.mark_anchor]
+
+
+def move_in_playlist(state: BrowserState, indices, step: int) -> bool:
+    """Move the entries at *indices* one place up (*step* -1) or down (1).
+
+    Runs of moved entries travel as a block; entries already at the edge
+    stay. Returns False if nothing could move.
+    """
+    moving = set(indices)
+    order = list(range(len(state.playlist)))
+    moved = False
+    if step < 0:
+        positions = range(1, len(order))
+    else:
+        positions = range(len(order) - 2, -1, -1)
+    for i in positions:
+        j = i + step
+        if order[i] in moving and order[j] not in moving:
+            order[i], order[j] = order[j], order[i]
+            moved = True
+    if moved:
+        reorder_playlist(state, order)
+    return moved
+
+
+def move_to_top(state: BrowserState, indices) -> None:
+    moving = set(indices)
+    order = sorted(moving)
+    order.extend(i for i in range(len(state.playlist)) if i not in moving)
+    reorder_playlist(state, order)
+
+
+def remember_position(state: BrowserState, path: Path, time_pos, duration) -> None:
+    """Record where playback of *path* is, for resuming it later."""
+    if time_pos is None or not duration or duration < RESUME_MIN_DURATION_SEC:
+        return
+    key = str(path)
+    state.positions.pop(key, None)
+    if time_pos < duration - RESUME_END_MARGIN_SEC:
+        state.positions[key] = round(float(time_pos), 1)
+        while len(state.positions) > RESUME_MAX_ENTRIES:
+            del state.positions[next(iter(state.positions))]
+
+
+def resume_position(state: BrowserState, path: Path) -> float:
+    return state.positions.get(str(path), 0.0)
+
+
+def remember_duration(state: BrowserState, path: Path, duration) -> None:
+    if not duration:
+        return
+    key = str(path)
+    if state.durations.get(key) == duration:
+        return
+    state.durations.pop(key, None)
+    state.durations[key] = round(float(duration), 1)
+    while len(state.durations) > DURATION_CACHE_MAX:
+        del state.durations[next(iter(state.durations))]
+
+
+def sort_mode_for(state: BrowserState, directory: Path) -> str:
+    return state.sort_modes.get(str(directory), SORT_MODES[0])
+
+
+def cycle_sort_mode(state: BrowserState, directory: Path) -> str:
+    mode = sort_mode_for(state, directory)
+    mode = SORT_MODES[(SORT_MODES.index(mode) + 1) % len(SORT_MODES)]
+    key = str(directory)
+    state.sort_modes.pop(key, None)
+    if mode != SORT_MODES[0]:
+        state.sort_modes[key] = mode
+        while len(state.sort_modes) > SORT_MODES_MAX:
+            del state.sort_modes[next(iter(state.sort_modes))]
+    return mode
+
+
 def load_persisted_state_into(state: BrowserState) -> None:
     """Load previously saved state (playlist, current directory, last playing file) into *state*."""
     if not STATE_FILE.exists():
@@ -272,7 +725,7 @@ def load_persisted_state_into(state: BrowserState) -> None:
     saved_dir = data.get("current_directory")
     if isinstance(saved_dir, str):
         dir_path = Path(saved_dir).expanduser().resolve()
-        if dir_path.is_dir():
+        if is_browsable(dir_path):
             state.current_path = dir_path
 
     # Restore browser position (clamped when entries are known in main loop)
@@ -287,20 +740,30 @@ def load_persisted_state_into(state: BrowserState) -> None:
     saved_playing = data.get("current_playing_file")
     if isinstance(saved_playing, str):
         playing_path = Path(saved_playing).expanduser()
-        if playing_path.exists():
+        if playing_path.exists() or is_cue_track(playing_path):
             state.last_playing_path = playing_path
 
-    playlist_paths = data.get("playlist", [])
-    if not isinstance(playlist_paths, list):
-        return
-
-    playlist = []
-    for item in playlist_paths:
-        if not isinstance(item, str):
-            continue
-        path = Path(item).expanduser()
-        if path.exists():
-            playlist.append(path)
+    playlist = None
+    stored = data.get("playlist_store")
+    if isinstance(stored, dict):
+        try:
+            playlist = PlaylistStore.from_data(stored)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            playlist = None
+    if playlist is None:
+        # state.json written before the compact playlist format
+        playlist_paths = data.get("playlist", [])
+        if not isinstance(playlist_paths, list):
+            return
+        # a one-off migration, so every file is checked as before
+        playlist = PlaylistStore()
+        for item in playlist_paths:
+            if not isinstance(item, str):
+                continue
+            path = Path(item).expanduser()
+            track = split_track(path)
+            if os.path.exists(track[0] if track else path):
+                playlist.append(path)
 
     if playlist:
         state.playlist = playlist
@@ -310,6 +773,39 @@ def load_persisted_state_into(state: BrowserState) -> None:
         state.playlist_scroll = min(
             data.get("playlist_scroll", 0), max(0, len(playlist) - 1)
         )
+    durations = data.get("durations")
+    if isinstance(durations, dict):
+        state.durations = {
+            key: float(value)
+            for key, value in list(durations.items())[-DURATION_CACHE_MAX:]
+            if isinstance(key, str) and isinstance(value, (int, float))
+        }
+    sort_modes = data.get("sort_modes")
+    if isinstance(sort_modes, dict):
+        state.sort_modes = {
+            key: value
+            for key, value in list(sort_modes.items())[-SORT_MODES_MAX:]
+            if isinstance(key, str) and value in SORT_MODES
+        }
+    positions = data.get("positions")
+    if isinstance(positions, dict):
+        state.positions = {
+            key: float(value)
+            for key, value in list(positions.items())[-RESUME_MAX_ENTRIES:]
+            if isinstance(key, str) and isinstance(value, (int, float))
+        }
+    watched = data.get("watched_folders")
+    if isinstance(watched, list):
+        state.watched_folders = [
+            item for item in watched if isinstance(item, str) and os.path.isdir(item)
+        ]
+    scanned = data.get("watch_scanned")
+    if isinstance(scanned, dict):
+        state.watch_scanned = {
+            key: float(value)
+            for key, value in scanned.items()
+            if key in state.watched_folders and isinstance(value, (int, float))
+        }
     repeat_all = data.get("repeat_all")
     if isinstance(repeat_all, bool):
         state.repeat_all = repeat_all
@@ -323,7 +819,6 @@ def save_state(state: BrowserState) -> None:
     try:
         STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
         data = {
-            "playlist": [str(p) for p in state.playlist],
             "current_directory": str(state.current_path.resolve()),
             "current_playing_file": (
                 str(state.last_playing_path) if state.last_playing_path else None
@@ -334,8 +829,16 @@ def save_state(state: BrowserState) -> None:
             "playlist_scroll": state.playlist_scroll,
             "repeat_all": state.repeat_all,
             "random_play": state.random_play,
+            "positions": state.positions,
+            "durations": state.durations,
+            "sort_modes": state.sort_modes,
+            "watched_folders": state.watched_folders,
+            "watch_scanned": state.watch_scanned,
         }
-        STATE_FILE.write_text(json.dumps(data))
+        text = json.dumps(data)
+        # splice in the (possibly cached) playlist instead of re-encoding it
+        text = f'{text[:-1]}, "playlist_store": {state.playlist.to_json()}}}'
+        STATE_FILE.write_text(text)
     except Exception:
         # Never let persistence errors crash the TUI
         pass
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import json
+import os
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from pathlib import Path
+
+# Removed names stay in the pool until they make up half of it.
+_COMPACT_MIN_BYTES = 1 << 20
+
+
+def _encode(name: str) -> bytes:
+    return name.encode("utf-8", "surrogateescape")
+
+
+class PlaylistStore:
+    """Compact list of playlist paths.
+
+    Parent directories are interned in a small table and file names are
+    packed into one ``bytearray`` string pool; each entry is just three
+    array slots (directory index, name offset, name length). A
+    million-entry playlist therefore costs tens of MB instead of a ``Path``
+    object and a full path string per track. ``Path`` objects are created
+    on access, i.e. only for the rows that are rendered or played; use
+    :meth:`name` and :meth:`path_str` where a string is enough.
+
+    Supports the ``list`` operations the UI uses (``len``, indexing,
+    iteration, ``append``, ``extend``, ``insert``, ``pop``, ``del``, ``in``).
+    """
+
+    __slots__ = (
+        "_dirs",
+        "_dir_ids",
+        "_dir_index",
+        "_name_off",
+        "_name_len",
+        "_pool",
+        "_garbage",
+        "_by_offset",
+        "_json",
+        "version",
+    )
+
+    def __init__(self, paths=()):
+        self._dirs: list[str] = []
+        self._dir_ids: dict[str, int] = {}
+        self._dir_index = array("I")
+        self._name_off = array("Q")
+        self._name_len = array("I")
+        self._pool = bytearray()
+        self._garbage = 0
+        # Rows sorted by name offset, for mapping a pool offset back to its
+        # row; built on the first lookup, extended by appends and rebuilt
+        # after other changes.
+        self._by_offset: array | None = None
+        # (version, text) of the last to_json()
+        self._json: tuple[int, str] | None = None
+        # Bumped on every mutation so callers can cache derived data.
+        self.version = 0
+        if paths:
+            self.extend(paths)
+
+    # ── Internal helpers ─────────────────────────────────────────────
+    def _intern_dir(self, directory: str) -> int:
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        return dir_id
+
+    def _add_name(self, name: str) -> tuple[int, int]:
+        data = _encode(name)
+        offset = len(self._pool)
+        self._pool += data
+        return offset, len(data)
+
+    def _entry(self, path) -> tuple[int, int, int]:
+        directory, name = os.path.split(os.fspath(path))
+        offset, length = self._add_name(name)
+        return self._intern_dir(directory), offset, length
+
+    def _index(self, index: int) -> int:
+        n = len(self._dir_index)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("playlist index out of range")
+        return index
+
+    def _name_at(self, index: int) -> str:
+        offset = self._name_off[index]
+        data = self._pool[offset : offset + self._name_len[index]]
+        return data.decode("utf-8", "surrogateescape")
+
+    def _forget(self, indices) -> None:
+        for i in indices:
+            self._garbage += self._name_len[i]
+        self.version += 1
+
+    def _rows_by_offset(self) -> array:
+        if self._by_offset is None:
+            offsets = self._name_off
+            self._by_offset = array("I", sorted(range(len(offsets)), key=offsets.__getitem__))
+        return self._by_offset
+
+    def _row_at_offset(self, offset: int) -> int:
+        """Row whose name starts at pool *offset*, or -1 (e.g. a removed name)."""
+        rows, offsets = self._rows_by_offset(), self._name_off
+        k = bisect_left(rows, offset, key=offsets.__getitem__)
+        if k < len(rows) and offsets[rows[k]] == offset:
+            return rows[k]
+        return -1
+
+    def _maybe_compact(self) -> None:
+        if self._garbage < _COMPACT_MIN_BYTES or self._garbage * 2 < len(self._pool):
+            return
+        pool, offsets, lengths = bytearray(), array("Q"), array("I")
+        old = self._pool
+        for offset, length in zip(self._name_off, self._name_len):
+            offsets.append(len(pool))
+            lengths.append(length)
+            pool += old[offset : offset + length]
+        self._pool, self._name_off, self._name_len = pool, offsets, lengths
+        self._garbage = 0
+        self._by_offset = None
+
+    def _retain(self, keep) -> None:
+        if self._by_offset is not None:
+            # renumber the kept rows instead of sorting them again
+            new_row = array("q", [-1]) * len(self._dir_index)
+            for new, old in enumerate(keep):
+                new_row[old] = new
+            self._by_offset = array(
+                "I", (new_row[old] for old in self._by_offset if new_row[old] >= 0)
+            )
+        self._dir_index = array("I", (self._dir_index[i] for i in keep))
+        self._name_off = array("Q", (self._name_off[i] for i in keep))
+        self._name_len = array("I", (self._name_len[i] for i in keep))
+        self._maybe_compact()
+
+    # ── Read access ──────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._dir_index)
+
+    def __bool__(self) -> bool:
+        return bool(self._dir_index)
+
+    def name(self, index: int) -> str:
+        return self._name_at(self._index(index))
+
+    def path_str(self, index: int) -> str:
+        index = self._index(index)
+        return os.path.join(self._dirs[self._dir_index[index]], self._name_at(index))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Path(self.path_str(i)) for i in range(*index.indices(len(self)))]
+        return Path(self.path_str(index))
+
+    def iter_str(self):
+        """Iterate over entries as path strings, without creating ``Path`` objects."""
+        dirs, pool = self._dirs, self._pool
+        for dir_id, offset, length in zip(self._dir_index, self._name_off, self._name_len):
+            name = pool[offset : offset + length].decode("utf-8", "surrogateescape")
+            yield os.path.join(dirs[dir_id], name)
+
+    def __iter__(self):
+        for path in self.iter_str():
+            yield Path(path)
+
+    def find_name(self, name: str):
+        """Yield the indices of entries with file name *name*, in order."""
+        if not name:
+            return
+        needle = _encode(name)
+        pool, lengths = self._pool, self._name_len
+        hits = []
+        start = 0
+        # Search the pool in C and only check hits that start an entry.
+        while True:
+            offset = pool.find(needle, start)
+            if offset < 0:
+                break
+            start = offset + 1
+            # removed names stay in the pool, so an offset can be stale
+            i = self._row_at_offset(offset)
+            if i >= 0 and lengths[i] == len(needle):
+                hits.append(i)
+        # pool order is append order, not playlist order, after inserts
+        yield from sorted(hits)
+
+    def index(self, path) -> int:
+        directory, name = os.path.split(os.fspath(path))
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is not None:
+            for i in self.find_name(name):
+                if self._dir_index[i] == dir_id:
+                    return i
+        raise ValueError(f"{path} is not in the playlist")
+
+    def __contains__(self, path) -> bool:
+        try:
+            self.index(path)
+        except ValueError:
+            return False
+        return True
+
+    def copy(self) -> "PlaylistStore":
+        clone = PlaylistStore()
+        clone._dirs = list(self._dirs)
+        clone._dir_ids = dict(self._dir_ids)
+        clone._dir_index = array("I", self._dir_index)
+        clone._name_off = array("Q", self._name_off)
+        clone._name_len = array("I", self._name_len)
+        clone._pool = bytearray(self._pool)
+        clone._garbage = self._garbage
+        return clone
+
+    # ── Mutation ─────────────────────────────────────────────────────
+    def append(self, path) -> None:
+        dir_id, offset, length = self._entry(path)
+        self._dir_index.append(dir_id)
+        self._name_off.append(offset)
+        self._name_len.append(length)
+        if self._by_offset is not None:
+            # new names go at the end of the pool, after every other offset
+            self._by_offset.append(len(self._dir_index) - 1)
+        self.version += 1
+
+    def extend(self, paths) -> None:
+        entry = self._entry
+        dir_index, offsets, lengths = self._dir_index, self._name_off, self._name_len
+        first = len(dir_index)
+        for path in paths:
+            dir_id, offset, length = entry(path)
+            dir_index.append(dir_id)
+            offsets.append(offset)
+            lengths.append(length)
+        if self._by_offset is not None:
+            self._by_offset.extend(range(first, len(dir_index)))
+        self.version += 1
+
+    def insert(self, index: int, path) -> None:
+        dir_id, offset, length = self._entry(path)
+        self._dir_index.insert(index, dir_id)
+        self._name_off.insert(index, offset)
+        self._name_len.insert(index, length)
+        self._by_offset = None
+        self.version += 1
+
+    def __setitem__(self, index: int, path) -> None:
+        index = self._index(index)
+        self._forget((index,))
+        self._by_offset = None
+        dir_id, offset, length = self._entry(path)
+        self._dir_index[index] = dir_id
+        self._name_off[index] = offset
+        self._name_len[index] = length
+
+    def pop(self, index: int = -1) -> Path:
+        index = self._index(index)
+        path = self[index]
+        del self[index]
+        return path
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            self._forget(range(*index.indices(len(self))))
+        else:
+            index = self._index(index)
+            self._forget((index,))
+        self._by_offset = None
+        del self._dir_index[index]
+        del self._name_off[index]
+        del self._name_len[index]
+        self._maybe_compact()
+
+    def delete_many(self, indices) -> int:
+        """Delete the entries at *indices* (any order) in one pass; returns how many."""
+        drop = {self._index(i) for i in indices}
+        if drop:
+            self._forget(drop)
+            self._retain([i for i in range(len(self._dir_index)) if i not in drop])
+        return len(drop)
+
+    def reorder(self, order) -> None:
+        """Rearrange entries so entry ``order[i]`` comes i-th, in one pass.
+
+        *order* must be a permutation of the indices.
+        """
+        if len(order) != len(self._dir_index):
+            raise ValueError("order must list every playlist index once")
+        self._retain(order)
+        self.version += 1
+
+    def clear(self) -> None:
+        self._dirs.clear()
+        self._dir_ids.clear()
+        self._dir_index = array("I")
+        self._name_off = array("Q")
+        self._name_len = array("I")
+        self._pool = bytearray()
+        self._garbage = 0
+        self._by_offset = None
+        self.version += 1
+
+    # ── Persistence ──────────────────────────────────────────────────
+    def to_json(self) -> str:
+        """Serialize as ``{"dirs": [...], "dir_index": [...], "names": "a\\u0000b"}``.
+
+        The text is reused until the store changes (most state saves are
+        for cursor moves).
+        """
+        if self._json is not None and self._json[0] == self.version:
+            return self._json[1]
+        # Directories no longer referenced (after removals) are dropped.
+        used = sorted(set(self._dir_index))
+        remap = array("I", bytes(4 * len(self._dirs)))
+        for new, old in enumerate(used):
+            remap[old] = new
+        pool = self._pool
+        # file names cannot contain NUL, so it separates them in one string
+        names = b"\0".join(
+            pool[offset : offset + length]
+            for offset, length in zip(self._name_off, self._name_len)
+        )
+        text = json.dumps(
+            {
+                "dirs": [self._dirs[i] for i in used],
+                "dir_index": [remap[i] for i in self._dir_index],
+                "names": names.decode("utf-8", "surrogateescape"),
+            },
+            separators=(",", ":"),
+        )
+        self._json = (self.version, text)
+        return text
+
+    @classmethod
+    def from_data(cls, data) -> "PlaylistStore":
+        """Rebuild a store from parsed :meth:`to_json` output.
+
+        Entries whose directory no longer exists are dropped. Raises
+        ``ValueError`` (or ``KeyError``/``TypeError``) on malformed data.
+        """
+        dirs, dir_index, names = data["dirs"], data["dir_index"], data["names"]
+        if not (isinstance(dirs, list) and isinstance(names, str)):
+            raise ValueError("malformed playlist store")
+        if not all(isinstance(d, str) for d in dirs):
+            raise ValueError("malformed playlist store")
+        index = array("I", dir_index)
+        pool = bytearray(names.encode("utf-8", "surrogateescape"))
+        lengths = array("I", map(len, pool.split(b"\0"))) if index else array("I")
+        if len(lengths) != len(index) or (index and max(index) >= len(dirs)):
+            raise ValueError("malformed playlist store")
+        # each name is followed by one separator byte
+        offsets = array("Q", accumulate((n + 1 for n in lengths[:-1]), initial=0))
+        if not index:
+            offsets = array("Q")
+
+        store = cls()
+        store._dirs = list(dirs)
+        store._dir_ids = {d: i for i, d in enumerate(dirs)}
+        store._pool = pool
+        store._dir_index, store._name_off, store._name_len = index, offsets, lengths
+        store._garbage = max(0, len(index) - 1)
+        store.prune_missing_dirs()
+        return store
+
+    def prune_missing_dirs(self) -> int:
+        """Drop entries whose directory no longer exists; returns how many.
+
+        Directories are checked once each rather than stat-ing every file.
+        """
+        alive = [os.path.isdir(d) for d in self._dirs]
+        if all(alive):
+            return 0
+        keep = [i for i, dir_id in enumerate(self._dir_index) if alive[dir_id]]
+        removed = len(self._dir_index) - len(keep)
+        self._forget(i for i, dir_id in enumerate(self._dir_index) if not alive[dir_id])
+        self._retain(keep)
+        return removed
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from cue import is_cue_track, resolve_track
+from jobs import BackgroundJob
+
+PLAYLIST_EXTENSIONS = {".m3u", ".m3u8", ".pls"}
+# The first batch is small so imported entries show up immediately.
+FIRST_BATCH_SIZE = 50
+BATCH_SIZE = 1000
+
+
+def _open_text(path: Path, mode: str = "r"):
+    # surrogateescape keeps undecodable bytes so paths still round-trip to
+    # the filesystem (legacy .m3u files are often not UTF-8).
+    if mode == "r":
+        return open(path, "r", encoding="utf-8-sig", errors="surrogateescape")
+    return open(path, mode, encoding="utf-8", errors="surrogateescape", newline="\n")
+
+
+def _resolve_entry(location: str, base_dir: Path) -> Path | None:
+    location = location.strip()
+    if not location:
+        return None
+    if "://" in location:
+        parsed = urlparse(location)
+        if parsed.scheme != "file":
+            # Streams and other remote URLs are not supported in the playlist.
+            return None
+        location = unquote(parsed.path)
+    # playlists written on Windows separate folders with backslashes
+    location = location.replace("\\", "/")
+    path = Path(location).expanduser()
+    if not path.is_absolute():
+        path = base_dir / path
+    return Path(os.path.normpath(path))
+
+
+def iter_m3u(path: Path):
+    """Yield track paths from an M3U / extended M3U file, one line at a time."""
+    base_dir = path.parent
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = _resolve_entry(line, base_dir)
+            if entry is not None:
+                yield entry
+
+
+def iter_pls(path: Path):
+    """Yield track paths from a PLS file in the order the entries appear."""
+    base_dir = path.parent
+    with _open_text(path) as f:
+        for line in f:
+            key, sep, value = line.strip().partition("=")
+            if sep and key.lower().startswith("file") and key[4:].isdigit():
+                entry = _resolve_entry(value, base_dir)
+                if entry is not None:
+                    yield entry
+
+
+def iter_playlist(path: Path):
+    if path.suffix.lower() == ".pls":
+        return iter_pls(path)
+    return iter_m3u(path)
+
+
+def write_playlist(paths, dest: Path, should_stop=None) -> int:
+    """Stream *paths* to *dest* as extended M3U or PLS (by suffix).
+
+    Entries are written one at a time to a temporary file that replaces
+    *dest* on success, so the playlist text is never built in memory.
+    Returns the number of entries written.
+    """
+    tmp = dest.with_name(dest.name + ".tmp")
+    is_pls = dest.suffix.lower() == ".pls"
+    count = 0
+    try:
+        with _open_text(tmp, "w") as f:
+            f.write("[playlist]\n" if is_pls else "#EXTM3U\n")
+            for path in paths:
+                if should_stop is not None and should_stop():
+                    raise InterruptedError("export cancelled")
+                count += 1
+                if is_pls:
+                    f.write(f"File{count}={path}\nTitle{count}={Path(path).stem}\n")
+                else:
+                    f.write(f"#EXTINF:-1,{Path(path).stem}\n{path}\n")
+            if is_pls:
+                f.write(f"NumberOfEntries={count}\nVersion=2\n")
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return count
+
+
+class PlaylistImportJob(BackgroundJob):
+    """Parse a playlist file and post the entries that exist, in batches."""
+
+    def __init__(self, source: Path, notify=None):
+        super().__init__(f"Importing {source.name}", notify)
+        self.source = source
+        self.missing = 0
+
+    def run(self) -> None:
+        pending: list[Path] = []
+        limit = FIRST_BATCH_SIZE
+        for entry in iter_playlist(self.source):
+            if self.cancelled:
+                return
+            pending.append(entry)
+            if len(pending) >= limit:
+                self._flush(pending)
+                pending = []
+                limit = BATCH_SIZE
+        self._flush(pending)
+
+    def _flush(self, pending: list[Path]) -> None:
+        found = [p for p in pending if p.is_file()]
+        self.missing += len(pending) - len(found)
+        self.processed += len(found)
+        self.post(found)
+
+    def progress_text(self) -> str:
+        return f"{self.label}: {self.processed} tracks"
+
+    def summary(self) -> str:
+        if self.error or self.cancelled:
+            return super().summary()
+        text = f"Imported {self.processed} tracks from {self.source.name}"
+        if self.missing:
+            text += f" ({self.missing} missing)"
+        return text
+
+
+class PlaylistExportJob(BackgroundJob):
+    """Write a playlist snapshot to *dest*.
+
+    Other players cannot address a track inside a CUE sheet, so a run of
+    tracks from one sheet is exported as its audio file, once; tracks whose
+    sheet cannot be read are skipped.
+    """
+
+    def __init__(self, paths, dest: Path, notify=None):
+        super().__init__(f"Exporting {dest.name}", notify)
+        self.paths = paths
+        self.dest = dest
+        self.cue_tracks = 0
+        self.skipped = 0
+
+    def run(self) -> None:
+        def counted():
+            last_file = None
+            for path in self.paths:
+                if is_cue_track(path):
+                    resolved = resolve_track(path, revalidate=False)
+                    if resolved is None:
+                        self.skipped += 1
+                        continue
+                    self.cue_tracks += 1
+                    if resolved[1].file == last_file:
+                        continue
+                    path = last_file = resolved[1].file
+                else:
+                    last_file = None
+                self.processed += 1
+                yield path
+
+        try:
+            write_playlist(counted(), self.dest, lambda: self.cancelled)
+        except InterruptedError:
+            pass
+
+    def summary(self) -> str:
+        if self.error or self.cancelled:
+            return super().summary()
+        text = f"Exported {self.processed} tracks to {self.dest}"
+        notes = []
+        if self.cue_tracks:
+            notes.append(f"{self.cue_tracks} CUE tracks as their audio files")
+        if self.skipped:
+            notes.append(f"{self.skipped} unreadable CUE tracks skipped")
+        if notes:
+            text += f" ({', '.join(notes)})"
+        return text
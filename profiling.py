@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
+PROFILE_DIR = CONFIG_DIR / "profiles"
+PROFILE_ENV = "TUPLET_PROFILE"
+PROFILE_SECONDS_ENV = "TUPLET_PROFILE_SECONDS"
+SNAPSHOT_INTERVAL_ENV = "TUPLET_PROFILE_SNAPSHOT_SEC"
+SLOW_MS_ENV = "TUPLET_PROFILE_SLOW_MS"
+# Files kept per (process, kind) before the oldest are deleted.
+KEEP_FILES = 10
+# Slow-event records written per session, so a pathological run stays bounded.
+MAX_SLOW_RECORDS = 1000
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _rotate(prefix: str) -> None:
+    files = sorted(PROFILE_DIR.glob(f"{prefix}-*"))
+    for old in files[:-KEEP_FILES]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+class Profiler:
+    """Opt-in profiling for one process (``"tui"`` or ``"daemon"``).
+
+    - cProfile runs for the first ``seconds`` of the session on the thread
+      that called :meth:`start`; :meth:`tick` closes the window and must be
+      called from that thread.
+    - tracemalloc snapshots are dumped every ``snapshot_interval`` seconds
+      (0 disables), each with a text summary of the top allocation growth.
+    - Events slower than ``slow_ms`` passed to :meth:`record_slow` are
+      appended to a JSONL trace.
+
+    Output goes to ``CONFIG_DIR/profiles`` and is rotated per kind. Use
+    :func:`create_profiler`, which returns ``None`` when profiling is off so
+    call sites cost a single ``is None`` check.
+    """
+
+    def __init__(self, name: str, seconds: float, snapshot_interval: float, slow_ms: float):
+        self.name = name
+        self.seconds = seconds
+        self.snapshot_interval = snapshot_interval
+        self.slow_ms = slow_ms
+        self._stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._profile = None
+        self._profile_until = 0.0
+        self._slow_file = None
+        self._slow_records = 0
+        self._stop = threading.Event()
+        self._snapshot_thread: threading.Thread | None = None
+        self._first_snapshot = None
+
+    def _path(self, kind: str, ext: str) -> Path:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        return PROFILE_DIR / f"{self.name}-{kind}-{self._stamp}.{ext}"
+
+    def start(self) -> None:
+        import cProfile
+
+        if self.seconds > 0:
+            self._profile = cProfile.Profile()
+            self._profile_until = time.monotonic() + self.seconds
+            self._profile.enable()
+        if self.snapshot_interval > 0:
+            import tracemalloc
+
+            tracemalloc.start(25)
+            self._snapshot_thread = threading.Thread(
+                target=self._snapshot_loop, name="tracemalloc-snapshots", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    @property
+    def profiling(self) -> bool:
+        """True while the cProfile window is open."""
+        return self._profile is not None
+
+    def tick(self) -> None:
+        if self._profile is not None and time.monotonic() >= self._profile_until:
+            self._finish_profile()
+
+    def record_slow(self, kind: str, ms: float, details: dict) -> None:
+        if ms < self.slow_ms or self._slow_records >= MAX_SLOW_RECORDS:
+            return
+        entry = {"time": time.time(), "kind": kind, "ms": round(ms, 3)}
+        entry.update(details)
+        try:
+            if self._slow_file is None:
+                path = self._path("slow", "jsonl")
+                self._slow_file = open(path, "a", encoding="utf-8")
+                _rotate(f"{self.name}-slow")
+            self._slow_file.write(json.dumps(entry) + "\n")
+            self._slow_file.flush()
+        except OSError:
+            # called from the draw loop: give up on the trace rather than
+            # retrying (and failing) on every slow frame
+            self._slow_records = MAX_SLOW_RECORDS
+            return
+        self._slow_records += 1
+
+    def stop(self) -> None:
+        self._finish_profile()
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=5.0)
+            self._snapshot_thread = None
+            self._take_snapshot()
+        if self._slow_file is not None:
+            self._slow_file.close()
+            self._slow_file = None
+
+    def _finish_profile(self) -> None:
+        if self._profile is None:
+            return
+        profile, self._profile = self._profile, None
+        profile.disable()
+        try:
+            profile.dump_stats(str(self._path("cprofile", "prof")))
+            _rotate(f"{self.name}-cprofile")
+        except OSError:
+            pass
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            self._take_snapshot()
+
+    def _take_snapshot(self) -> None:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            base = PROFILE_DIR / f"{self.name}-heap-{stamp}"
+            snapshot.dump(str(base.with_suffix(".tracemalloc")))
+            if self._first_snapshot is None:
+                self._first_snapshot = snapshot
+                stats = snapshot.statistics("lineno")
+                header = "Top allocations"
+            else:
+                stats = snapshot.compare_to(self._first_snapshot, "lineno")
+                header = "Top growth since the first snapshot"
+            lines = [header] + [str(stat) for stat in stats[:25]]
+            base.with_suffix(".txt").write_text("\n".join(lines) + "\n")
+            _rotate(f"{self.name}-heap")
+        except Exception:
+            # Profiling must never take the process down.
+            pass
+
+
+def create_profiler(name: str, force: bool = False) -> Profiler | None:
+    """Return a started :class:`Profiler` if profiling is requested, else None."""
+    if not (force or profiling_enabled()):
+        return None
+    default_snapshots = 60.0 if name == "daemon" else 0.0
+    profiler = Profiler(
+        name,
+        seconds=_env_float(PROFILE_SECONDS_ENV, 30.0),
+        snapshot_interval=_env_float(SNAPSHOT_INTERVAL_ENV, default_snapshots),
+        slow_ms=_env_float(SLOW_MS_ENV, 50.0),
+    )
+    profiler.start()
+    return profiler
@@ -0,0 +1,355 @@
+"""Local copies of upcoming tracks that live on slow or remote storage.
+
+The front-end sends the daemon the next few playlist entries (``PREFETCH``);
+a worker thread copies those on network filesystems into the cache
+directory at a limited rate, and ``PLAY`` opens the copy instead of the
+remote file, so a stalled link no longer stalls playback.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from cue import resolve_track
+
+CACHE_MAX_MB_ENV = "TUPLET_CACHE_MAX_MB"
+CACHE_RATE_KBPS_ENV = "TUPLET_CACHE_RATE_KBPS"
+# Also cache files on local filesystems (mostly for testing).
+CACHE_ALL_ENV = "TUPLET_CACHE_ALL"
+CACHE_MAX_MB = 2048
+# Copies are throttled so they do not starve the track playing from the
+# same link; 0 means unlimited.
+CACHE_RATE_KBPS = 4096
+COPY_CHUNK_SIZE = 256 * 1024
+INDEX_NAME = "index.json"
+PART_SUFFIX = ".part"
+REMOTE_FS_TYPES = {
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smb3",
+    "smbfs",
+    "9p",
+    "afs",
+    "ceph",
+    "glusterfs",
+    "davfs",
+    "fuse.sshfs",
+    "fuse.rclone",
+    "fuse.davfs2",
+    "fuse.s3fs",
+    "fuse.glusterfs",
+}
+
+log = logging.getLogger("tuplet.daemon.readahead")
+
+
+def _mount_table() -> list[tuple[str, bool]]:
+    """``(mount point, is remote)`` for every mount, longest path first."""
+    mounts = []
+    try:
+        with open("/proc/self/mountinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields, sep, tail = line.partition(" - ")
+                fields = fields.split()
+                if not sep or len(fields) < 5:
+                    continue
+                point = fields[4].replace("\\040", " ").replace("\\011", "\t")
+                mounts.append((point, tail.split()[0] in REMOTE_FS_TYPES))
+    except OSError:
+        pass
+    mounts.sort(key=lambda mount: len(mount[0]), reverse=True)
+    return mounts
+
+
+class ReadAheadCache:
+    """LRU cache of track copies under *directory*, at most *max_bytes*.
+
+    The index (source path -> copy name, source size and mtime) is kept in
+    ``index.json`` in the same directory, least recently played first. A
+    copy is used while its source's size and mtime are unchanged, or when
+    the source cannot be reached at all.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int | None = None,
+        rate: int | None = None,
+        cache_all: bool | None = None,
+    ):
+        self.directory = directory
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(CACHE_MAX_MB_ENV, CACHE_MAX_MB)) * 1024 * 1024)
+        if rate is None:
+            rate = int(float(os.environ.get(CACHE_RATE_KBPS_ENV, CACHE_RATE_KBPS)) * 1024)
+        if cache_all is None:
+            cache_all = os.environ.get(CACHE_ALL_ENV, "") not in ("", "0")
+        self.max_bytes = max_bytes
+        # bytes per second, 0 for unlimited
+        self.rate = rate
+        self.cache_all = cache_all
+        self._cond = threading.Condition()
+        self._index: OrderedDict | None = None
+        self._cached_bytes = 0
+        self._queue: list[str] = []
+        self._wanted: set[str] = set()
+        # source being copied by the worker, if any
+        self._fetching: str | None = None
+        self._mounts = _mount_table()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.hits = 0
+        self.misses = 0
+        self.bytes_fetched = 0
+        self.files_fetched = 0
+        self.fetch_errors = 0
+        self.evictions = 0
+        self.throttle_wait_s = 0.0
+
+    # ── Index ─────────────────────────────────────────────────────────
+    def _load(self) -> OrderedDict:
+        # called with self._cond held
+        if self._index is not None:
+            return self._index
+        index: OrderedDict = OrderedDict()
+        try:
+            data = json.loads((self.directory / INDEX_NAME).read_text())
+            for source, entry in data.items():
+                if isinstance(entry, list) and len(entry) == 3:
+                    index[source] = entry
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            present = {entry.name: entry.stat().st_size for entry in os.scandir(self.directory)}
+        except OSError:
+            present = {}
+        # drop entries whose copy is gone, and copies (or partial copies
+        # from an interrupted run) no entry refers to
+        for source, entry in list(index.items()):
+            if entry[0] not in present:
+                del index[source]
+        referenced = {entry[0] for entry in index.values()}
+        for name in present:
+            if name != INDEX_NAME and name not in referenced:
+                try:
+                    os.unlink(self.directory / name)
+                except OSError:
+                    pass
+        self._cached_bytes = sum(present[entry[0]] for entry in index.values())
+        self._index = index
+        return index
+
+    def _save(self) -> None:
+        # called with self._cond held
+        tmp = self.directory / (INDEX_NAME + ".tmp")
+        try:
+            tmp.write_text(json.dumps(self._index, separators=(",", ":")))
+            os.replace(tmp, self.directory / INDEX_NAME)
+        except OSError:
+            pass
+
+    def _drop(self, source: str) -> None:
+        # called with self._cond held
+        entry = self._index.pop(source, None)
+        if entry is None:
+            return
+        self._cached_bytes -= entry[1]
+        try:
+            os.unlink(self.directory / entry[0])
+        except OSError:
+            pass
+
+    def _make_room(self, size: int) -> None:
+        # called with self._cond held; evicts least recently played first
+        while self._index and self._cached_bytes + size > self.max_bytes:
+            self._drop(next(iter(self._index)))
+            self.evictions += 1
+
+    # ── Front-end requests ────────────────────────────────────────────
+    def _source(self, path: str) -> str:
+        resolved = resolve_track(path)
+        return resolved[1].file if resolved is not None else path
+
+    def _is_remote(self, path: str) -> bool:
+        if self.cache_all:
+            return True
+        for point, remote in self._mounts:
+            if path == point or path.startswith(point.rstrip("/") + "/"):
+                return remote
+        return False
+
+    def prefetch(self, paths) -> int:
+        """Replace the fetch queue with *paths*; returns how many are queued.
+
+        Files already cached, or not on a network filesystem, are skipped.
+        A copy in progress is abandoned when its file is no longer wanted.
+        """
+        self._mounts = _mount_table()
+        sources = []
+        for path in paths:
+            source = self._source(path)
+            if source not in sources and self._is_remote(source):
+                sources.append(source)
+        with self._cond:
+            index = self._load()
+            self._wanted = set(sources)
+            self._queue = [
+                source
+                for source in sources
+                if source not in index and source != self._fetching
+            ]
+            if self._queue and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="readahead", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return len(self._queue)
+
+    def lookup(self, path: str) -> str | None:
+        """Cached copy to play instead of *path*, or None.
+
+        Counts a hit, or a miss for a file on a network filesystem.
+        """
+        with self._cond:
+            entry = self._load().get(path)
+        if entry is not None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None  # unreachable source: the copy is all there is
+            with self._cond:
+                if self._index.get(path) is entry:
+                    if st is None or [st.st_size, st.st_mtime_ns] == entry[1:]:
+                        self._index.move_to_end(path)
+                        self.hits += 1
+                        return str(self.directory / entry[0])
+                    self._drop(path)
+                    self._save()
+        if self._is_remote(path):
+            with self._cond:
+                self.misses += 1
+        return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._queue.clear()
+            self._cond.notify_all()
+            if self._index is not None:
+                self._save()
+
+    # ── Worker ────────────────────────────────────────────────────────
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                source = self._queue.pop(0)
+                self._fetching = source
+            try:
+                self._fetch(source)
+            except OSError as exc:
+                with self._cond:
+                    self.fetch_errors += 1
+                log.info("cannot cache %s: %s", source, exc)
+            finally:
+                with self._cond:
+                    self._fetching = None
+
+    def _fetch(self, source: str) -> None:
+        with self._cond:
+            if source in self._load():
+                return  # copied since it was queued
+        st = os.stat(source)
+        if st.st_size > self.max_bytes:
+            return
+        name = hashlib.blake2b(os.fsencode(source), digest_size=16).hexdigest()
+        name += os.path.splitext(source)[1]
+        part = self.directory / (name + PART_SUFFIX)
+        with self._cond:
+            self._make_room(st.st_size)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        copied = 0
+        buf = bytearray(COPY_CHUNK_SIZE)
+        try:
+            with open(source, "rb", buffering=0) as src, open(part, "wb") as dst:
+                while True:
+                    n = src.readinto(buf)
+                    if not n:
+                        break
+                    dst.write(memoryview(buf)[:n])
+                    copied += n
+                    if not self._throttle(source, copied, started):
+                        raise InterruptedError
+                after = os.fstat(src.fileno())
+        except InterruptedError:
+            log.debug("dropped copy of %s", source)
+            self._discard(part, copied)
+            return
+        except OSError:
+            self._discard(part, copied)
+            raise
+        if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+            # changed while being copied; it is fetched again next time
+            self._discard(part, copied)
+            return
+        os.replace(part, self.directory / name)
+        with self._cond:
+            self.bytes_fetched += copied
+            self.files_fetched += 1
+            self._drop(source)
+            self._make_room(copied)
+            self._index[source] = [name, st.st_size, st.st_mtime_ns]
+            self._cached_bytes += copied
+            self._save()
+        log.info("cached %s (%d bytes, %.1f s)", source, copied, time.monotonic() - started)
+
+    def _discard(self, part: Path, copied: int) -> None:
+        with self._cond:
+            self.bytes_fetched += copied
+        try:
+            os.unlink(part)
+        except OSError:
+            pass
+
+    def _throttle(self, source: str, copied: int, started: float) -> bool:
+        """Wait until *copied* bytes are within the rate; False to abandon."""
+        with self._cond:
+            while True:
+                if self._stopping or source not in self._wanted:
+                    return False
+                ahead = copied / self.rate - (time.monotonic() - started) if self.rate else 0
+                if ahead <= 0:
+                    return True
+                waited = time.monotonic()
+                self._cond.wait(ahead)
+                self.throttle_wait_s += time.monotonic() - waited
+
+    def as_dict(self) -> dict:
+        with self._cond:
+            looked_up = self.hits + self.misses
+            return {
+                "max_bytes": self.max_bytes,
+                "rate_limit_bps": self.rate,
+                "cached_files": len(self._index) if self._index is not None else 0,
+                "cached_bytes": self._cached_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / looked_up, 3) if looked_up else None,
+                "bytes_fetched": self.bytes_fetched,
+                "files_fetched": self.files_fetched,
+                "fetch_errors": self.fetch_errors,
+                "evictions": self.evictions,
+                "throttle_wait_s": round(self.throttle_wait_s, 3),
+                "queued": len(self._queue),
+            }
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from client import CONFIG_DIR
+from cue import is_cue_sheet, load_cue
+from formatting import format_time
+from jobs import BackgroundJob
+from view import MEDIA_EXTENSIONS
+
+SUMMARY_CACHE_PATH = CONFIG_DIR / "folder_summaries.json"
+SUMMARY_CACHE_MAX = 200000
+# Finished subfolders are handed to the UI at most this often, since each
+# batch redraws the listing.
+POST_INTERVAL_SEC = 0.2
+# Changes to the cache are written out at most this often (and on exit).
+SUMMARY_SAVE_DELAY_SEC = 30.0
+
+
+@dataclass
+class FolderSummary:
+    count: int = 0
+    size: int = 0
+    duration: float = 0.0
+    # tracks whose duration is known (from state.durations)
+    timed: int = 0
+
+    def add(self, other: "FolderSummary") -> None:
+        self.count += other.count
+        self.size += other.size
+        self.duration += other.duration
+        self.timed += other.timed
+
+    def label(self) -> str:
+        text = f"{self.count} track{'' if self.count == 1 else 's'}"
+        if self.size:
+            text += f", {_format_size(self.size)}"
+        if self.timed:
+            # "+": some tracks have not been played yet, so are not counted
+            text += f", {format_time(self.duration)}{'+' if self.timed < self.count else ''}"
+        return text
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    if unit == "GB" or (unit != "B" and size < 10):
+        return f"{size:.1f} {unit}"
+    return f"{int(size)} {unit}"
+
+
+class SummaryCache:
+    """Media counts and sizes per folder, valid while the folder's mtime is
+    unchanged (adding, removing or renaming an entry in it changes it).
+
+    Each entry also holds the totals of the folder's whole subtree, kept
+    current by :meth:`adjust_ancestors` when a folder below is rescanned.
+    A file rewritten in place changes no folder's mtime, so its new size
+    is only picked up once something else in its folder changes.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH):
+        self.path = path
+        # folder -> [mtime_ns, tracks, bytes, [subfolder names],
+        #            subtree tracks, subtree bytes], least recently used first
+        self._entries: dict | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text())
+                self._entries = {
+                    key: value
+                    for key, value in data.items()
+                    if isinstance(value, list) and len(value) == 6
+                }
+            except (OSError, ValueError, AttributeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, path: str, mtime_ns: int) -> list | None:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(path)
+            if entry is None or entry[0] != mtime_ns:
+                return None
+            # move to the end, so eviction drops the least recently used
+            del entries[path]
+            entries[path] = entry
+        return entry
+
+    def put(self, path: str, entry: list) -> list | None:
+        """Store *entry*; returns the entry it replaces, if any."""
+        with self._lock:
+            entries = self._load()
+            old = entries.pop(path, None)
+            entries[path] = entry
+            while len(entries) > SUMMARY_CACHE_MAX:
+                del entries[next(iter(entries))]
+            self._mark_dirty()
+        return old
+
+    def adjust_ancestors(self, path: str, tracks: int, size: int) -> None:
+        """Add a change in *path*'s subtree totals to its cached ancestors."""
+        if not tracks and not size:
+            return
+        with self._lock:
+            entries = self._load()
+            parent = os.path.dirname(path)
+            while parent != path:
+                entry = entries.get(parent)
+                if entry is not None:
+                    entry[4] += tracks
+                    entry[5] += size
+                path, parent = parent, os.path.dirname(parent)
+            self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        # called with the lock held; the file is written once the timer fires
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(SUMMARY_SAVE_DELAY_SEC, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            text = json.dumps(self._entries, separators=(",", ":"))
+            self._dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(text)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+summary_cache = SummaryCache()
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _scan_folder(path: str, mtime_ns: int) -> list:
+    """Cache entry for one folder: its own media files and its subfolders
+    (the subtree totals are filled in by :func:`_subtree`)."""
+    tracks = size = 0
+    subdirs = []
+    files = set()
+    sheets = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS:
+                    size += entry.stat().st_size
+                    tracks += 1
+                    files.add(entry.path)
+                elif is_cue_sheet(entry.name):
+                    sheets.append(entry.path)
+            except OSError:
+                continue
+    # a file split by a CUE sheet counts as the sheet's tracks, as with 'A'
+    for sheet_path in sheets:
+        sheet = load_cue(sheet_path)
+        if sheet is not None and sheet.tracks:
+            split = {track.file for track in sheet.tracks} & files
+            files -= split
+            tracks += len(sheet.tracks) - len(split)
+    return [mtime_ns, tracks, size, subdirs, tracks, size]
+
+
+def _subtree(path: str, dev: int, should_stop) -> list | None:
+    """Cache entry of *path* with its subtree totals, or None if it cannot
+    be read or is on another filesystem than *dev* (mount points are not
+    crossed). Only folders whose mtime changed are listed again; the totals
+    of unchanged ones are taken from the cache without descending."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_dev != dev:
+        return None
+    entry = summary_cache.get(path, st.st_mtime_ns)
+    if entry is not None:
+        return entry
+    if should_stop is not None and should_stop():
+        raise _Stopped
+    try:
+        entry = _scan_folder(path, st.st_mtime_ns)
+    except OSError:
+        return None
+    for name in entry[3]:
+        child = _subtree(os.path.join(path, name), dev, should_stop)
+        if child is not None:
+            entry[4] += child[4]
+            entry[5] += child[5]
+    old = summary_cache.put(path, entry)
+    if old is not None:
+        summary_cache.adjust_ancestors(path, entry[4] - old[4], entry[5] - old[5])
+    return entry
+
+
+def summarize(top: str, timed_by_tree: dict, dev: int | None = None,
+              should_stop=None) -> FolderSummary | None:
+    """Totals for *top* and everything below it on the filesystem *dev*
+    (hidden entries excluded). Returns None if *top* cannot be read, is a
+    mount point, or *should_stop* says so."""
+    try:
+        if dev is None:
+            dev = os.stat(top).st_dev
+        entry = _subtree(top, dev, should_stop)
+    except (OSError, _Stopped):
+        return None
+    if entry is None:
+        return None
+    duration, timed = timed_by_tree.get(top, (0.0, 0))
+    return FolderSummary(entry[4], entry[5], duration, min(timed, entry[4]))
+
+
+def durations_by_tree(durations: dict) -> dict:
+    """state.durations summed per folder, each played track counting for
+    every folder above it: folder -> (seconds, tracks)."""
+    by_dir: dict[str, tuple] = {}
+    for path, seconds in durations.items():
+        folder = os.path.dirname(path)
+        while True:
+            total, count = by_dir.get(folder, (0.0, 0))
+            by_dir[folder] = (total + seconds, count + 1)
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                break
+            folder = parent
+    return by_dir
+
+
+class FolderSummaryJob(BackgroundJob):
+    """Summarize each subfolder of the browsed folder, and the folder itself.
+
+    Results are posted as ``(path, FolderSummary)`` pairs, one subfolder at
+    a time, for :attr:`BrowserState.folder_summaries`.
+    """
+
+    def __init__(self, folder, subfolders, durations: dict, notify=None):
+        super().__init__(f"Summarizing {folder.name or folder}", notify)
+        self.folder = str(folder)
+        self.subfolders = [str(path) for path in subfolders]
+        self.durations = dict(durations)
+
+    def run(self) -> None:
+        timed = durations_by_tree(self.durations)
+        try:
+            dev = os.stat(self.folder).st_dev
+        except OSError:
+            return
+        pending = []
+        posted_at = time.monotonic()
+        for path in self.subfolders:
+            if self.cancelled:
+                break
+            summary = summarize(path, timed, dev, lambda: self.cancelled)
+            self.processed += 1
+            if summary is not None:
+                pending.append((path, summary))
+            if time.monotonic() - posted_at >= POST_INTERVAL_SEC:
+                self.post(pending)
+                pending = []
+                posted_at = time.monotonic()
+        else:
+            # the subfolders are cached by now, so this only lists the
+            # folder itself if it changed
+            total = summarize(self.folder, timed, dev, lambda: self.cancelled)
+            if total is not None:
+                pending.append((self.folder, total))
+        self.post(pending)
+
+    def apply(self, state) -> list:
+        """Store posted summaries; returns the paths updated (so only their
+        rows need new labels)."""
+        items = self.take()
+        state.folder_summaries.update(items)
+        return [path for path, _summary in items]
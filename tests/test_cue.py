@@ -0,0 +1,104 @@
+from cue import is_cue_track, parse_cue, split_track
+
+
+def write_sheet(path, text, encoding="utf-8"):
+    path.write_bytes(text.encode(encoding))
+    return path
+
+
+def test_quoted_and_unquoted_values(tmp_path):
+    (tmp_path / "My Album.flac").write_bytes(b"")
+    sheet = parse_cue(
+        str(
+            write_sheet(
+                tmp_path / "album.cue",
+                'PERFORMER "The Band"\n'
+                "TITLE Live at the Hall\n"
+                'FILE "My Album.flac" WAVE\n'
+                "  TRACK 01 AUDIO\n"
+                '    TITLE "Rock \'n\' Roll"\n'
+                "    INDEX 01 00:00:00\n"
+                "  TRACK 02 AUDIO\n"
+                '    TITLE "Unterminated\n'
+                "    INDEX 01 03:20:37\n",
+            )
+        )
+    )
+    assert sheet.performer == "The Band"
+    assert sheet.title == "Live at the Hall"
+    assert [track.title for track in sheet.tracks] == ["Rock 'n' Roll", "Unterminated"]
+    assert sheet.tracks[0].file == str(tmp_path / "My Album.flac")
+    assert sheet.tracks[1].start == 200 + 37 / 75
+    assert sheet.tracks[0].end == sheet.tracks[1].start
+    assert sheet.tracks[1].end is None
+
+
+def test_latin1_fallback(tmp_path):
+    (tmp_path / "a.flac").write_bytes(b"")
+    sheet = parse_cue(
+        str(
+            write_sheet(
+                tmp_path / "a.cue",
+                'FILE "a.flac" WAVE\n  TRACK 01 AUDIO\n    TITLE "Café"\n    INDEX 01 00:00:00\n',
+                encoding="latin-1",
+            )
+        )
+    )
+    assert sheet.tracks[0].title == "Café"
+
+
+def test_utf8_bom(tmp_path):
+    (tmp_path / "a.flac").write_bytes(b"")
+    sheet = parse_cue(
+        str(
+            write_sheet(
+                tmp_path / "a.cue",
+                '\ufeffTITLE "Über"\nFILE "a.flac" WAVE\n  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n',
+            )
+        )
+    )
+    assert sheet.title == "Über"
+
+
+def test_windows_path_falls_back_to_same_stem(tmp_path):
+    (tmp_path / "album.flac").write_bytes(b"")
+    sheet = parse_cue(
+        str(
+            write_sheet(
+                tmp_path / "album.cue",
+                'FILE "C:\\rips\\album.wav" WAVE\n  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n',
+            )
+        )
+    )
+    assert sheet.tracks[0].file == str(tmp_path / "album.flac")
+
+
+def test_multiple_files(tmp_path):
+    for name in ("cd1.flac", "cd2.flac"):
+        (tmp_path / name).write_bytes(b"")
+    sheet = parse_cue(
+        str(
+            write_sheet(
+                tmp_path / "set.cue",
+                'FILE "cd1.flac" WAVE\n'
+                "  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n"
+                "  TRACK 02 AUDIO\n    INDEX 00 04:00:00\n    INDEX 01 04:02:00\n"
+                'FILE "cd2.flac" WAVE\n'
+                "  TRACK 03 AUDIO\n    INDEX 01 00:00:00\n"
+                "  TRACK 04 AUDIO\n    INDEX 00 01:00:00\n"
+                "  TRACK 05 AUDIO\n    INDEX 01 02:00:00\n",
+            )
+        )
+    )
+    # track 4 has no INDEX 01 and is dropped
+    assert [track.number for track in sheet.tracks] == [1, 2, 3, 5]
+    assert [track.start for track in sheet.tracks] == [0.0, 242.0, 0.0, 120.0]
+    # a track ends where the next one in the same file starts
+    assert [track.end for track in sheet.tracks] == [242.0, None, 120.0, None]
+    assert sheet.tracks_in(str(tmp_path / "cd2.flac")) == sheet.tracks[2:]
+
+
+def test_track_paths():
+    assert split_track("/music/a.cue#3") == ("/music/a.cue", 3)
+    assert split_track("/music/a #3.flac") is None
+    assert not is_cue_track("/music/a.cue#x")
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from playlist_store import PlaylistStore
+
+
+@pytest.fixture
+def folders(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+    return [str(tmp_path / name) for name in ("a", "b", "c")]
+
+
+def round_trip(store):
+    return PlaylistStore.from_data(json.loads(store.to_json()))
+
+
+def test_round_trip(folders):
+    a, b, c = folders
+    paths = [f"{a}/1.mp3", f"{b}/2.mp3", f"{a}/3 é.flac", f"{c}/1.mp3", f"{a}/1.mp3"]
+    assert list(round_trip(PlaylistStore(paths)).iter_str()) == paths
+
+
+def test_round_trip_keeps_undecodable_names(folders):
+    name = b"caf\xe9.mp3".decode("utf-8", "surrogateescape")
+    path = f"{folders[0]}/{name}"
+    assert list(round_trip(PlaylistStore([path])).iter_str()) == [path]
+
+
+def test_round_trip_empty():
+    assert len(round_trip(PlaylistStore())) == 0
+
+
+def test_round_trip_drops_unused_and_missing_dirs(folders, tmp_path):
+    a, b, c = folders
+    store = PlaylistStore([f"{a}/1.mp3", f"{b}/2.mp3", f"{c}/3.mp3", f"{tmp_path}/gone/4.mp3"])
+    del store[1]
+    data = json.loads(store.to_json())
+    assert b not in data["dirs"]
+    assert list(PlaylistStore.from_data(data).iter_str()) == [f"{a}/1.mp3", f"{c}/3.mp3"]
+
+
+def test_malformed_data_is_rejected(folders):
+    data = json.loads(PlaylistStore([f"{folders[0]}/1.mp3"]).to_json())
+    data["dir_index"] = [0, 0]
+    with pytest.raises(ValueError):
+        PlaylistStore.from_data(data)
+
+
+def test_to_json_follows_changes(folders):
+    store = PlaylistStore([f"{folders[0]}/1.mp3"])
+    first = store.to_json()
+    assert store.to_json() is first
+    store.append(f"{folders[1]}/2.mp3")
+    assert len(round_trip(store)) == 2
+
+
+def test_indices_follow_removals(folders):
+    a, b, _c = folders
+    store = PlaylistStore(f"{d}/{n}.mp3" for n in range(5) for d in (a, b))
+    store.delete_many([0, 3, 4])
+    assert list(store.iter_str()) == [
+        f"{b}/0.mp3", f"{a}/1.mp3", f"{b}/2.mp3", f"{a}/3.mp3", f"{b}/3.mp3",
+        f"{a}/4.mp3", f"{b}/4.mp3",
+    ]
+    assert list(store.find_name("3.mp3")) == [3, 4]
+    assert store.index(f"{b}/2.mp3") == 2
+    assert f"{a}/0.mp3" not in store
+    store.pop(0)
+    assert store.index(f"{a}/1.mp3") == 0
+
+
+def test_indices_follow_inserts_and_reorders(folders):
+    a, b, _c = folders
+    store = PlaylistStore([f"{a}/x.mp3", f"{a}/y.mp3"])
+    store.insert(0, f"{b}/x.mp3")
+    assert list(store.find_name("x.mp3")) == [0, 1]
+    store.reorder([2, 1, 0])
+    assert list(store.iter_str()) == [f"{a}/y.mp3", f"{a}/x.mp3", f"{b}/x.mp3"]
+    assert list(store.find_name("x.mp3")) == [1, 2]
+    assert store.index(f"{b}/x.mp3") == 2
+    store[0] = f"{b}/z.mp3"
+    assert list(store.find_name("y.mp3")) == []
+    assert list(round_trip(store).iter_str()) == list(store.iter_str())
+
+
+def test_find_name_matches_whole_names_only(folders):
+    store = PlaylistStore([f"{folders[0]}/ab.mp3", f"{folders[0]}/b.mp3"])
+    assert list(store.find_name("b.mp3")) == [1]
+    assert list(store.find_name("")) == []
+
+
+def test_version_changes_on_every_mutation(folders):
+    store = PlaylistStore([f"{folders[0]}/1.mp3"])
+    versions = [store.version]
+    for change in (
+        lambda: store.append(f"{folders[0]}/2.mp3"),
+        lambda: store.insert(0, f"{folders[0]}/3.mp3"),
+        lambda: store.reorder([2, 1, 0]),
+        lambda: store.delete_many([0]),
+        lambda: store.clear(),
+    ):
+        change()
+        versions.append(store.version)
+    assert len(set(versions)) == len(versions)
+
+
+def test_lookups_after_compaction(folders, monkeypatch):
+    monkeypatch.setattr("playlist_store._COMPACT_MIN_BYTES", 16)
+    a = folders[0]
+    store = PlaylistStore(f"{a}/track {n:03d}.mp3" for n in range(100))
+    store.find_name("track 000.mp3")  # builds the offset index
+    store.delete_many(range(0, 100, 2))
+    pool_size = len(store._pool)
+    del store[:25]
+    assert len(store._pool) < pool_size
+    assert list(store.find_name("track 099.mp3")) == [24]
+    assert store.index(f"{a}/track 051.mp3") == 0
+    assert list(round_trip(store).iter_str()) == [f"{a}/track {n:03d}.mp3" for n in range(51, 100, 2)]
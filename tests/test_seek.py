@@ -0,0 +1,142 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from controller import merge_seek, send_seeks
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+# ── Merging in the front-end ──────────────────────────────────────────
+def test_relative_seeks_add_up():
+    pending = ()
+    for step in (5, 5, -60):
+        pending = merge_seek(pending, ("seek", step))
+    assert pending == (("seek", -50),)
+
+
+def test_percent_seek_replaces_queued_seeks():
+    pending = merge_seek((("seek", 5),), ("seek_percent", 50))
+    assert pending == (("seek_percent", 50),)
+    assert merge_seek(pending, ("seek_percent", 20)) == (("seek_percent", 20),)
+
+
+def test_relative_seek_after_percent_is_kept_in_order():
+    pending = merge_seek((), ("seek_percent", 50))
+    pending = merge_seek(pending, ("seek", 5))
+    pending = merge_seek(pending, ("seek", 5))
+    assert pending == (("seek_percent", 50), ("seek", 10))
+
+
+class RecordingPlayer:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def seek(self, seconds, relative=False):
+        self.calls.append(("seek", seconds, relative))
+        if self.fail:
+            raise RuntimeError("nothing is playing")
+
+    def seek_percent(self, percent):
+        self.calls.append(("seek_percent", percent))
+
+
+def test_send_seeks_in_order():
+    player = RecordingPlayer()
+    assert send_seeks((("seek_percent", 50), ("seek", 10)), player) is None
+    assert player.calls == [("seek_percent", 50), ("seek", 10, True)]
+
+
+def test_send_seeks_stops_at_the_first_error():
+    player = RecordingPlayer(fail=True)
+    result = send_seeks((("seek", 5), ("seek_percent", 50)), player)
+    assert result == ("error", "Cannot seek: nothing is playing")
+    assert player.calls == [("seek", 5, True)]
+
+
+# ── Targets in the daemon (null backend: 180 s tracks) ────────────────
+@pytest.fixture
+def daemon(tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path), TUPLET_BACKEND="null")
+    env.pop("TUPLET_PROFILE", None)
+    proc = subprocess.Popen(
+        [sys.executable, str(REPO / "daemon.py"), "--backend", "null"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    sock_path = tmp_path / ".tuplet_tui_audio_player" / "socket"
+
+    def send(line):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(3.0)
+            s.connect(str(sock_path))
+            s.sendall(f"{line}\n".encode())
+            buf = b""
+            while b"\n" not in buf:
+                chunk = s.recv(4096)
+                if not chunk:
+                    break
+                buf += chunk
+        return buf.decode().split("\n")[0]
+
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            send("GET_INFO")
+            break
+        except OSError:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                proc.kill()
+                pytest.fail("daemon did not start")
+            time.sleep(0.05)
+    yield send
+    try:
+        send("QUIT")
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def seek_to(send, arg):
+    assert send(f"SEEK\t{arg}") == "OK"
+    return float(send("GET_INFO").split("\t")[2])
+
+
+def test_daemon_seek_forms(daemon, tmp_path):
+    track = tmp_path / "a.mp3"
+    track.write_bytes(b"")
+    assert daemon(f"PLAY\t{track}").startswith("OK")
+    daemon("PAUSE")
+    assert seek_to(daemon, "50%") == pytest.approx(90.0)
+    assert seek_to(daemon, "+5") == pytest.approx(95.0)
+    assert seek_to(daemon, "-100") == pytest.approx(0.0)
+    assert seek_to(daemon, "30") == pytest.approx(30.0)
+    # stops just short of the end instead of ending the track
+    assert seek_to(daemon, "500") == pytest.approx(179.0)
+    assert daemon("SEEK\tabc").startswith("ERROR")
+
+
+def test_daemon_seeks_within_a_cue_track(daemon, tmp_path):
+    (tmp_path / "album.flac").write_bytes(b"")
+    (tmp_path / "album.cue").write_text(
+        'FILE "album.flac" WAVE\n'
+        "  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n"
+        "  TRACK 02 AUDIO\n    INDEX 01 01:00:00\n"
+        "  TRACK 03 AUDIO\n    INDEX 01 02:00:00\n"
+    )
+    assert daemon(f"PLAY\t{tmp_path / 'album.cue'}#2").startswith("OK")
+    daemon("PAUSE")
+    # positions are reported within the track (60 s to 120 s of the file)
+    assert seek_to(daemon, "10") == pytest.approx(10.0)
+    assert seek_to(daemon, "50%") == pytest.approx(30.0)
+    assert seek_to(daemon, "+5") == pytest.approx(35.0)
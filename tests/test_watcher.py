@@ -0,0 +1,135 @@
+import os
+import time
+
+import pytest
+
+import watcher
+from watcher import IN_Q_OVERFLOW, SETTLE_SEC, FolderWatcher
+
+EXTENSIONS = {".mp3", ".flac"}
+
+
+@pytest.fixture
+def folder_watcher():
+    fw = FolderWatcher(EXTENSIONS)
+    if fw.fileno() is None:
+        pytest.skip("inotify is not available")
+    yield fw
+    fw.close()
+
+
+def settle(fw, now):
+    """Read pending events at *now*; returns what is ready once settled."""
+    fw.read_events(now)
+    assert fw.take_ready(now)[0] == []
+    return fw.take_ready(now + SETTLE_SEC + 0.1)[0]
+
+
+def test_new_file_reported_once_settled(folder_watcher, tmp_path):
+    (tmp_path / "old.mp3").write_bytes(b"x")
+    folder_watcher.add(tmp_path)
+    now = time.monotonic()
+    (tmp_path / "new.mp3").write_bytes(b"x")
+    (tmp_path / "notes.txt").write_bytes(b"x")
+    (tmp_path / ".hidden.mp3").write_bytes(b"x")
+    folder_watcher.read_events(now)
+    ready, next_due = folder_watcher.take_ready(now)
+    assert ready == [] and next_due == pytest.approx(now + SETTLE_SEC)
+    ready, _ = folder_watcher.take_ready(now + SETTLE_SEC + 0.1)
+    assert ready == [str(tmp_path / "new.mp3")]
+    # reported once, even when written again
+    (tmp_path / "new.mp3").write_bytes(b"xy")
+    assert settle(folder_watcher, now + 10) == []
+
+
+def test_growing_file_waits(folder_watcher, tmp_path):
+    folder_watcher.add(tmp_path)
+    path = tmp_path / "rec.flac"
+    now = time.monotonic()
+    path.write_bytes(b"x")
+    folder_watcher.read_events(now)
+    # grown by the time it is due: checked again after another pause
+    with open(path, "ab") as f:
+        f.write(b"more")
+    assert folder_watcher.take_ready(now + SETTLE_SEC + 0.1)[0] == []
+    folder_watcher.read_events(now + SETTLE_SEC + 0.1)
+    assert folder_watcher.take_ready(now + 2 * SETTLE_SEC + 0.3)[0] == [str(path)]
+
+
+def test_new_subfolders_are_watched(folder_watcher, tmp_path):
+    folder_watcher.add(tmp_path)
+    now = time.monotonic()
+    sub = tmp_path / "album"
+    sub.mkdir()
+    folder_watcher.read_events(now)
+    (sub / "01.mp3").write_bytes(b"x")
+    assert settle(folder_watcher, now) == [str(sub / "01.mp3")]
+
+
+def test_deleted_file_is_reported_again_when_recreated(folder_watcher, tmp_path):
+    path = tmp_path / "a.mp3"
+    path.write_bytes(b"x")
+    folder_watcher.add(tmp_path)
+    now = time.monotonic()
+    path.unlink()
+    path.write_bytes(b"x")
+    assert settle(folder_watcher, now) == [str(path)]
+
+
+def test_overflow_rescans_for_missed_files(folder_watcher, tmp_path, monkeypatch):
+    (tmp_path / "old.mp3").write_bytes(b"x")
+    folder_watcher.add(tmp_path)
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "missed.mp3").write_bytes(b"x")
+    (tmp_path / "missed.flac").write_bytes(b"x")
+    # drop the real events, as the kernel does when its queue overflows
+    fd = folder_watcher.fileno()
+    while True:
+        try:
+            os.read(fd, 65536)
+        except BlockingIOError:
+            break
+    overflow = [watcher._EVENT_HEADER.pack(-1, IN_Q_OVERFLOW, 0, 0)]
+    real_read = os.read
+
+    def read(fileno, size):
+        if fileno == fd and overflow:
+            return overflow.pop()
+        return real_read(fileno, size)
+
+    monkeypatch.setattr(watcher.os, "read", read)
+    now = time.monotonic()
+    assert settle(folder_watcher, now) == [
+        str(tmp_path / "missed.flac"),
+        str(sub / "missed.mp3"),
+    ]
+    # the rescan also put a watch on the missed folder
+    monkeypatch.setattr(watcher.os, "read", real_read)
+    (sub / "later.mp3").write_bytes(b"x")
+    assert settle(folder_watcher, now + 10) == [str(sub / "later.mp3")]
+
+
+def test_files_since_last_session(folder_watcher, tmp_path):
+    old = tmp_path / "old.mp3"
+    old.write_bytes(b"x")
+    since = time.time() + 1
+    new = tmp_path / "new.mp3"
+    new.write_bytes(b"x")
+    later = since + 5
+    os.utime(new, (later, later))
+    folder_watcher.add(tmp_path, since)
+    # ctime is the real time of the write, so only mtime is past *since*;
+    # either counts
+    ready = folder_watcher.take_ready(time.monotonic() + SETTLE_SEC + 0.1)[0]
+    assert ready == [str(new)]
+    assert folder_watcher.seen_until(tmp_path) <= time.time()
+
+
+def test_remove_stops_reporting(folder_watcher, tmp_path):
+    folder_watcher.add(tmp_path)
+    folder_watcher.remove(tmp_path)
+    now = time.monotonic()
+    (tmp_path / "a.mp3").write_bytes(b"x")
+    folder_watcher.read_events(now)
+    assert folder_watcher.take_ready(now + SETTLE_SEC + 0.1) == ([], None)
@@ -0,0 +1,658 @@
+"""Textual front-end: ``main.py --ui textual``.
+
+Shares the browser state, the controller and the daemon client with the
+curses UI; keys are translated to the curses key codes the controller
+expects. The two lists only render the rows on screen, and playback info
+is fetched when the daemon sends an event rather than on a timer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import curses
+import os
+import threading
+import time
+from pathlib import Path
+
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual.app import App, ComposeResult
+from textual.containers import Horizontal, Vertical
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Static
+
+from controller import (
+    JOB_ACTIONS,
+    PLAYER_ACTIONS,
+    SEEK_ACTIONS,
+    SEEK_INTERVAL_SEC,
+    handle_action,
+    handle_key,
+    merge_seek,
+    prefetch_upcoming,
+    record_watch_scans,
+    send_seeks,
+    start_folder_summary,
+    start_job_action,
+    toggle_watched_folder,
+    watch_watched_folders,
+)
+from cue import is_cue_sheet, is_cue_track, track_label
+from duplicates import fingerprints
+from formatting import format_time
+from metrics import FrameStats
+from model import (
+    SAVE_DELAY_SEC,
+    BrowserState,
+    DaemonPlayer,
+    clamp_playlist_selection,
+    clamp_selection,
+    daemon_error_message,
+    ensure_daemon_running,
+    entry_label,
+    follow_cue_track,
+    listed_dirs,
+    list_entries,
+    load_persisted_state_into,
+    next_playlist_index,
+    now_playing_label,
+    remember_duration,
+    remember_position,
+    resume_position,
+    save_state,
+    sort_mode_for,
+)
+from profiling import create_profiler
+from summaries import summary_cache
+from view import MEDIA_EXTENSIONS
+from watcher import DirectoryWatcher, FolderWatcher
+
+RETRY_INTERVAL_SEC = 3.0
+# The info bar clock is advanced locally between daemon events.
+CLOCK_TICK_SEC = 1.0
+# How often the profiler checks whether its cProfile window has ended.
+PROFILER_TICK_SEC = 1.0
+
+# Textual key names -> the curses codes controller.handle_key understands
+_KEY_CODES = {
+    "up": curses.KEY_UP,
+    "down": curses.KEY_DOWN,
+    "left": curses.KEY_LEFT,
+    "right": curses.KEY_RIGHT,
+    "pageup": curses.KEY_PPAGE,
+    "pagedown": curses.KEY_NPAGE,
+    "home": curses.KEY_HOME,
+    "end": curses.KEY_END,
+    "enter": ord("\n"),
+    "tab": ord("\t"),
+    "backspace": curses.KEY_BACKSPACE,
+    "delete": curses.KEY_DC,
+    "escape": 27,
+    "f12": curses.KEY_F12,
+}
+
+STYLE_SELECTED = Style(color="black", bgcolor="cyan", bold=True)
+STYLE_DIR = Style(color="blue", bold=True)
+STYLE_MEDIA = Style(color="green")
+STYLE_MARKED = Style(color="yellow", bold=True)
+STYLE_PLAIN = Style()
+
+
+def _curses_key(event) -> int | None:
+    code = _KEY_CODES.get(event.key)
+    if code is not None:
+        return code
+    if event.character and len(event.character) == 1 and event.is_printable:
+        return ord(event.character)
+    return None
+
+
+class VirtualList(ScrollView, can_focus=False):
+    """A list that renders only the rows currently on screen.
+
+    *row* maps an index to ``(text, style)``; the list itself holds nothing
+    but the row count, so a 100k-entry directory costs a screenful of work
+    per redraw.
+    """
+
+    DEFAULT_CSS = """
+    VirtualList {
+        overflow-x: hidden;
+        scrollbar-size-vertical: 1;
+    }
+    """
+
+    def __init__(self, row, **kwargs):
+        super().__init__(**kwargs)
+        self._row = row
+        self._count = 0
+
+    def show(self, count: int, scroll: int) -> None:
+        if count != self._count:
+            self._count = count
+            self.virtual_size = Size(0, count)
+        self.scroll_to(y=scroll, animate=False, immediate=True)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        index = self.scroll_offset.y + y
+        if index >= self._count:
+            return Strip.blank(width)
+        text, style = self._row(index)
+        return Strip([Segment(text, style)]).adjust_cell_length(width)
+
+
+class TupletApp(App):
+    CSS = """
+    #panes { height: 1fr; }
+    #browser-pane { width: 1fr; border-right: vkey $primary; }
+    #playlist-pane { width: 1fr; padding-left: 1; }
+    .header { height: 1; color: cyan; text-style: bold; }
+    .header.active { text-style: bold underline; }
+    #info, #status { height: 1; }
+    #status { color: yellow; text-style: bold; }
+    #status.error { color: red; }
+    #overlay {
+        layer: overlay;
+        dock: right;
+        width: auto;
+        max-width: 60%;
+        height: auto;
+        background: $panel;
+        display: none;
+    }
+    """
+    # q / Q / Escape are handled in on_key like the curses UI does.
+    ENABLE_COMMAND_PALETTE = False
+
+    def __init__(
+        self, start_path: Path, frame_stats_path: Path | None = None, profile: bool = False
+    ):
+        super().__init__()
+        # a frame spans a key (or event) through the redraw it triggers
+        self.frame_stats = FrameStats()
+        self.frame_stats_path = frame_stats_path
+        self.show_frame_stats = False
+        self.profile = profile
+        self.profiler = None
+        self.state = BrowserState(current_path=start_path)
+        load_persisted_state_into(self.state)
+        self.player = DaemonPlayer()
+        self.entries: list[Path] = []
+        self.entries_have_parent = False
+        # subfolders among the entries (they come first, after "..")
+        self.dir_count = 0
+        self.listing_key = None
+        self.listing_sort = None
+        self.daemon_ready = False
+        self.jobs: list = []
+        self.summary_job = None
+        self.save_timer = None
+        self.pending_seek = ()
+        self.seek_timer = None
+        self.last_seek_at = float("-inf")
+        # what the daemon was last asked to copy ahead (prefetch_upcoming)
+        self.prefetched = None
+        # (name, position, duration, paused, monotonic time of the reading)
+        self.info = (None, None, None, None, 0.0)
+        self.quit_daemon = False
+        self._stopping = threading.Event()
+        self.watcher = DirectoryWatcher()
+        self.folder_watcher = FolderWatcher(MEDIA_EXTENSIONS)
+        watch_watched_folders(self.state, self.folder_watcher)
+
+    # ── Layout ────────────────────────────────────────────────────────
+    def compose(self) -> ComposeResult:
+        with Horizontal(id="panes"):
+            with Vertical(id="browser-pane"):
+                yield Static(id="browser-header", classes="header")
+                yield VirtualList(self._browser_row, id="browser")
+            with Vertical(id="playlist-pane"):
+                yield Static(id="playlist-header", classes="header")
+                yield VirtualList(self._playlist_row, id="playlist")
+        yield Static(id="info")
+        yield Static(id="status")
+        yield Static(id="overlay")
+
+    def _browser_row(self, index: int):
+        # Labels are made per visible row, from the listing's dir flags.
+        state = self.state
+        entry = self.entries[index]
+        start = int(self.entries_have_parent)
+        if index < start:
+            label, is_dir = "[DIR] ..", True
+        else:
+            is_dir = index < start + self.dir_count
+            label = entry_label(entry, state.folder_summaries, is_dir)
+            is_dir = is_dir or is_cue_sheet(entry)
+        text = f"{index + 1:>3}. {label}"
+        if state.active_pane == "browser" and index == state.selected:
+            return text, STYLE_SELECTED
+        if is_dir:
+            return text, STYLE_DIR
+        if entry.suffix.lower() in MEDIA_EXTENSIONS or is_cue_track(entry):
+            return text, STYLE_MEDIA
+        return text, STYLE_PLAIN
+
+    def _playlist_row(self, index: int):
+        state = self.state
+        name = state.playlist.name(index)
+        is_track = is_cue_track(name)
+        if is_track:
+            name = track_label(state.playlist.path_str(index))
+        marked = index in state.marked
+        text = f"{index + 1:>3}{'*' if marked else '.'} {name}"
+        if state.active_pane == "playlist" and index == state.playlist_selected:
+            return text, STYLE_SELECTED
+        if marked:
+            return text, STYLE_MARKED
+        if is_track or os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+            return text, STYLE_MEDIA
+        return text, STYLE_PLAIN
+
+    # ── Start-up and shutdown ────────────────────────────────────────
+    def on_mount(self) -> None:
+        loop = self._ui_loop = asyncio.get_running_loop()
+        # started here so cProfile covers the thread that runs the handlers
+        self.profiler = create_profiler("tui", force=self.profile)
+        if self.profiler is not None:
+            self.set_interval(PROFILER_TICK_SEC, self.profiler.tick)
+        if self.watcher.fileno() is not None:
+            loop.add_reader(self.watcher.fileno(), self._on_fs_event)
+        if self.folder_watcher.fileno() is not None:
+            loop.add_reader(self.folder_watcher.fileno(), self._on_folder_event)
+            # files that arrived since the last session
+            self._take_watched_files()
+        self.set_interval(CLOCK_TICK_SEC, self._tick_clock)
+        self.run_worker(self._daemon_events, thread=True, exit_on_error=False)
+        self._refresh_listing(force=True)
+        self._redraw()
+
+    def on_unmount(self) -> None:
+        self._stopping.set()
+        for job in self.jobs:
+            job.cancel()
+            job.apply(self.state)
+        if self.summary_job is not None:
+            self.summary_job.cancel()
+        record_watch_scans(self.state, self.folder_watcher)
+        save_state(self.state)
+        summary_cache.save()
+        fingerprints.save()
+        loop = asyncio.get_running_loop()
+        for watcher in (self.watcher, self.folder_watcher):
+            if watcher.fileno() is not None:
+                loop.remove_reader(watcher.fileno())
+            watcher.close()
+        if self.quit_daemon and self.daemon_ready:
+            self.player.quit_daemon()
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.frame_stats_path is not None:
+            try:
+                self.frame_stats.dump(self.frame_stats_path)
+            except OSError:
+                pass
+
+    def _daemon_events(self) -> None:
+        # Worker thread: start the daemon if needed, then turn the event
+        # stream into UI updates. Reconnects when the daemon goes away.
+        while not self._stopping.is_set():
+            if not ensure_daemon_running():
+                self._from_thread(self._show_status, daemon_error_message(), True)
+                self._stopping.wait(RETRY_INTERVAL_SEC)
+                continue
+            sock = self.player.open_event_stream()
+            if sock is None:
+                self._stopping.wait(RETRY_INTERVAL_SEC)
+                continue
+            self._from_thread(self._daemon_connected)
+            sock.settimeout(1.0)
+            buf = b""
+            try:
+                while not self._stopping.is_set():
+                    try:
+                        chunk = sock.recv(4096)
+                    except TimeoutError:
+                        continue
+                    if not chunk:
+                        break
+                    *lines, buf = (buf + chunk).split(b"\n")
+                    if lines:
+                        self._from_thread(self._on_daemon_events, lines)
+            except OSError:
+                pass
+            finally:
+                sock.close()
+
+    def _daemon_connected(self) -> None:
+        self.daemon_ready = True
+        self._refresh_info()
+
+    # ── Event sources ────────────────────────────────────────────────
+    def _on_fs_event(self) -> None:
+        if self.watcher.read_events():
+            self._refresh_listing(force=True)
+            self._redraw()
+
+    def _on_folder_event(self) -> None:
+        self.folder_watcher.read_events(time.monotonic())
+        self._take_watched_files()
+
+    def _take_watched_files(self) -> None:
+        ready, next_due = self.folder_watcher.take_ready(time.monotonic())
+        if next_due is not None:
+            delay = max(0.001, next_due - time.monotonic())
+            self.set_timer(delay, self._take_watched_files)
+        fresh = [path for path in ready if path not in self.state.playlist]
+        if fresh:
+            self.state.playlist.extend(fresh)
+            self._schedule_save()
+            self._show_status(f"Added {len(fresh)} new track(s) from watched folders")
+            self._redraw()
+
+    def _on_daemon_events(self, lines) -> None:
+        if b"EVENT\tnext" in lines:
+            self._play_next(requested=True)
+        self._refresh_info()
+
+    def _from_thread(self, callback, *args) -> None:
+        # Unlike call_from_thread this does not wait, so worker and job
+        # threads can never block on a UI that is shutting down. call_later
+        # runs the callback from the app's message queue, in its context.
+        try:
+            self._ui_loop.call_soon_threadsafe(self.call_later, callback, *args)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _notify_jobs(self) -> None:
+        self._from_thread(self._apply_jobs)
+
+    def _apply_jobs(self) -> None:
+        for job in list(self.jobs):
+            finished = job.done
+            if job.apply(self.state):
+                self._schedule_save()
+            if finished:
+                self.jobs.remove(job)
+                self._show_status(job.summary())
+            elif self.jobs:
+                self._show_status(" | ".join(j.progress_text() for j in self.jobs))
+        self._redraw()
+
+    def _notify_summary(self) -> None:
+        self._from_thread(self._apply_summary)
+
+    def _apply_summary(self) -> None:
+        job = self.summary_job
+        if job is not None and job.apply(self.state):
+            self.query_one("#browser", VirtualList).refresh()
+            self._redraw()
+
+    def _schedule_save(self) -> None:
+        if self.save_timer is None:
+            self.save_timer = self.set_timer(SAVE_DELAY_SEC, self._save)
+
+    def _save(self) -> None:
+        self.save_timer = None
+        record_watch_scans(self.state, self.folder_watcher)
+        save_state(self.state)
+        fingerprints.save()
+
+    # ── Playback info ────────────────────────────────────────────────
+    def _refresh_info(self) -> None:
+        state = self.state
+        was_playing = self.info[0] is not None
+        cue_track_ended = False
+        playing_index = state.playing_index
+        status = self.player.get_status() if self.daemon_ready else None
+        if status and status["playing"]:
+            if (
+                state.last_playing_path is not None
+                and state.last_playing_path.name != status["name"]
+            ):
+                # the daemon went on into the next track of a CUE sheet
+                cue_track_ended = follow_cue_track(state, status["name"])
+            self.info = (
+                status["name"],
+                status["position"],
+                status["duration"],
+                status["paused"],
+                time.monotonic(),
+            )
+            self._remember_position()
+        else:
+            self.info = (None, None, None, None, time.monotonic())
+        if (was_playing and self.info[0] is None) or cue_track_ended:
+            self._play_next(requested=False)
+        elif state.playing_index != playing_index:
+            self._redraw()  # followed into the next CUE track
+        if self.daemon_ready:
+            self.prefetched = prefetch_upcoming(state, self.player, self.prefetched)
+        self._draw_info()
+
+    def _current_position(self):
+        name, position, duration, paused, at = self.info
+        if name is None or position is None or paused:
+            return position
+        position += time.monotonic() - at
+        return min(position, duration) if duration else position
+
+    def _remember_position(self) -> None:
+        state = self.state
+        name, _position, duration = self.info[:3]
+        if state.last_playing_path is not None and state.last_playing_path.name == name:
+            remember_position(state, state.last_playing_path, self._current_position(), duration)
+            remember_duration(state, state.last_playing_path, duration)
+
+    def _tick_clock(self) -> None:
+        if self.info[0] is not None and not self.info[3]:
+            self._remember_position()
+            self._draw_info()
+
+    def _play_next(self, requested: bool) -> None:
+        # Same rules as the curses loop's autoplay.
+        state = self.state
+        if not state.playlist:
+            return
+        if requested and not state.playing_from_playlist:
+            try:
+                state.playing_index = state.playlist.index(state.last_playing_path)
+            except (TypeError, ValueError):
+                state.playing_index = -1
+            state.playing_from_playlist = True
+        elif not requested and not (
+            state.playing_from_playlist and state.active_pane == "playlist"
+        ):
+            return
+        next_index = next_playlist_index(state)
+        if next_index < 0:
+            state.playing_from_playlist = False
+            state.playing_index = -1
+            if requested:
+                self._show_status("End of playlist")
+            return
+        state.playing_index = state.playlist_selected = next_index
+        next_path = state.playlist[next_index]
+        state.last_playing_path = next_path
+        save_state(state)
+        result = handle_action(
+            ("select_audio", next_path, resume_position(state, next_path)), self.player
+        )
+        if result:
+            self._show_status(result[1], result[0] == "error")
+        self._redraw()
+
+    # ── Keys ─────────────────────────────────────────────────────────
+    def on_key(self, event) -> None:
+        key = _curses_key(event)
+        if key is None:
+            return
+        event.prevent_default()
+        event.stop()
+        if key in (ord("q"), ord("Q"), 27):
+            self.quit_daemon = key == ord("Q")
+            self.exit()
+            return
+        if key == curses.KEY_F12:  # frame timing overlay
+            self.show_frame_stats = not self.show_frame_stats
+            self._redraw()
+            return
+        state = self.state
+        visible_height = max(1, self.query_one("#browser", VirtualList).size.height)
+        with self.frame_stats.measure("keys"):
+            action = handle_key(key, self.entries, state, visible_height)
+        result = None
+        if action and action[0] in JOB_ACTIONS:
+            result = start_job_action(action, state, self.jobs, self._notify_jobs)
+            action = None
+        if action and action[0] == "watch_folder":
+            result = toggle_watched_folder(state, self.folder_watcher, action[1])
+            action = None
+        if action and action[0] in SEEK_ACTIONS and self.daemon_ready:
+            self._queue_seek(action)
+            action = None
+        if action and action[0] == "select_audio":
+            state.last_playing_path = action[1]
+            save_state(state)
+            action = (*action, resume_position(state, action[1]))
+        if action and action[0] in PLAYER_ACTIONS and not self.daemon_ready:
+            result = ("error", "Playback daemon is unavailable. Waiting for reconnection...")
+        elif action:
+            with self.frame_stats.measure("daemon"):
+                result = handle_action(action, self.player)
+        if result:
+            self._show_status(result[1], result[0] == "error")
+        else:
+            self._show_status("")
+        with self.frame_stats.measure("listing"):
+            self._refresh_listing()
+        self._redraw()
+
+    def _queue_seek(self, action) -> None:
+        # merged with seeks still waiting to be sent
+        self.pending_seek = merge_seek(self.pending_seek, action)
+        if self.seek_timer is None:
+            wait = self.last_seek_at + SEEK_INTERVAL_SEC - time.monotonic()
+            # (a zero delay trips a division by zero inside Textual's Timer)
+            self.seek_timer = self.set_timer(max(0.001, wait), self._send_seek)
+
+    def _send_seek(self) -> None:
+        if self.seek_timer is not None:
+            self.seek_timer.stop()
+            self.seek_timer = None
+        pending, self.pending_seek = self.pending_seek, ()
+        if not pending:
+            return
+        self.last_seek_at = time.monotonic()
+        result = send_seeks(pending, self.player)
+        if result:
+            self._show_status(result[1], True)
+        # the daemon sends no event for seeks
+        self._refresh_info()
+
+    # ── Drawing ──────────────────────────────────────────────────────
+    def _refresh_listing(self, force: bool = False) -> None:
+        state = self.state
+        key_now = (state.current_path, state.show_hidden)
+        sort_now = sort_mode_for(state, state.current_path)
+        if force or key_now != self.listing_key:
+            if key_now != self.listing_key:
+                state.folder_summaries.clear()
+            self.entries, self.entries_have_parent = list_entries(state)
+            dirs = listed_dirs(state, self.entries, self.entries_have_parent)
+            self.dir_count = len(dirs)
+            self.listing_key = key_now
+            self.watcher.watch(state.current_path)
+            if self.summary_job is not None:
+                self.summary_job.cancel()
+            self.summary_job = start_folder_summary(state, dirs, self._notify_summary)
+        elif sort_now != self.listing_sort:
+            selected_path = self.entries[state.selected] if self.entries else None
+            self.entries, self.entries_have_parent = list_entries(state, rescan=False)
+            self.dir_count = len(listed_dirs(state, self.entries, self.entries_have_parent))
+            try:
+                state.selected = self.entries.index(selected_path)
+            except ValueError:
+                pass
+        self.listing_sort = sort_now
+
+    def _redraw(self) -> None:
+        with self.frame_stats.measure("render"):
+            self._draw()
+        timings = self.frame_stats.end_frame()
+        if self.profiler is not None and timings:
+            self.profiler.record_slow("frame", timings["frame"], {"phases": timings})
+
+    def _draw(self) -> None:
+        state = self.state
+        browser = self.query_one("#browser", VirtualList)
+        playlist = self.query_one("#playlist", VirtualList)
+        height = max(1, browser.size.height)
+        state.selected, state.scroll = clamp_selection(
+            state.selected, state.scroll, height, self.entries
+        )
+        clamp_playlist_selection(state, max(1, playlist.size.height))
+        browser.show(len(self.entries), state.scroll)
+        playlist.show(len(state.playlist), state.playlist_scroll)
+
+        browser_header = self.query_one("#browser-header", Static)
+        playlist_header = self.query_one("#playlist-header", Static)
+        header = f" Browsing: {state.current_path} "
+        summary = state.folder_summaries.get(str(state.current_path))
+        if summary is not None:
+            header += f"({summary.label()}) "
+        browser_header.update(Text(header))
+        header = f" Playlist ({len(state.playlist)} items"
+        if state.marked:
+            header += f", {len(state.marked)} marked"
+        playlist_header.update(Text(header + ") "))
+        browser_header.set_class(state.active_pane == "browser", "active")
+        playlist_header.set_class(state.active_pane == "playlist", "active")
+
+        overlay = self.query_one("#overlay", Static)
+        if self.show_frame_stats:
+            overlay.update(Text("\n".join(self.frame_stats.overlay_lines())))
+            overlay.display = True
+        elif state.duplicates is not None:
+            overlay.update(Text("\n".join(state.duplicates.lines(state.playlist, height))))
+            overlay.display = True
+        else:
+            overlay.display = False
+        self._draw_info()
+
+    def _draw_info(self) -> None:
+        state = self.state
+        name, _position, duration, paused, _at = self.info
+        position = self._current_position()
+        text = Text()
+        if name is not None:
+            text.append("> Now playing: ", "bold green")
+            text.append(now_playing_label(state, name), "bold magenta")
+        else:
+            text.append("  Stopped: ", "bold green")
+            text.append("(none)", "bold magenta")
+        time_text = f"  {format_time(position)} / {format_time(duration)}"
+        if duration and position is not None:
+            percent = int(max(0, min(100, position / duration * 100)))
+            time_text += f" ({percent:3d}%)"
+        if paused:
+            time_text += " [paused]"
+        text.append(time_text, "cyan")
+        text.append("  [Repeat: ALL]" if state.repeat_all else "  [Repeat: Off]", "yellow")
+        text.append("  [Shuffle: On]" if state.random_play else "  [Shuffle: Off]", "yellow")
+        self.query_one("#info", Static).update(text)
+
+    def _show_status(self, message: str, error: bool = False) -> None:
+        status = self.query_one("#status", Static)
+        status.update(Text(f"ERROR: {message}" if error else message))
+        status.set_class(error, "error")
+
+
+def run(start_path: Path, frame_stats_path: Path | None = None, profile: bool = False) -> None:
+    TupletApp(start_path, frame_stats_path, profile).run()
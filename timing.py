@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+CONFIG_DIR = Path.home() / ".tuplet_tui_audio_player"
+STARTUP_TIMING_PATH = CONFIG_DIR / "startup_timing.jsonl"
+STARTUP_TIMING_ENV = "TUPLET_STARTUP_TIMING"
+
+
+def startup_timing_enabled() -> bool:
+    return os.environ.get(STARTUP_TIMING_ENV, "") not in ("", "0")
+
+
+def record_startup_timing(event: str, seconds: float, **extra) -> None:
+    """Append one startup measurement to ``startup_timing.jsonl``.
+
+    Does nothing unless ``TUPLET_STARTUP_TIMING`` is set, so callers can
+    record unconditionally on the startup path.
+    """
+    if not startup_timing_enabled():
+        return
+    entry = {
+        "time": time.time(),
+        "event": event,
+        "ms": round(seconds * 1000.0, 3),
+        "pid": os.getpid(),
+    }
+    entry.update(extra)
+    try:
+        STARTUP_TIMING_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(STARTUP_TIMING_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception:
+        # Timing reports must never break startup.
+        pass
@@ -1,6 +1,9 @@
 import curses
 import unicodedata
 
+from cue import is_cue_sheet, is_cue_track, track_label
+from formatting import format_time
+
 MEDIA_EXTENSIONS = {
     # Audio formats
     ".mp3",
@@ -156,6 +159,14 @@ def get_visible_height(stdscr):
     return max(0, max_y - 3)
 
 
+def playlist_label(playlist, index: int) -> str:
+    """Text of a playlist row: the file name, or a CUE track's title."""
+    name = playlist.name(index)
+    if is_cue_track(name):
+        return track_label(playlist.path_str(index))
+    return name
+
+
 def render_browser(
     stdscr,
     current_path,
@@ -170,6 +181,8 @@ def render_browser(
     playlist_scroll,
     browser_scroll_offset,
     playlist_scroll_offset,
+    marked=(),
+    folder_summary=None,
 ):
     """Render the split-pane view: file browser on the left, playlist on the right."""
     stdscr.erase()
@@ -187,7 +200,11 @@ def render_browser(
 
     # ── Headers ───────────────────────────────────────────────────────
     browser_header = f" Browsing: {current_path} "
+    if folder_summary is not None:
+        browser_header += f"({folder_summary.label()}) "
     playlist_header = f" Playlist ({len(playlist)} items) "
+    if marked:
+        playlist_header = f" Playlist ({len(playlist)} items, {len(marked)} marked) "
     br_attr = color_pair(
         CP_HEADER, curses.A_BOLD | (curses.A_UNDERLINE if browser_is_active else 0)
     )
@@ -234,9 +251,9 @@ def render_browser(
 
             if browser_is_active and idx == selected:
                 attr = color_pair(CP_SELECTED, curses.A_BOLD)
-            elif entry.is_dir():
+            elif entry.is_dir() or is_cue_sheet(entry):
                 attr = color_pair(CP_DIR, curses.A_BOLD)
-            elif entry.suffix.lower() in MEDIA_EXTENSIONS:
+            elif entry.suffix.lower() in MEDIA_EXTENSIONS or is_cue_track(entry):
                 attr = color_pair(CP_GREEN)
             else:
                 attr = curses.A_NORMAL
@@ -258,8 +275,12 @@ def render_browser(
     else:
         end = min(len(playlist), playlist_scroll + visible_height)
         for row, idx in enumerate(range(playlist_scroll, end), start=1):
-            num = f"{idx + 1:>3}. "
-            name = playlist[idx].name
+            # marked entries are numbered "12* " instead of "12. "
+            num = f"{idx + 1:>3}{'*' if idx in marked else '.'} "
+            name = playlist.name(idx)
+            is_track = is_cue_track(name)
+            if is_track:
+                name = track_label(playlist.path_str(idx))
             name_width = max(0, playlist_width - len(num))
             if (not browser_is_active) and idx == playlist_selected and name_width > 0:
                 name_part = _scrolling_slice(name, name_width, playlist_scroll_offset)
@@ -270,7 +291,9 @@ def render_browser(
 
             if (not browser_is_active) and idx == playlist_selected:
                 attr = color_pair(CP_SELECTED, curses.A_BOLD)
-            elif playlist[idx].suffix.lower() in MEDIA_EXTENSIONS:
+            elif idx in marked:
+                attr = color_pair(CP_STATUS, curses.A_BOLD)
+            elif playlist[idx].suffix.lower() in MEDIA_EXTENSIONS or is_track:
                 attr = color_pair(CP_GREEN)
             else:
                 attr = curses.A_NORMAL
@@ -326,20 +349,6 @@ def show_error(stdscr, message):
     stdscr.refresh()
 
 
-def _format_time(seconds):
-    if seconds is None:
-        return "--:--"
-    try:
-        total = max(0, int(float(seconds)))
-    except (ValueError, TypeError, OverflowError):
-        return "--:--"
-    minutes, secs = divmod(total, 60)
-    hours, minutes = divmod(minutes, 60)
-    if hours:
-        return f"{hours:d}:{minutes:02d}:{secs:02d}"
-    return f"{minutes:02d}:{secs:02d}"
-
-
 def show_info_bar(
     stdscr,
     playing_name=None,
@@ -361,7 +370,7 @@ def show_info_bar(
     label = "> Now playing: " if playing_name else "  Stopped: "
     name = playing_name or "(none)"
 
-    time_text = f"  {_format_time(time_pos)} / {_format_time(duration)}"
+    time_text = f"  {format_time(time_pos)} / {format_time(duration)}"
     percent = None
     if duration and time_pos is not None and duration > 0:
         percent = int(max(0, min(100, (time_pos / duration) * 100)))
@@ -398,3 +407,21 @@ def show_info_bar(
                     stdscr.addstr(line, col, " " * filled, color_pair(CP_BAR))
     except curses.error:
         pass
+
+
+def show_overlay(stdscr, lines):
+    """Draw *lines* in a box anchored to the top-right corner."""
+    max_y, max_x = stdscr.getmaxyx()
+    if not lines:
+        return
+    width = min(max(len(line) for line in lines) + 2, max_x - 1)
+    height = min(len(lines), max(0, max_y - 3))
+    left = max(0, max_x - width - 1)
+    attr = color_pair(CP_INACTIVE_SEL, curses.A_BOLD)
+    for row in range(height):
+        text = f" {lines[row]}".ljust(width)[:width]
+        try:
+            stdscr.addstr(1 + row, left, text, attr)
+        except curses.error:
+            pass
+    stdscr.refresh()
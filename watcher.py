@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+DIRECTORY_MASK = (
+    IN_ATTRIB
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+FOLDER_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+# A new file is reported once it has not been written to for this long (and
+# its size is unchanged), so files still being copied or recorded are not
+# added half-way.
+SETTLE_SEC = 2.0
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """Watch the directory shown in the browser for changes.
+
+    On Linux this wraps an inotify descriptor that can be handed to an event
+    loop via :meth:`fileno`. Elsewhere :meth:`fileno` returns ``None`` and the
+    caller is expected to call :meth:`poll_changed` on a slow timer instead.
+    """
+
+    def __init__(self):
+        self._libc = _load_inotify()
+        self._fd: int | None = None
+        self._wd: int | None = None
+        self._path: Path | None = None
+        self._mtime: float | None = None
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+
+    def fileno(self) -> int | None:
+        return self._fd
+
+    def watch(self, path: Path) -> None:
+        if path == self._path:
+            return
+        self._path = path
+        self._mtime = self._stat_mtime(path)
+        if self._fd is None:
+            return
+        if self._wd is not None:
+            self._libc.inotify_rm_watch(self._fd, self._wd)
+            self._wd = None
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(str(path)), DIRECTORY_MASK
+        )
+        if wd >= 0:
+            self._wd = wd
+
+    def read_events(self) -> bool:
+        """Drain pending inotify events; return True if anything changed."""
+        if self._fd is None:
+            return False
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                break
+            if not data:
+                break
+            changed = True
+        return changed
+
+    def poll_changed(self) -> bool:
+        """Fallback for platforms without inotify: compare directory mtime."""
+        if self._path is None:
+            return False
+        mtime = self._stat_mtime(self._path)
+        if mtime != self._mtime:
+            self._mtime = mtime
+            return True
+        return False
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+            self._wd = None
+
+    @staticmethod
+    def _stat_mtime(path: Path) -> float | None:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+
+def _is_below(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _changed_after(entry: os.DirEntry, since: float) -> bool:
+    # ctime too: a file moved or hard-linked in keeps its old mtime
+    st = entry.stat(follow_symlinks=False)
+    return max(st.st_mtime, st.st_ctime) > since
+
+
+class FolderWatcher:
+    """Report new files below a set of folders, watched recursively.
+
+    Each folder and all of its subfolders get an inotify watch; folders
+    created (or moved in) later are watched as they appear. New files whose
+    suffix is in *extensions* are reported by :meth:`take_ready` once they
+    have settled: :data:`SETTLE_SEC` after they were last written, with an
+    unchanged size. Each file is reported once: files already there when a
+    folder is added, or already reported, are not reported again until they
+    are deleted or moved away (so entries removed from the playlist stay
+    removed). A folder added with *since* (from :meth:`seen_until` in an
+    earlier session) reports the files changed after that time as well. If the kernel's event queue overflows the folders are scanned
+    again for files missed meanwhile. Hidden files and folders are ignored.
+    Without inotify :meth:`fileno` returns ``None`` and nothing is reported.
+    """
+
+    def __init__(self, extensions):
+        self._libc = _load_inotify()
+        self._extensions = extensions
+        self._fd: int | None = None
+        # watch descriptor <-> folder path
+        self._dirs: dict[int, str] = {}
+        self._wds: dict[str, int] = {}
+        self.roots: set[str] = set()
+        # path -> (size when last seen, time to look at it again)
+        self._pending: dict[str, tuple[int, float]] = {}
+        # media files present when watched, or already reported
+        self._known: set[str] = set()
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+
+    def fileno(self) -> int | None:
+        return self._fd
+
+    def add(self, root: Path, since: float | None = None) -> bool:
+        """Watch *root* and its subfolders; returns False without inotify.
+
+        Files changed after the wall-clock time *since* count as new.
+        """
+        if self._fd is None:
+            return False
+        root = os.path.normpath(str(root))
+        self.roots.add(root)
+        self._watch_tree(root, None, since)
+        return True
+
+    def seen_until(self, root) -> float:
+        """Wall-clock time up to which new files below *root* have been
+        reported: now, or just before the oldest one still settling."""
+        root = os.path.normpath(str(root))
+        until = time.time()
+        for path in self._pending:
+            if _is_below(path, root):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                until = min(until, max(st.st_mtime, st.st_ctime) - 1)
+        return until
+
+    def remove(self, root: Path) -> None:
+        root = os.path.normpath(str(root))
+        self.roots.discard(root)
+        for path in list(self._wds):
+            if not _is_below(path, root):
+                continue
+            if any(_is_below(path, other) for other in self.roots):
+                continue  # still below another watched folder
+            wd = self._wds.pop(path)
+            self._dirs.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+        for path in list(self._pending):
+            if _is_below(path, root):
+                del self._pending[path]
+        self._known = {
+            path
+            for path in self._known
+            if not _is_below(path, root) or any(_is_below(path, other) for other in self.roots)
+        }
+
+    def _forget_below(self, root: str) -> None:
+        for path in list(self._pending):
+            if _is_below(path, root):
+                del self._pending[path]
+        self._known = {path for path in self._known if not _is_below(path, root)}
+
+    def _watch_tree(self, top: str, now: float | None, since: float | None = None) -> None:
+        # Walk without following symlinks. With *now* set, files not seen
+        # before (written before their watch existed) count as new; without
+        # it they are only remembered as known, unless changed after the
+        # wall-clock time *since*.
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            if directory not in self._wds:
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(directory), FOLDER_MASK
+                )
+                if wd < 0:
+                    # out of watches (ENOSPC) or the folder vanished
+                    continue
+                self._dirs[wd] = directory
+                self._wds[directory] = wd
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif now is not None:
+                        if entry.path not in self._pending:
+                            self._schedule(entry.path, now)
+                    elif not self._is_media(entry.path):
+                        continue
+                    elif since is not None and _changed_after(entry, since):
+                        self._schedule(entry.path, time.monotonic())
+                    else:
+                        self._known.add(entry.path)
+                except OSError:
+                    continue
+
+    def _is_media(self, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in self._extensions
+
+    def _schedule(self, path: str, now: float) -> None:
+        if path in self._known or not self._is_media(path):
+            return
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return
+        self._pending[path] = (size, now + SETTLE_SEC)
+
+    def read_events(self, now: float) -> None:
+        """Drain pending inotify events."""
+        if self._fd is None:
+            return
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                else:
+                    self._handle_event(wd, mask, name, now)
+        if overflowed:
+            # events were dropped: pick up whatever they would have reported
+            for root in list(self.roots):
+                self._watch_tree(root, now)
+
+    def _handle_event(self, wd: int, mask: int, name: str, now: float) -> None:
+        if mask & IN_IGNORED:
+            directory = self._dirs.pop(wd, None)
+            if directory is not None:
+                self._wds.pop(directory, None)
+            return
+        directory = self._dirs.get(wd)
+        if directory is None or not name or name.startswith("."):
+            return
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path, now)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._forget_below(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._pending.pop(path, None)
+            self._known.discard(path)
+        elif mask & IN_MODIFY:
+            pending = self._pending.get(path)
+            if pending is not None:
+                # still being written: restart the settle time, without a
+                # stat per write
+                self._pending[path] = (pending[0], now + SETTLE_SEC)
+            else:
+                self._schedule(path, now)
+        elif mask & (IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO):
+            self._schedule(path, now)
+
+    def take_ready(self, now: float) -> tuple[list[str], float | None]:
+        """Return the settled new files, and when to call again (or None)."""
+        ready = []
+        next_due = None
+        for path, (size, due) in list(self._pending.items()):
+            if due > now:
+                next_due = due if next_due is None else min(next_due, due)
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if st.st_size == size:
+                del self._pending[path]
+                self._known.add(path)
+                ready.append(path)
+            else:
+                # still being written: check again after another pause
+                due = now + SETTLE_SEC
+                self._pending[path] = (st.st_size, due)
+                next_due = due if next_due is None else min(next_due, due)
+        ready.sort()
+        return ready, next_due
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+            self._dirs.clear()
+            self._wds.clear()
+            self._known.clear()